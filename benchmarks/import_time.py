@@ -0,0 +1,41 @@
+"""Time a cold `import weather_api`, each run in a new interpreter.
+
+    python -m benchmarks.import_time --repeat 10 --max 1.0
+
+Exits with status 1 when the best time is above `--max` seconds.
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import List, Optional
+
+CODE = "import time; t = time.perf_counter(); import weather_api; "
+CODE += "print(time.perf_counter() - t)"
+
+
+def import_time(repeat: int = 5) -> float:
+    """The best of `repeat` cold import times, in seconds."""
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", CODE], capture_output=True, text=True, check=True
+        )
+        times.append(float(output.stdout))
+    return min(times)
+
+
+def main(argv: Optional[List[str]] = None) -> float:
+    parser = argparse.ArgumentParser(description="Time a cold `import weather_api`.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max", type=float, help="fail above this many seconds")
+    args = parser.parse_args(argv)
+    seconds = import_time(args.repeat)
+    print(f"import weather_api: {seconds:.3f} s")
+    if args.max is not None and seconds > args.max:
+        sys.exit(1)
+    return seconds
+
+
+if __name__ == "__main__":
+    main()
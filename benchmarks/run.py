@@ -0,0 +1,245 @@
+"""Time `to_dict_frame`, `to_xr` and `get_metadata` against a local synthetic server.
+
+    python -m benchmarks.run --stations 1 10 --years 1 5 --frequency daily hourly
+    python -m benchmarks.run --network hydrometric --frequency daily realtime
+    python -m benchmarks.run --compare benchmarks/results/<earlier run>.json
+
+Each run is saved as JSON in `benchmarks/results`, named after the package version and
+the time of the run, so that runs of different releases can be compared with `--compare`.
+Realtime hydrometric data covers the last 30 days whatever `--years`, so it is run once
+per number of stations.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from weather_api import HydrometricStations, WeatherStations
+from weather_api.utils.catalog import StationCatalog
+from weather_api.utils.dataframe import DataFrameHandler
+from weather_api.utils.url_builder import UrlBuilder
+
+from .import_time import import_time
+from .server import SyntheticGeoMet
+
+RESULTS_DIR = Path(__file__).parent / "results"
+END_DATE = datetime(2024, 12, 31)
+FREQUENCIES = {"climate": ["daily", "hourly"], "hydrometric": ["daily", "realtime"]}
+
+
+def _measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Best wall time over `repeat` runs, then the peak traced memory of one more run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 2**20}
+
+
+def run_case(
+    network: str,
+    stations: List[str],
+    years: int,
+    frequency: str,
+    repeat: int,
+) -> List[Dict[str, object]]:
+    kwargs = dict(
+        stn_id=stations,
+        start_date=datetime(END_DATE.year - years + 1, 1, 1),
+        end_date=END_DATE,
+    )
+    if network == "climate":
+        api = WeatherStations
+        kwargs["hourly"] = frequency == "hourly"
+    else:
+        api = HydrometricStations
+        kwargs["realtime"] = frequency == "realtime"
+    case = {
+        "network": network,
+        "stations": len(stations),
+        "years": years,
+        "frequency": frequency,
+    }
+    results = []
+
+    def to_dict_frame():
+        return api(**kwargs).to_dict_frame()
+
+    wa = api(**kwargs)
+    dict_frame = wa.to_dict_frame()
+    totals = wa.stats.totals()
+    measured = _measure(to_dict_frame, repeat)
+    measured["rows_per_s"] = totals["rows"] / measured["seconds"]
+    results.append(
+        {
+            **case,
+            "op": "to_dict_frame",
+            **measured,
+            "rows": totals["rows"],
+            "requests": totals["requests"],
+            "bytes": totals["bytes"],
+        }
+    )
+
+    def to_xr():
+        wa.dict_frame = dict_frame
+        return wa.to_xr()
+
+    measured = _measure(to_xr, repeat)
+    measured["rows_per_s"] = totals["rows"] / measured["seconds"]
+    results.append({**case, "op": "to_xr", **measured, "rows": totals["rows"]})
+
+    def get_metadata():
+        StationCatalog.clear()
+        return api(**kwargs).get_metadata()
+
+    results.append({**case, "op": "get_metadata", **_measure(get_metadata, repeat)})
+    return results
+
+
+def _version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("weather_api")
+    except Exception:
+        return "unknown"
+
+
+def _commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print the time and memory of `current` relative to `baseline`, case by case."""
+    print(
+        f"import weather_api: {current['import_seconds']:.3f} s "
+        + f"({baseline.get('import_seconds', float('nan')):.3f} s before)"
+    )
+    key_fields = ("op", "network", "frequency", "stations", "years")
+    # runs from before the hydrometric cases only covered climate data
+    before = {
+        tuple({"network": "climate", **r}[k] for k in key_fields): r
+        for r in baseline["results"]
+    }
+    print(f"{'case':<48}{'seconds':>12}{'ratio':>8}{'peak MB':>12}{'ratio':>8}")
+    for result in current["results"]:
+        key = tuple(result[k] for k in key_fields)
+        name = "{} {} {} {}st {}y".format(*key)
+        old = before.get(key)
+        time_ratio = f"{result['seconds'] / old['seconds']:.2f}" if old else "-"
+        mem_ratio = f"{result['peak_mb'] / old['peak_mb']:.2f}" if old else "-"
+        print(
+            f"{name:<48}{result['seconds']:>12.3f}{time_ratio:>8}"
+            f"{result['peak_mb']:>12.1f}{mem_ratio:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Benchmark weather_api against a local synthetic GeoMet server."
+    )
+    parser.add_argument("--stations", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10])
+    parser.add_argument(
+        "--network",
+        nargs="+",
+        choices=list(FREQUENCIES),
+        default=list(FREQUENCIES),
+    )
+    parser.add_argument(
+        "--frequency",
+        nargs="+",
+        choices=["daily", "hourly", "realtime"],
+        default=["daily", "hourly", "realtime"],
+        help="hourly only applies to climate data and realtime to hydrometric data",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument("--page-size", type=int, default=UrlBuilder.MAX_LIMIT)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="where to save the results")
+    parser.add_argument("--compare", type=Path, help="earlier results to compare with")
+    args = parser.parse_args(argv)
+
+    data = SyntheticGeoMet(
+        n_stations=max(args.stations),
+        first_year=END_DATE.year - max(args.years) + 1,
+        last_date=END_DATE.strftime("%Y-%m-%d"),
+        latency=args.latency,
+        max_page_size=args.page_size,
+    )
+    UrlBuilder.MAX_LIMIT = args.page_size
+    DataFrameHandler.MAX_PAGE_SIZE = args.page_size
+    results = []
+    with data:
+        UrlBuilder.BASE_URL = data.url
+        for network in args.network:
+            for frequency in args.frequency:
+                if frequency not in FREQUENCIES[network]:
+                    continue
+                years_cases = args.years[:1] if frequency == "realtime" else args.years
+                for years in years_cases:
+                    for n_stations in args.stations:
+                        print(
+                            f"{network} {frequency} {n_stations} station(s) "
+                            + f"{years} year(s)"
+                        )
+                        stations = data.station_ids(network, n_stations)
+                        results.extend(
+                            run_case(network, stations, years, frequency, args.repeat)
+                        )
+
+    run = {
+        "version": _version(),
+        "commit": _commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "latency": args.latency,
+            "page_size": args.page_size,
+            "repeat": args.repeat,
+        },
+        "import_seconds": import_time(),
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"{run['version']}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2))
+    print(f"Results saved to {output}")
+    if args.compare is not None:
+        compare(json.loads(args.compare.read_text()), run)
+    return run
+
+
+if __name__ == "__main__":
+    main()
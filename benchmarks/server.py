@@ -0,0 +1,387 @@
+"""Local stand-ins for the GeoMet `collections/*/items` endpoints.
+
+`StandInServer` answers requests over HTTP like the real server (paging, `bbox`,
+`datetime` and `properties` filters, ETags and gzip) and can be told to fail; the tests
+serve fixed frames through it and the benchmarks serve `SyntheticGeoMet` data.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from weather_api.utils.data_types import (
+    HydrometricStationsDataTypes,
+    WeatherStationsDataTypes,
+)
+
+
+def select_bbox(df: pd.DataFrame, bbox: str) -> pd.DataFrame:
+    """The rows of `df` whose `x` and `y` fall within a "left,bottom,right,top" box."""
+    left, bottom, right, top = map(float, bbox.split(","))
+    return df[df.x.between(left, right) & df.y.between(bottom, top)]
+
+
+def interval(datetime: str) -> Tuple[pd.Timestamp, Optional[pd.Timestamp]]:
+    """The start and end of a `datetime` query; the end is None if it is open ("..")."""
+    start, end = datetime.split("/")
+    return pd.Timestamp(start), None if end == ".." else pd.Timestamp(end)
+
+
+def project(df: pd.DataFrame, properties: str) -> pd.DataFrame:
+    """Keep the columns listed in `properties`, along with the coordinates."""
+    keep = ["x", "y"] + properties.split(",")
+    return df[[col for col in df.columns if col in keep]]
+
+
+def page_csv(df: pd.DataFrame, offset: int, limit: int) -> bytes:
+    """The CSV body of rows `[offset, offset + limit)` of `df`, empty past the end."""
+    page = df.iloc[offset : offset + limit]
+    return page.to_csv(index=False).encode("utf-8") if not page.empty else b""
+
+
+class StandInServer:
+    """Answer GeoMet requests over HTTP/1.1 on a local port, in a background thread.
+
+    Subclasses implement `respond`, which returns the CSV body of a request and raises
+    `KeyError` for an unknown collection. The server sends an ETag with each body and
+    answers a matching `If-None-Match` with 304, and gzips the body when asked to.
+
+    Attributes
+    ----------
+    url : str
+        The base URL of the server, to set as `UrlBuilder.BASE_URL`.
+    latency : float
+        Seconds waited before answering each request.
+    requests, headers : list
+        The query parameters and the headers of every request received.
+    connections : set
+        The client addresses the requests came from.
+    failing : set
+        Stations whose requests are answered with 500.
+    fail_at : set
+        (station, offset) pairs of the pages answered with 500.
+    flaky : dict
+        The number of requests of each station answered with 503 before it recovers.
+    not_modified : int
+        The number of requests answered with 304.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.failing = set()
+        self.fail_at = set()
+        self.flaky = {}
+        self.requests = []
+        self.not_modified = 0
+        self.connections = set()
+        self.headers = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                with server.lock:
+                    server.requests.append(query)
+                    server.connections.add(self.client_address)
+                    server.headers.append(dict(self.headers))
+                if server.latency:
+                    time.sleep(server.latency)
+                status = server._injected_failure(query)
+                if status is not None:
+                    self.send_error(status)
+                    return
+                try:
+                    body = server.respond(parsed.path, query)
+                except KeyError:
+                    self.send_error(404)
+                    return
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server.lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/csv")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _injected_failure(self, query: dict) -> Optional[int]:
+        stn_id = query.get("CLIMATE_IDENTIFIER", query.get("STATION_NUMBER"))
+        offset = int(query.get("offset", 0))
+        with self.lock:
+            flaky = self.flaky.get(stn_id, 0)
+            if flaky:
+                self.flaky[stn_id] = flaky - 1
+        if flaky:
+            return 503
+        if stn_id in self.failing or (stn_id, offset) in self.fail_at:
+            return 500
+        return None
+
+    def respond(self, path: str, query: dict) -> bytes:
+        """The CSV body answering a request for `path` with the parameters `query`."""
+        raise NotImplementedError
+
+    def items_url(self, route: str, **params) -> str:
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return f"{self.url}/collections/{route}/items?f=csv&{query}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class Collection(NamedTuple):
+    network: str
+    dtypes: Dict[str, str]
+    step: pd.Timedelta
+    date_column: str
+    date_format: str
+
+
+COLLECTIONS = {
+    "climate-daily": Collection(
+        "climate",
+        WeatherStationsDataTypes.dtypes_daily,
+        pd.Timedelta(days=1),
+        "LOCAL_DATE",
+        "%Y-%m-%d %H:%M:%S",
+    ),
+    "climate-hourly": Collection(
+        "climate",
+        WeatherStationsDataTypes.dtypes_hourly,
+        pd.Timedelta(hours=1),
+        "LOCAL_DATE",
+        "%Y-%m-%d %H:%M:%S",
+    ),
+    "hydrometric-daily-mean": Collection(
+        "hydrometric",
+        HydrometricStationsDataTypes.dtypes,
+        pd.Timedelta(days=1),
+        "DATE",
+        "%Y-%m-%d",
+    ),
+    "hydrometric-realtime": Collection(
+        "hydrometric",
+        HydrometricStationsDataTypes.dtypes,
+        pd.Timedelta(minutes=5),
+        "DATETIME",
+        "%Y-%m-%dT%H:%M:%SZ",
+    ),
+}
+STATION_KEYS = {"climate": "CLIMATE_IDENTIFIER", "hydrometric": "STATION_NUMBER"}
+
+
+class SyntheticGeoMet(StandInServer):
+    """Serve synthetic climate and hydrometric stations and their series.
+
+    Station `i` of either network reports from January 1st of `first_year - i % 10` to
+    `last_date`, so the periods of record differ between stations but all cover the years
+    from `first_year` on; realtime hydrometric data covers the 30 days before the server
+    started. Values are a deterministic function of the station and the date, with the
+    real column names and types of the API. Rows are only generated for the page
+    requested.
+
+    Attributes
+    ----------
+    stations : Dict[str, pd.DataFrame]
+        The station lists of the "climate" and "hydrometric" networks, as served by
+        `climate-stations` and `hydrometric-stations`.
+    max_page_size : int
+        The largest `limit` honoured, like the 10,000 rows of the real API.
+    """
+
+    def __init__(
+        self,
+        n_stations: int = 100,
+        first_year: int = 1990,
+        last_date: str = "2024-12-31",
+        latency: float = 0.0,
+        max_page_size: int = 10000,
+        seed: int = 0,
+    ):
+        super().__init__(latency)
+        rng = np.random.default_rng(seed)
+        first = pd.Series(
+            [pd.Timestamp(first_year - i % 10, 1, 1) for i in range(n_stations)]
+        )
+        last = pd.Series(pd.Timestamp(last_date), index=first.index)
+        now = pd.Timestamp.now("UTC").floor("h")
+        self.stations = {
+            "climate": pd.DataFrame(
+                {
+                    "x": rng.uniform(-125.0, -60.0, n_stations).round(4),
+                    "y": rng.uniform(43.0, 60.0, n_stations).round(4),
+                    "STATION_NAME": [f"SYNTHETIC {i}" for i in range(n_stations)],
+                    "CLIMATE_IDENTIFIER": [f"7{i:06d}" for i in range(n_stations)],
+                    "PROVINCE_CODE": "ON",
+                    "DLY_FIRST_DATE": first,
+                    "DLY_LAST_DATE": last,
+                    "HLY_FIRST_DATE": first,
+                    "HLY_LAST_DATE": last + pd.Timedelta(hours=23),
+                }
+            ),
+            "hydrometric": pd.DataFrame(
+                {
+                    "x": rng.uniform(-125.0, -60.0, n_stations).round(4),
+                    "y": rng.uniform(43.0, 60.0, n_stations).round(4),
+                    "STATION_NAME": [f"SYNTHETIC RIVER {i}" for i in range(n_stations)],
+                    "STATION_NUMBER": [f"02HA{i:03d}" for i in range(n_stations)],
+                    "PROV_TERR_STATE_LOC": "ON",
+                    "REAL_TIME": 1,
+                }
+            ),
+        }
+        realtime_first = pd.Series(now - pd.Timedelta(days=30), index=first.index)
+        self.periods = {
+            "climate-daily": (first, last),
+            "climate-hourly": (first, last + pd.Timedelta(hours=23)),
+            "hydrometric-daily-mean": (first, last),
+            "hydrometric-realtime": (realtime_first, pd.Series(now, index=first.index)),
+        }
+        self.max_page_size = max_page_size
+        self._page = lru_cache(maxsize=64)(self._render_page)
+
+    def station_ids(self, network: str, n: int) -> List[str]:
+        """The identifiers of the first `n` stations of `network`."""
+        return self.stations[network][STATION_KEYS[network]].iloc[:n].tolist()
+
+    def _select(self, network: str, query: dict) -> pd.DataFrame:
+        stations = self.stations[network]
+        key = STATION_KEYS[network]
+        if key in query:
+            stations = stations[stations[key] == query[key]]
+        if "bbox" in query:
+            stations = select_bbox(stations, query["bbox"])
+        return stations
+
+    def _spans(
+        self, stations: pd.DataFrame, collection: str, datetime: Optional[str]
+    ) -> List[Tuple[int, pd.Timestamp, int]]:
+        """(station position, first date, number of rows) within the requested range."""
+        step = COLLECTIONS[collection].step
+        firsts, lasts = self.periods[collection]
+        spans = []
+        for i in stations.index:
+            first, last = firsts[i], lasts[i]
+            if datetime:
+                start, end = interval(datetime)
+                first = max(first, start.ceil(step))
+                if end is not None:
+                    last = min(last, end.floor(step))
+            if first <= last:
+                spans.append((i, first, (last - first) // step + 1))
+        return spans
+
+    def _rows(
+        self, collection: str, station: int, first: pd.Timestamp, skip: int, n: int
+    ) -> pd.DataFrame:
+        spec = COLLECTIONS[collection]
+        dates = pd.date_range(first + skip * spec.step, periods=n, freq=spec.step)
+        stations = self.stations[spec.network]
+        row = stations.loc[station]
+        key = row[STATION_KEYS[spec.network]]
+        phase = dates.dayofyear.to_numpy() / 365.25 * 2 * np.pi
+        columns = {}
+        for k, (col, dtype) in enumerate(spec.dtypes.items()):
+            if col in stations.columns:
+                columns[col] = row[col]
+            elif col in ("ID", "UTC_DATE"):
+                columns[col] = dates.strftime(f"{key}.%Y.%m.%d.%H")
+            elif col == "IDENTIFIER":
+                columns[col] = dates.strftime(f"{key}.{spec.date_format}")
+            elif col.endswith("YEAR"):
+                columns[col] = dates.year
+            elif col.endswith("MONTH"):
+                columns[col] = dates.month
+            elif col.endswith("DAY"):
+                columns[col] = dates.day
+            elif col.endswith("HOUR"):
+                columns[col] = dates.hour
+            elif dtype == "category":
+                flagged = (np.arange(skip, skip + n) + station + k) % 37 == 0
+                columns[col] = np.where(flagged, "M", "")
+            elif dtype.startswith(("float", "int")):
+                columns[col] = (10 * np.sin(phase + k) + station % 7).round(1)
+            else:
+                columns[col] = ""
+        df = pd.DataFrame(columns)
+        df.insert(6, spec.date_column, dates.strftime(spec.date_format))
+        if collection == "hydrometric-realtime":
+            local = dates.tz_convert("Etc/GMT+5").strftime("%Y-%m-%dT%H:%M:%S-05:00")
+            df.insert(7, "DATETIME_LST", local)
+        return df
+
+    def _render_page(self, path: str, query: Tuple[Tuple[str, str], ...]) -> bytes:
+        params = dict(query)
+        collection = path.strip("/").split("/")[1]
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", self.max_page_size)), self.max_page_size)
+        if collection.endswith("-stations"):
+            network = collection[: -len("-stations")]
+            if network not in self.stations:
+                raise KeyError(collection)
+            stations = self._select(network, params)
+            return page_csv(stations, offset, limit)
+        if collection not in COLLECTIONS:
+            raise KeyError(collection)
+        stations = self._select(COLLECTIONS[collection].network, params)
+        frames = []
+        position = 0
+        spans = self._spans(stations, collection, params.get("datetime"))
+        for station, first, n in spans:
+            # this station holds rows [position, position + n) of the whole result
+            skip = max(offset - position, 0)
+            take = min(n, offset + limit - position) - skip
+            if take > 0:
+                frames.append(self._rows(collection, station, first, skip, take))
+            position += n
+            if position >= offset + limit:
+                break
+        if not frames:
+            return b""
+        df = pd.concat(frames, ignore_index=True)
+        if "properties" in params:
+            df = project(df, params["properties"])
+        return df.to_csv(index=False).encode("utf-8")
+
+    def respond(self, path: str, query: dict) -> bytes:
+        return self._page(path, tuple(sorted(query.items())))
@@ -0,0 +1,105 @@
+"""The stand-in GeoMet server of the tests, serving the frames each test sets."""
+
+import pandas as pd
+import pytest
+
+from benchmarks.server import StandInServer, interval, page_csv, project, select_bbox
+from weather_api.utils.catalog import StationCatalog
+from weather_api.utils.url_builder import UrlBuilder
+
+
+def daily_frame(
+    stn_id: str,
+    periods: int,
+    start: str = "2020-01-01",
+    x: float = -79.4,
+    y: float = 43.7,
+) -> pd.DataFrame:
+    dates = pd.date_range(start, periods=periods, freq="D")
+    return pd.DataFrame(
+        {
+            "x": x,
+            "y": y,
+            "STATION_NAME": f"STATION {stn_id}",
+            "CLIMATE_IDENTIFIER": stn_id,
+            "ID": [f"{stn_id}.{d:%Y.%m.%d}" for d in dates],
+            "PROVINCE_CODE": "ON",
+            "LOCAL_DATE": dates.strftime("%Y-%m-%d %H:%M:%S"),
+            "LOCAL_YEAR": dates.year,
+            "LOCAL_MONTH": dates.month,
+            "LOCAL_DAY": dates.day,
+            "MEAN_TEMPERATURE": range(periods),
+            "MEAN_TEMPERATURE_FLAG": ["M" if i % 7 == 0 else "" for i in range(periods)],
+        }
+    )
+
+
+def realtime_frame(
+    stn_id: str, periods: int, start: str = "2024-06-01 00:00:00"
+) -> pd.DataFrame:
+    times = pd.date_range(start, periods=periods, freq="5min", tz="UTC")
+    return pd.DataFrame(
+        {
+            "x": -79.4,
+            "y": 43.7,
+            "STATION_NAME": f"STATION {stn_id}",
+            "STATION_NUMBER": stn_id,
+            "IDENTIFIER": [f"{stn_id}.{t:%Y-%m-%dT%H:%M:%SZ}" for t in times],
+            "PROV_TERR_STATE_LOC": "ON",
+            "DATETIME": times.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "LEVEL": [1.0 + i / 100 for i in range(periods)],
+            "DISCHARGE": [10.0 + i for i in range(periods)],
+        }
+    )
+
+
+class FrameServer(StandInServer):
+    """Serve the frames set by a test, keyed by station."""
+
+    def __init__(self):
+        super().__init__()
+        self.frames = {}
+
+    def respond(self, path: str, query: dict) -> bytes:
+        stn_id = query.get("CLIMATE_IDENTIFIER", query.get("STATION_NUMBER"))
+        if stn_id is not None:
+            df = self.frames.get(stn_id, pd.DataFrame())
+        elif self.frames:
+            df = pd.concat(self.frames.values(), ignore_index=True)
+        else:
+            df = pd.DataFrame()
+        if df.empty:
+            return b""
+        if "bbox" in query:
+            df = select_bbox(df, query["bbox"])
+        if path.endswith("hydrometric-stations/items"):
+            df = df.drop_duplicates("STATION_NUMBER")
+            df = df[["x", "y", "STATION_NAME", "STATION_NUMBER"]]
+        elif path.endswith("-stations/items"):
+            dates = df.groupby("CLIMATE_IDENTIFIER", sort=False)["LOCAL_DATE"]
+            df = df.drop_duplicates("CLIMATE_IDENTIFIER")
+            columns = ["x", "y", "STATION_NAME", "CLIMATE_IDENTIFIER", "PROVINCE_CODE"]
+            df = df[columns + [col for col in ["STN_ID"] if col in df.columns]]
+            df = df.assign(
+                DLY_FIRST_DATE=dates.min().values, DLY_LAST_DATE=dates.max().values
+            )
+        elif "datetime" in query:
+            start, end = interval(query["datetime"])
+            column = "DATETIME" if "DATETIME" in df.columns else "LOCAL_DATE"
+            dates = pd.to_datetime(df[column])
+            within = dates >= start
+            if end is not None:
+                within &= dates <= end
+            df = df[within]
+        if "properties" in query:
+            df = project(df, query["properties"])
+        offset = int(query.get("offset", 0))
+        return page_csv(df, offset, int(query.get("limit", 10000)))
+
+
+@pytest.fixture
+def geomet_server(monkeypatch):
+    with FrameServer() as server:
+        monkeypatch.setattr(UrlBuilder, "BASE_URL", server.url)
+        yield server
+    StationCatalog.clear()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api.utils.cache import DAY, ResponseCache
+from weather_api.utils.dataframe import WeatherStationsDataframe
+from weather_api.utils.http import HttpClient
+
+base = "https://api.weather.gc.ca/collections"
+now = datetime(2024, 6, 1)
+
+
+def test_ttl_rules(tmp_path):
+    cache = ResponseCache(tmp_path)
+    past = f"{base}/climate-daily/items?datetime=2020-01-01 00:00:00/2020-03-01 00:00:00"
+    recent = f"{base}/climate-daily/items?datetime=2020-01-01 00:00:00/2024-05-31 00:00:00"
+    assert cache.ttl_for(past, now=now) == 365 * DAY
+    assert cache.ttl_for(recent, now=now) == cache.ttl["climate-daily"]
+    assert cache.ttl_for(f"{base}/hydrometric-realtime/items?f=csv", now=now) == 300
+    assert cache.ttl_for(f"{base}/climate-stations/items?f=csv", now=now) < DAY
+
+
+def test_canonical_url_ignores_parameter_order(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.set(f"{base}/climate-daily/items?offset=0&limit=10", b"a,b\n1,2\n")
+    assert cache.get(f"{base}/climate-daily/items?limit=10&offset=0").body == b"a,b\n1,2\n"
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=2500)
+    bodies = {i: os.urandom(1000) for i in range(3)}
+    cache.set(f"{base}/climate-stations/items?page=0", bodies[0])
+    cache.set(f"{base}/climate-stations/items?page=1", bodies[1])
+    cache.get(f"{base}/climate-stations/items?page=0")
+    cache.set(f"{base}/climate-stations/items?page=2", bodies[2])
+    assert cache.get(f"{base}/climate-stations/items?page=0") is not None
+    assert cache.get(f"{base}/climate-stations/items?page=1") is None
+    assert cache.get(f"{base}/climate-stations/items?page=2") is not None
+    assert cache.size <= 2500
+
+
+def test_cached_pages_and_revalidation(geomet_server, tmp_path):
+    geomet_server.frames["6158355"] = daily_frame("6158355", periods=25)
+    url = geomet_server.items_url(
+        "climate-daily",
+        CLIMATE_IDENTIFIER="6158355",
+        limit=10,
+        datetime="2020-01-01 00:00:00/2020-02-01 00:00:00",
+    )
+    client = HttpClient(cache=ResponseCache(tmp_path))
+    first = WeatherStationsDataframe([url], client=client).to_df(url)
+    assert len(geomet_server.requests) == 3
+
+    second = WeatherStationsDataframe([url], client=client).to_df(url)
+    assert len(geomet_server.requests) == 3
+    assert first.equals(second)
+
+    stale = HttpClient(cache=ResponseCache(tmp_path, historical_ttl=0))
+    stale.cache.clear()
+    WeatherStationsDataframe([url], client=stale).to_df(url)
+    WeatherStationsDataframe([url], client=stale).to_df(url)
+    assert geomet_server.not_modified == 3
+
+
+def test_async_requests_use_the_cache(geomet_server, tmp_path):
+    aiohttp = pytest.importorskip("aiohttp")
+    geomet_server.frames["6158355"] = daily_frame("6158355", periods=5)
+    url = geomet_server.items_url(
+        "climate-daily",
+        CLIMATE_IDENTIFIER="6158355",
+        datetime="2020-01-01/2020-02-01",
+    )
+
+    async def fetch(client):
+        async with aiohttp.ClientSession() as session:
+            return await client.aget(session, url)
+
+    client = HttpClient(cache=ResponseCache(tmp_path))
+    body = asyncio.run(fetch(client))
+    assert client.get(url) == body
+    assert len(geomet_server.requests) == 1
+
+    stale = HttpClient(cache=ResponseCache(tmp_path, historical_ttl=0))
+    stale.cache.clear()
+    stale.get(url)
+    assert asyncio.run(fetch(stale)) == body
+    assert geomet_server.not_modified == 1
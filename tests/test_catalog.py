@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from tests.conftest import daily_frame
+from weather_api import WeatherStations
+from weather_api.utils.catalog import StationCatalog
+
+
+def random_catalog(n: int = 2000, seed: int = 0) -> StationCatalog:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "x": rng.uniform(-140, -50, n),
+            "y": rng.uniform(42, 80, n),
+            "CLIMATE_IDENTIFIER": [f"{i:07d}" for i in range(n)],
+        }
+    )
+    return StationCatalog(df, "CLIMATE_IDENTIFIER")
+
+
+def test_within_matches_a_full_scan():
+    catalog = random_catalog()
+    df = catalog.df
+    for bbox in ([-80, 43, -75, 46], [-140, 42, -50, 80], [-60, 79, -59, 79.5]):
+        left, bottom, right, top = bbox
+        expected = df[df.x.between(left, right) & df.y.between(bottom, top)]
+        pd.testing.assert_frame_equal(
+            catalog.within(bbox), expected.reset_index(drop=True)
+        )
+
+
+def test_lookup_keeps_order_and_skips_unknown_stations():
+    catalog = random_catalog()
+    found = catalog.lookup(["0000042", "missing", "0000007"])
+    assert found["CLIMATE_IDENTIFIER"].tolist() == ["0000042", "0000007"]
+    assert catalog.lookup("0000003")["CLIMATE_IDENTIFIER"].tolist() == ["0000003"]
+
+
+def test_lookup_returns_every_row_of_repeated_stations():
+    df = random_catalog(n=5).df
+    catalog = StationCatalog(pd.concat([df, df.iloc[[3]]]), "CLIMATE_IDENTIFIER")
+    found = catalog.lookup(["0000003", "missing", "0000001"])
+    assert found["CLIMATE_IDENTIFIER"].tolist() == ["0000003", "0000003", "0000001"]
+
+
+def test_aget_metadata_reads_the_catalog(geomet_server):
+    stations = ["1", "2", "3"]
+    for stn in stations:
+        geomet_server.frames[stn] = daily_frame(stn, periods=3)
+    wa = WeatherStations(stn_id=stations[:2])
+    meta = asyncio.run(wa.aget_metadata())
+    assert meta["CLIMATE_IDENTIFIER"].tolist() == stations[:2]
+    assert len(geomet_server.requests) == 1
+
+
+def test_metadata_is_read_from_one_catalog_download(geomet_server):
+    stations = [f"61583{i:02d}" for i in range(5)]
+    for i, stn in enumerate(stations):
+        geomet_server.frames[stn] = daily_frame(stn, periods=3, x=-79.5 + i, y=43.7)
+    kwargs = dict(start_date=datetime(2020, 1, 1), end_date=datetime(2020, 1, 3))
+    meta = WeatherStations(stn_id=stations[:3], **kwargs).get_metadata()
+    assert meta["CLIMATE_IDENTIFIER"].tolist() == stations[:3]
+    wa = WeatherStations(bbox=[-79.8, 43.6, -77.0, 43.8], **kwargs)
+    assert wa._station_ids() == stations[:3]
+    assert wa.get_metadata()["CLIMATE_IDENTIFIER"].tolist() == stations[:3]
+    catalog_requests = [q for q in geomet_server.requests if "datetime" not in q]
+    assert len(catalog_requests) == 1
+
+
+def test_metadata_of_all_stations_is_a_copy_of_the_catalog(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=3)
+    meta = WeatherStations().get_metadata()
+    meta["CLIMATE_IDENTIFIER"] = "changed"
+    assert WeatherStations().get_metadata()["CLIMATE_IDENTIFIER"].tolist() == ["1"]
+
+
+def test_requests_are_pruned_to_the_period_of_record(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=10, start="2020-01-01")
+    geomet_server.frames["2"] = daily_frame("2", periods=10, start="2005-06-01")
+    geomet_server.frames["3"] = daily_frame("3", periods=400, start="2019-06-01")
+    wa = WeatherStations(
+        stn_id=["1", "2", "3"], start_date=datetime(2019, 12, 1), end_date=None
+    )
+    # the catalog is only read once data is fetched
+    assert len(wa.get_url()) == 3
+    assert geomet_server.requests == []
+    assert len(wa.url) == 2
+    assert list(wa.url_handler.periods) == ["1", "3"]
+    start, end = wa.url_handler.periods["1"]
+    assert start == datetime(2020, 1, 1)
+    assert end == datetime(2020, 1, 10) + wa.url_handler.RECORD_SLACK
+    assert wa.url_handler.periods["3"][0] == datetime(2019, 12, 1)
+    dict_frame = wa.to_dict_frame()
+    assert sorted(dict_frame) == ["1", "3"]
+    assert len(dict_frame["1"]) == 10
+    assert dict_frame["3"].index.min() == pd.Timestamp("2019-12-01")
+
+
+def test_stations_without_record_at_the_frequency_are_not_requested(monkeypatch):
+    meta = pd.DataFrame(
+        {
+            "x": [-79.4, -79.5],
+            "y": [43.7, 43.8],
+            "CLIMATE_IDENTIFIER": ["1", "2"],
+            "HLY_FIRST_DATE": ["1994-01-01 00:00:00", None],
+            "HLY_LAST_DATE": ["2024-12-31 23:00:00", None],
+        }
+    )
+    wa = WeatherStations(stn_id=["1", "2", "3"], hourly=True)
+    catalog = StationCatalog(meta, "CLIMATE_IDENTIFIER")
+    monkeypatch.setattr(wa.url_handler, "catalog", lambda refresh=False: catalog)
+    # "2" has no hourly record; "3" is not in the catalog and keeps the full range
+    assert list(wa._plan()) == ["1", "3"]
+    assert len(wa.url) == 2
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api.cli import main
+
+
+def test_fetch_writes_each_station_and_skips_existing(geomet_server, tmp_path):
+    for stn in ("1", "2", "3"):
+        geomet_server.frames[stn] = daily_frame(stn, periods=10)
+    (tmp_path / "ids.txt").write_text("1\n2  # comment\n\n")
+    out = tmp_path / "out"
+    argv = ["fetch", "--stations", str(tmp_path / "ids.txt"), "3", "--out", str(out)]
+    argv += ["--start", "2020-01-01", "--end", "2020-01-31", "--jobs", "2"]
+
+    assert main(argv) == 0
+    assert sorted(p.name for p in out.iterdir()) == ["1.csv", "2.csv", "3.csv"]
+    df = pd.read_csv(out / "2.csv", index_col="LOCAL_DATE")
+    assert df["MEAN_TEMPERATURE"].tolist() == list(range(10))
+
+    (out / "3.csv").unlink()
+    geomet_server.requests.clear()
+    assert main(argv) == 0
+    stations = {q.get("CLIMATE_IDENTIFIER") for q in geomet_server.requests}
+    assert stations - {None} == {"3"}
+
+
+def test_fetch_reports_failures(geomet_server, tmp_path, capsys):
+    geomet_server.frames["1"] = daily_frame("1", periods=10)
+    geomet_server.failing.add("2")
+    argv = ["fetch", "--stations", "1,2", "--out", str(tmp_path)]
+    argv += ["--start", "2020-01-01", "--end", "2020-01-31"]
+    assert main(argv) == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["1.csv"]
+    assert "Failed 2" in capsys.readouterr().err
+
+
+def test_fetch_writes_empty_stations_once(geomet_server, tmp_path):
+    geomet_server.frames["1"] = daily_frame("1", periods=10)
+    argv = ["fetch", "--stations", "1,2", "--out", str(tmp_path)]
+    argv += ["--start", "2020-01-01", "--end", "2020-01-31"]
+    assert main(argv) == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1.csv", "2.csv"]
+
+    geomet_server.requests.clear()
+    assert main(argv) == 0
+    assert geomet_server.requests == []
+
+
+@pytest.mark.parametrize(
+    "network, flag", [("hydrometric", "--hourly"), ("climate", "--realtime")]
+)
+def test_fetch_rejects_options_of_the_other_network(tmp_path, capsys, network, flag):
+    argv = ["fetch", "--network", network, flag, "--stations", "1"]
+    with pytest.raises(SystemExit) as excinfo:
+        main(argv + ["--out", str(tmp_path)])
+    assert excinfo.value.code == 2
+    assert flag in capsys.readouterr().err
+    assert not any(tmp_path.iterdir())
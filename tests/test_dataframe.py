@@ -0,0 +1,248 @@
+import asyncio
+import gc
+import weakref
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api import StationFetchError, WeatherStations
+from weather_api.utils.dataframe import (
+    DataFrameHandler,
+    HydrometricStationsDataframe,
+    WeatherStationsDataframe,
+)
+from weather_api.utils.url_handler import WeatherStationsUrlHandler
+
+
+def station_urls(server, stations):
+    return [
+        server.items_url("climate-daily", CLIMATE_IDENTIFIER=stn, limit=10000)
+        for stn in stations
+    ]
+
+
+def test_to_dict_frame_parallel_keeps_station_order(geomet_server):
+    stations = [f"61583{i:02d}" for i in range(8)]
+    for i, stn in enumerate(stations):
+        geomet_server.frames[stn] = daily_frame(stn, periods=10 + i)
+    handler = WeatherStationsDataframe(
+        station_urls(geomet_server, stations), max_workers=4
+    )
+    dict_frame = handler.to_dict_frame()
+    assert list(dict_frame) == stations
+    for i, stn in enumerate(stations):
+        assert len(dict_frame[stn]) == 10 + i
+        assert isinstance(dict_frame[stn].index, pd.DatetimeIndex)
+
+
+def test_to_dict_frame_reports_failures_without_cancelling(geomet_server):
+    stations = ["1", "2", "3"]
+    for stn in stations:
+        geomet_server.frames[stn] = daily_frame(stn, periods=5)
+    geomet_server.failing.add("2")
+    handler = WeatherStationsDataframe(
+        station_urls(geomet_server, stations), max_workers=3
+    )
+    with pytest.raises(StationFetchError) as excinfo:
+        handler.to_dict_frame()
+    assert list(excinfo.value.failures) == ["2"]
+    requested = {q["CLIMATE_IDENTIFIER"] for q in geomet_server.requests}
+    assert requested == set(stations)
+
+
+def test_iter_stations_releases_stations_once_yielded(geomet_server):
+    stations = [str(i) for i in range(8)]
+    for stn in stations:
+        geomet_server.frames[stn] = daily_frame(stn, periods=20)
+    handler = WeatherStationsDataframe(
+        station_urls(geomet_server, stations), max_workers=2
+    )
+    refs = []
+    for _, df in handler.iter_stations():
+        gc.collect()
+        assert not any(ref() is not None for ref in refs)
+        refs.append(weakref.ref(df))
+        del df
+    assert len(refs) == len(stations)
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_prefetch_returns_same_frame(geomet_server, prefetch):
+    geomet_server.frames["6158355"] = daily_frame("6158355", periods=25)
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="6158355", limit=10)
+    handler = WeatherStationsDataframe([url], prefetch=prefetch)
+    df = handler.to_df(url)
+    assert len(df) == 25
+    assert df.index.is_monotonic_increasing
+    assert not df.index.has_duplicates
+    # at most `prefetch` pages past the end are requested
+    assert 3 <= len(geomet_server.requests) <= 3 + prefetch
+
+
+def test_prefetch_skips_speculation_for_single_page(geomet_server):
+    geomet_server.frames["6158355"] = daily_frame("6158355", periods=5)
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="6158355", limit=10)
+    WeatherStationsDataframe([url], prefetch=4).to_df(url)
+    assert len(geomet_server.requests) == 1
+
+
+def test_ato_dict_frame_matches_sync(geomet_server):
+    pytest.importorskip("aiohttp")
+    stations = ["1", "2", "3"]
+    for stn in stations:
+        geomet_server.frames[stn] = daily_frame(stn, periods=23)
+    urls = [
+        geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER=stn, limit=10)
+        for stn in stations
+    ]
+
+    async def fetch():
+        import aiohttp
+
+        handler = WeatherStationsDataframe(urls, prefetch=2)
+        async with aiohttp.ClientSession() as session:
+            return await handler.ato_dict_frame(session, asyncio.Semaphore(4))
+
+    async_frames = asyncio.run(fetch())
+    sync_frames = WeatherStationsDataframe(urls).to_dict_frame()
+    assert list(async_frames) == stations
+    for stn in stations:
+        pd.testing.assert_frame_equal(async_frames[stn], sync_frames[stn])
+
+
+def test_iter_frames_yields_indexed_pages(geomet_server):
+    for stn in ["1", "2"]:
+        geomet_server.frames[stn] = daily_frame(stn, periods=25)
+    urls = [
+        geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER=stn, limit=10)
+        for stn in ["1", "2"]
+    ]
+    handler = WeatherStationsDataframe(urls)
+    pages = list(handler.iter_frames())
+    assert [(stn, len(df)) for stn, df in pages] == [
+        ("1", 10), ("1", 10), ("1", 5), ("2", 10), ("2", 10), ("2", 5)
+    ]
+    assert all(df.index.name == "LOCAL_DATE" for _, df in pages)
+    streamed = pd.concat(df for stn, df in pages if stn == "1")
+    pd.testing.assert_frame_equal(
+        streamed, handler.to_df(urls[0]), check_categorical=False
+    )
+
+
+def test_bbox_collection_query_is_split_by_station(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=15, x=-79.5, y=43.7)
+    geomet_server.frames["2"] = daily_frame("2", periods=12, x=-79.2, y=43.8)
+    geomet_server.frames["3"] = daily_frame("3", periods=12, x=-75.0, y=45.0)
+    kwargs = dict(
+        bbox=[-79.8, 43.63, -79.0, 43.9],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 1, 31),
+    )
+    wa = WeatherStations(bbox_mode="collection", **kwargs)
+    assert len(wa.url) == 1
+    assert "CLIMATE_IDENTIFIER=" not in wa.url[0]
+    by_collection = wa.to_dict_frame()
+    by_station = WeatherStations(bbox_mode="station", **kwargs).to_dict_frame()
+    assert sorted(by_collection) == sorted(by_station) == ["1", "2"]
+    for stn in by_station:
+        pd.testing.assert_frame_equal(
+            by_collection[stn], by_station[stn], check_categorical=False
+        )
+
+
+def test_bbox_mode_auto_prefers_one_query_for_short_ranges():
+    handler = WeatherStationsUrlHandler(
+        start_date=datetime(2020, 1, 1), end_date=datetime(2020, 12, 31), max_workers=4
+    )
+    assert handler._use_collection_query(100)
+    handler.start_date = datetime(1900, 1, 1)
+    assert not handler._use_collection_query(100)
+    assert not handler._use_collection_query(1)
+
+
+def test_bbox_mode_auto_counts_sharded_rounds():
+    # 10,500 records: 2 pages a station, 4 pages for the 3 stations in one query
+    handler = WeatherStationsUrlHandler(
+        start_date=datetime(1990, 1, 1),
+        end_date=datetime(1990, 1, 1) + timedelta(days=10499),
+        max_workers=2,
+    )
+    assert handler._use_collection_query(3)
+    handler.shard = True
+    assert not handler._use_collection_query(3)
+
+
+def test_stats_record_requests_and_stages(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=25)
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="1", limit=10)
+    wa = WeatherStations(
+        stn_id="1", start_date=datetime(2020, 1, 1), end_date=datetime(2020, 1, 25)
+    )
+    wa.url = [url]
+    seen = []
+    wa.stats.on_request.append(seen.append)
+    wa.to_xr()
+    pages = [(r.offset, r.rows) for r in wa.stats.requests]
+    assert pages == [(0, 10), (10, 10), (20, 5)]
+    assert seen == wa.stats.requests
+    record = wa.stats.requests[0]
+    assert record.collection == "climate-daily"
+    assert record.station == "1"
+    assert record.bytes > 0 and record.latency > 0 and record.parse_time > 0
+    totals = wa.stats.totals()
+    assert totals["requests"] == 3 and totals["rows"] == 25
+    stages = totals["stages"]
+    assert set(stages) == {"read_csv_paginated", "to_df", "to_dict_frame", "to_xr"}
+    assert stages["to_xr"] >= stages["to_dict_frame"] >= stages["to_df"]
+
+
+def test_sharded_fetch_requests_windows_without_offsets(geomet_server, monkeypatch):
+    monkeypatch.setattr(DataFrameHandler, "MAX_PAGE_SIZE", 10)
+    geomet_server.frames["1"] = daily_frame("1", periods=35)
+    kwargs = dict(
+        stn_id="1", start_date=datetime(2020, 1, 1), end_date=datetime(2020, 2, 4)
+    )
+    sharded = WeatherStations(max_workers=4, **kwargs).to_dict_frame()["1"]
+    windows = [q["datetime"] for q in geomet_server.requests if "datetime" in q]
+    assert windows == sorted(set(windows), key=windows.index)
+    assert len(windows) == 4 == len(geomet_server.requests) - 1
+    assert all(q.get("offset", "0") == "0" for q in geomet_server.requests)
+
+    paged = WeatherStations(shard=False, **kwargs).to_dict_frame()["1"]
+    assert not sharded.index.duplicated().any()
+    assert isinstance(sharded["MEAN_TEMPERATURE_FLAG"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        sharded, paged.astype({"MEAN_TEMPERATURE_FLAG": "category"})
+    )
+
+
+def test_async_fetch_is_sharded_like_sync(geomet_server, monkeypatch):
+    pytest.importorskip("aiohttp")
+    monkeypatch.setattr(DataFrameHandler, "MAX_PAGE_SIZE", 10)
+    geomet_server.frames["1"] = daily_frame("1", periods=35)
+    kwargs = dict(
+        stn_id="1", start_date=datetime(2020, 1, 1), end_date=datetime(2020, 2, 4)
+    )
+    sharded = asyncio.run(WeatherStations(**kwargs).ato_dict_frame())["1"]
+    windows = [q["datetime"] for q in geomet_server.requests if "datetime" in q]
+    assert len(set(windows)) == 4 == len(geomet_server.requests) - 1
+    assert all(q.get("offset", "0") == "0" for q in geomet_server.requests)
+    pd.testing.assert_frame_equal(
+        sharded, WeatherStations(max_workers=4, **kwargs).to_dict_frame()["1"]
+    )
+
+
+def test_station_without_data_is_reported_once(geomet_server, monkeypatch):
+    monkeypatch.setattr(DataFrameHandler, "MAX_PAGE_SIZE", 10)
+    url = geomet_server.items_url(
+        "hydrometric-daily-mean",
+        STATION_NUMBER="02HC003",
+        datetime="2020-01-01 00:00:00/2020-02-04 00:00:00",
+    )
+    handler = HydrometricStationsDataframe([url], max_workers=4, shard=True)
+    with pytest.warns(UserWarning, match="No data found") as record:
+        assert handler.to_dict_frame() == {}
+    assert len(geomet_server.requests) == 4
+    assert len(record) == 1
@@ -0,0 +1,13 @@
+import subprocess
+import sys
+
+
+def test_import_does_not_load_plotting_or_xarray():
+    code = (
+        "import sys, weather_api; "
+        + "print(' '.join(m for m in ('folium', 'xarray', 'dask') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == ""
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api import WeatherStations
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+
+def _stations(stn_id):
+    return WeatherStations(
+        stn_id=stn_id, start_date=datetime(2020, 1, 1), end_date=datetime(2021, 12, 31)
+    )
+
+
+def test_to_arrow_has_compact_types(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=10)
+    geomet_server.frames["2"] = daily_frame("2", periods=5)
+    table = _stations(["1", "2"]).to_arrow()
+    assert table.num_rows == 15
+    assert table.schema.names[0] == "LOCAL_DATE"
+    assert table.schema.field("MEAN_TEMPERATURE").type == pa.float32()
+    assert pa.types.is_dictionary(table.schema.field("MEAN_TEMPERATURE_FLAG").type)
+    assert table.column("station").to_pylist() == ["1"] * 10 + ["2"] * 5
+
+
+def test_to_parquet_adds_new_partitions_only(geomet_server, tmp_path):
+    geomet_server.frames["1"] = daily_frame("1", periods=400)
+    geomet_server.frames["2"] = daily_frame("2", periods=30)
+    assert _stations(["1"]).to_parquet(tmp_path) == 2
+    network = tmp_path / "network=climate-daily"
+    part = network / "station=1" / "year=2020" / "part-0.parquet"
+    mtime = part.stat().st_mtime_ns
+
+    assert _stations(["1", "2"]).to_parquet(tmp_path) == 1
+    assert part.stat().st_mtime_ns == mtime
+    assert sorted(p.name for p in network.iterdir()) == ["station=1", "station=2"]
+
+    dataset = ds.dataset(tmp_path, format="parquet", partitioning="hive")
+    table = dataset.to_table(
+        columns=["LOCAL_DATE", "MEAN_TEMPERATURE"], filter=ds.field("year") == 2021
+    )
+    assert table.num_rows == 400 - 366
+
+
+def test_to_parquet_adds_new_rows_to_existing_year(geomet_server, tmp_path):
+    geomet_server.frames["1"] = daily_frame("1", periods=182)
+    assert _stations(["1"]).to_parquet(tmp_path) == 1
+    geomet_server.frames["1"] = daily_frame("1", periods=366)
+    wa = _stations(["1"])
+    wa.refresh_catalog()
+    assert wa.to_parquet(tmp_path) == 1
+    assert _stations(["1"]).to_parquet(tmp_path) == 0
+
+    table = ds.dataset(tmp_path, format="parquet", partitioning="hive").to_table(
+        columns=["LOCAL_DATE", "MEAN_TEMPERATURE"]
+    )
+    dates = table.column("LOCAL_DATE").to_pandas()
+    assert table.num_rows == 366
+    assert dates.is_unique
+    assert sorted(dates.dt.month.unique()) == list(range(1, 13))
+    assert sorted(table.column("MEAN_TEMPERATURE").to_pylist()) == list(range(366))
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api.utils.data_types import WeatherStationsDataTypes
+from weather_api.utils.parsers import read_csv_bytes, resolve_parser
+
+
+def test_pyarrow_parser_matches_c_parser():
+    pytest.importorskip("pyarrow")
+    payload = daily_frame("6158355", periods=50).to_csv(index=False).encode("utf-8")
+    kwargs = dict(dtype=WeatherStationsDataTypes.dtypes_daily, parse_dates=["LOCAL_DATE"])
+    c = read_csv_bytes(payload, parser="c", **kwargs)
+    arrow = read_csv_bytes(payload, parser="pyarrow", **kwargs)
+    assert arrow["MEAN_TEMPERATURE_FLAG"].dtype == "category"
+    pd.testing.assert_frame_equal(arrow, c, check_categorical=False)
+
+
+def test_resolve_parser():
+    assert resolve_parser("c") == "c"
+    assert resolve_parser("auto") in ("c", "pyarrow")
+    with pytest.raises(ValueError):
+        resolve_parser("fast")
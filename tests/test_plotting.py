@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from weather_api.utils.plotting_handler import (
+    FAST_THRESHOLD,
+    WeatherStationsPlottingHandler,
+)
+
+folium = pytest.importorskip("folium")
+from folium.plugins import FastMarkerCluster, MarkerCluster  # noqa: E402
+
+
+def climate_meta(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "x": -79.4,
+            "y": 43.7,
+            "STATION_NAME": [f"STATION {i}" for i in range(n)],
+            "CLIMATE_IDENTIFIER": [str(i) for i in range(n)],
+            "DLY_FIRST_DATE": "1990-01-01 00:00:00",
+            "DLY_LAST_DATE": [None] + ["2020-12-31 00:00:00"] * (n - 1),
+        }
+    )
+
+
+def layers(m: folium.Map) -> list:
+    return [type(child) for child in m._children.values()]
+
+
+def test_large_catalog_is_plotted_as_fast_cluster():
+    meta = climate_meta(FAST_THRESHOLD + 1)
+    m = WeatherStationsPlottingHandler.plot_stations(meta)
+    (cluster,) = [c for c in m._children.values() if isinstance(c, FastMarkerCluster)]
+    assert len(cluster.data) == len(meta)
+    lat, lon, popup = cluster.data[0]
+    assert (lat, lon) == (43.7, -79.4)
+    assert "<b>STATION 0</b>" in popup
+    assert "Date range: 1990-01-01 to N/A" in popup
+
+
+def test_small_catalog_keeps_individual_markers():
+    m = WeatherStationsPlottingHandler.plot_stations(climate_meta(3))
+    assert MarkerCluster in layers(m)
+    assert FastMarkerCluster not in layers(m)
+    fast = WeatherStationsPlottingHandler.plot_stations(climate_meta(3), fast=True)
+    assert FastMarkerCluster in layers(fast)
+
+
+def test_plot_stations_leaves_its_input_unchanged():
+    meta = climate_meta(3)
+    WeatherStationsPlottingHandler.plot_stations(meta)
+    pd.testing.assert_frame_equal(meta, climate_meta(3))
@@ -0,0 +1,31 @@
+from tests.conftest import realtime_frame
+from weather_api import HydrometricStations
+
+
+def test_poll_requests_only_new_readings(geomet_server):
+    geomet_server.frames["02HC003"] = realtime_frame("02HC003", periods=12)
+    geomet_server.frames["02HC024"] = realtime_frame("02HC024", periods=6)
+    ha = HydrometricStations(stn_id=["02HC003", "02HC024"], realtime=True)
+    first = ha.poll()
+    assert {stn: len(df) for stn, df in first.items()} == {"02HC003": 12, "02HC024": 6}
+    assert not any("datetime" in q for q in geomet_server.requests)
+
+    geomet_server.frames["02HC003"] = realtime_frame("02HC003", periods=15)
+    geomet_server.requests.clear()
+    second = ha.poll()
+    since = {q["STATION_NUMBER"]: q["datetime"] for q in geomet_server.requests}
+    assert since == {
+        "02HC003": "2024-06-01T00:55:00Z/..",
+        "02HC024": "2024-06-01T00:25:00Z/..",
+    }
+    assert list(second) == ["02HC003"]
+    assert second["02HC003"]["DISCHARGE"].tolist() == [22.0, 23.0, 24.0]
+    assert second["02HC003"].index.min() > first["02HC003"].index.max()
+
+
+def test_watch_yields_new_readings_of_each_poll(geomet_server):
+    geomet_server.frames["02HC003"] = realtime_frame("02HC003", periods=4)
+    ha = HydrometricStations(stn_id="02HC003", realtime=True)
+    readings = list(ha.watch(interval=0, polls=2))
+    assert [(stn, len(df)) for stn, df in readings] == [("02HC003", 4)]
+    assert ha.last_seen["02HC003"] == readings[0][1].index.max()
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api import StationFailure, WeatherStations
+from weather_api.utils.checkpoint import PageCheckpoint
+from weather_api.utils.dataframe import WeatherStationsDataframe
+from weather_api.utils.http import HttpClient, RetryPolicy
+
+no_retry = RetryPolicy(retries=0)
+
+
+def test_transient_errors_are_retried(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=5)
+    geomet_server.flaky["1"] = 2
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="1")
+    client = HttpClient(retry=RetryPolicy(retries=2, backoff=0.01))
+    df = WeatherStationsDataframe([url], client=client).to_df(url)
+    assert len(df) == 5
+    assert len(geomet_server.requests) == 3
+
+
+def test_rerun_resumes_from_checkpoint(geomet_server, tmp_path):
+    geomet_server.frames["1"] = daily_frame("1", periods=25)
+    geomet_server.frames["2"] = daily_frame("2", periods=8)
+    urls = [
+        geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER=stn, limit=10)
+        for stn in ("1", "2")
+    ]
+    geomet_server.fail_at.add(("1", 20))
+    kwargs = dict(
+        client=HttpClient(retry=no_retry), checkpoint=PageCheckpoint(tmp_path)
+    )
+    failures = []
+    dict_frame = WeatherStationsDataframe(urls, **kwargs).to_dict_frame(failures)
+    assert list(dict_frame) == ["2"]
+    assert [(f.station, f.url) for f in failures] == [("1", urls[0])]
+
+    geomet_server.fail_at.clear()
+    geomet_server.requests.clear()
+    dict_frame = WeatherStationsDataframe(urls, **kwargs).to_dict_frame()
+    # the pages saved by the first run are not requested again
+    assert [(q["CLIMATE_IDENTIFIER"], q["offset"]) for q in geomet_server.requests] == [
+        ("1", "20")
+    ]
+    assert len(dict_frame["1"]) == 25
+    assert not dict_frame["1"].index.has_duplicates
+    assert not any(tmp_path.iterdir())
+
+
+def test_partial_returns_successes_and_failures(geomet_server):
+    for stn in ("1", "2", "3"):
+        geomet_server.frames[stn] = daily_frame(stn, periods=5)
+    geomet_server.failing.add("2")
+    wa = WeatherStations(
+        stn_id=["1", "2", "3"],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 1, 5),
+        retry=no_retry,
+    )
+    dict_frame, failures = wa.to_dict_frame(partial=True)
+    assert sorted(dict_frame) == ["1", "3"]
+    assert len(failures) == 1
+    assert isinstance(failures[0], StationFailure)
+    assert failures[0].station == "2"
+    assert isinstance(dict_frame["1"], pd.DataFrame)
+
+
+def test_async_requests_are_retried_and_checkpointed(geomet_server, tmp_path):
+    aiohttp = pytest.importorskip("aiohttp")
+    geomet_server.frames["1"] = daily_frame("1", periods=25)
+    geomet_server.flaky["1"] = 2
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="1", limit=10)
+    geomet_server.fail_at.add(("1", 20))
+    handler = WeatherStationsDataframe(
+        [url],
+        client=HttpClient(retry=RetryPolicy(retries=2, backoff=0.01)),
+        checkpoint=PageCheckpoint(tmp_path),
+    )
+
+    async def fetch(failures=None):
+        async with aiohttp.ClientSession() as session:
+            return await handler.ato_dict_frame(
+                session, asyncio.Semaphore(2), failures
+            )
+
+    failures = []
+    assert asyncio.run(fetch(failures)) == {}
+    assert [f.station for f in failures] == ["1"]
+    # two transient errors retried, then pages 0 and 10 and three attempts at 20
+    assert len(geomet_server.requests) == 7
+
+    geomet_server.fail_at.clear()
+    geomet_server.requests.clear()
+    dict_frame = asyncio.run(fetch())
+    assert [q["offset"] for q in geomet_server.requests] == ["20"]
+    assert len(dict_frame["1"]) == 25
+    assert not any(tmp_path.iterdir())
+
+
+def test_async_partial_returns_successes_and_failures(geomet_server):
+    pytest.importorskip("aiohttp")
+    for stn in ("1", "2"):
+        geomet_server.frames[stn] = daily_frame(stn, periods=5)
+    geomet_server.failing.add("2")
+    wa = WeatherStations(
+        stn_id=["1", "2"],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 1, 5),
+        retry=no_retry,
+    )
+    dict_frame, failures = asyncio.run(wa.ato_dict_frame(partial=True))
+    assert list(dict_frame) == ["1"]
+    assert [f.station for f in failures] == ["2"]
+    assert wa.stats.requests
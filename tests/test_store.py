@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api import WeatherStations
+from weather_api.utils.files import atomic_write
+from weather_api.utils.store import StationStore
+
+
+def test_sync_only_fetches_new_dates(geomet_server, tmp_path):
+    stn_id = "6158355"
+    geomet_server.frames[stn_id] = daily_frame(stn_id, periods=60)
+    store = StationStore(tmp_path)
+
+    wa = WeatherStations(
+        stn_id=stn_id, start_date=datetime(2020, 1, 1), end_date=datetime(2020, 1, 31)
+    )
+    first = wa.sync(store)
+    assert len(first[stn_id]) == 31
+    assert geomet_server.requests[-1]["datetime"].startswith("2020-01-01")
+
+    wa = WeatherStations(
+        stn_id=stn_id, start_date=datetime(2020, 1, 1), end_date=datetime(2020, 2, 29)
+    )
+    merged = wa.sync(store)
+    assert geomet_server.requests[-1]["datetime"].startswith("2020-01-31")
+    assert len(merged[stn_id]) == 60
+    assert merged[stn_id].index.is_unique
+    assert str(merged[stn_id]["MEAN_TEMPERATURE_FLAG"].dtype) == "category"
+    assert store.last_date("climate-daily", stn_id) == datetime(2020, 2, 29)
+    assert wa.dict_frame is merged
+    assert wa.to_xr().sizes["time"] == 60
+
+    n_requests = len(geomet_server.requests)
+    wa.sync(store)
+    assert len(geomet_server.requests) == n_requests
+
+
+def test_atomic_write_keeps_the_old_file_if_the_write_fails(tmp_path):
+    path = tmp_path / "1.csv"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as tmp:
+            tmp.write_text("partial")
+            raise RuntimeError
+    assert path.read_text() == "old"
+    with atomic_write(path) as tmp:
+        tmp.write_text("new")
+    assert path.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["1.csv"]
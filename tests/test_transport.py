@@ -0,0 +1,54 @@
+from urllib.error import HTTPError
+
+import pytest
+
+from tests.conftest import daily_frame
+from weather_api.utils.dataframe import WeatherStationsDataframe
+from weather_api.utils.http import HttpClient
+from weather_api.utils.transport import (
+    PooledTransport,
+    Response,
+    Transport,
+    set_default_transport,
+)
+
+
+def test_pooled_transport_reuses_connections(geomet_server):
+    geomet_server.frames["6158355"] = daily_frame("6158355", periods=45)
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="6158355", limit=10)
+    client = HttpClient(transport=PooledTransport(timeout=5))
+    df = WeatherStationsDataframe([url], client=client).to_df(url)
+    assert len(df) == 45
+    assert len(geomet_server.requests) == 5
+    assert len(geomet_server.connections) == 1
+    assert all("gzip" in h["Accept-Encoding"] for h in geomet_server.headers)
+
+
+def test_http_errors_are_raised(geomet_server):
+    geomet_server.failing.add("6158355")
+    url = geomet_server.items_url("climate-daily", CLIMATE_IDENTIFIER="6158355")
+    with pytest.raises(HTTPError):
+        HttpClient(transport=PooledTransport()).get(url)
+
+
+class LocalTransport(Transport):
+    def __init__(self, body: bytes):
+        self.body = body
+        self.urls = []
+
+    def get(self, url, headers):
+        self.urls.append(url)
+        return Response(200, "OK", {}, self.body if not self.urls[1:] else b"")
+
+
+def test_default_transport_can_be_replaced():
+    body = daily_frame("6158355", periods=3).to_csv(index=False).encode("utf-8")
+    transport = LocalTransport(body)
+    set_default_transport(transport)
+    try:
+        url = "https://api.weather.gc.ca/collections/climate-daily/items?CLIMATE_IDENTIFIER=6158355"
+        df = WeatherStationsDataframe([url]).to_df(url)
+    finally:
+        set_default_transport(None)
+    assert len(df) == 3
+    assert transport.urls[0].startswith("https://api.weather.gc.ca/")
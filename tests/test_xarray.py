@@ -0,0 +1,166 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from tests.conftest import daily_frame
+from weather_api import WeatherStations
+from weather_api.utils.xarray import WeatherStationsXArray, decode_flags
+
+
+def station_frame(stn_id: str, periods: int, start: str, x: float) -> pd.DataFrame:
+    df = daily_frame(stn_id, periods=periods, start=start, x=x)
+    df["LOCAL_DATE"] = pd.to_datetime(df["LOCAL_DATE"])
+    df["MEAN_TEMPERATURE"] = df["MEAN_TEMPERATURE"].astype("float64") / 10
+    df["MEAN_TEMPERATURE_FLAG"] = pd.Categorical(
+        df["MEAN_TEMPERATURE_FLAG"].replace("", None)
+    )
+    return df.set_index("LOCAL_DATE")
+
+
+def test_to_xr_matches_concat_of_stations():
+    dict_frame = {
+        "1": station_frame("1", periods=20, start="2020-01-01", x=-79.5),
+        "2": station_frame("2", periods=15, start="2020-01-10", x=-79.2),
+        "3": station_frame("3", periods=5, start="2019-12-20", x=-75.0),
+    }
+    handler = WeatherStationsXArray(dict_frame)
+    ds = handler.to_xr()
+
+    per_station = []
+    for stn_id, df in dict_frame.items():
+        df = df.copy()
+        df["MEAN_TEMPERATURE_FLAG"] = df["MEAN_TEMPERATURE_FLAG"].to_numpy()
+        per_station.append(handler.df_to_xr(df=df, stn_id=stn_id))
+    expected = xr.concat(
+        per_station,
+        dim="climate_identifier",
+        join="outer",
+        coords="different",
+        compat="equals",
+    )
+    expected["MEAN_TEMPERATURE"] = expected["MEAN_TEMPERATURE"].astype("float32")
+
+    assert ds["MEAN_TEMPERATURE"].dtype == np.float32
+    assert ds["MEAN_TEMPERATURE"].dims == ("climate_identifier", "time")
+    assert ds["MEAN_TEMPERATURE"].attrs["units"] == "degC"
+    assert ds["province_code"].ndim == 0
+    xr.testing.assert_identical(decode_flags(ds), expected)
+
+
+def test_flags_are_int8_codes_shared_across_stations():
+    first = station_frame("1", periods=14, start="2020-01-01", x=-79.5)
+    second = station_frame("2", periods=14, start="2020-01-01", x=-79.2)
+    second["MEAN_TEMPERATURE_FLAG"] = pd.Categorical(["E", None] * 7)
+    ds = WeatherStationsXArray({"1": first, "2": second}).to_xr()
+    flag = ds["MEAN_TEMPERATURE_FLAG"]
+    assert flag.dtype == np.int8
+    assert flag.attrs["flag_meanings"] == "M E"
+    np.testing.assert_array_equal(flag.attrs["flag_values"], [0, 1])
+    assert flag.values[0, :8].tolist() == [0, -1, -1, -1, -1, -1, -1, 0]
+    assert flag.values[1, :2].tolist() == [1, -1]
+    decoded = decode_flags(ds)["MEAN_TEMPERATURE_FLAG"]
+    assert decoded.values[1, 0] == "E" and pd.isna(decoded.values[1, 1])
+    assert "flag_meanings" not in decoded.attrs
+
+
+def test_more_than_127_flags_widen_the_codes_of_both_paths():
+    df = station_frame("1", periods=200, start="2020-01-01", x=-79.5)
+    flags = [f"F{i}" for i in range(200)]
+    df["MEAN_TEMPERATURE_FLAG"] = pd.Categorical(flags)
+    handler = WeatherStationsXArray({"1": df})
+    ds = handler.to_xr()
+    per_station = WeatherStationsXArray({}).df_to_xr(df=df, stn_id="1")
+    for flag in (ds["MEAN_TEMPERATURE_FLAG"][0], per_station["MEAN_TEMPERATURE_FLAG"]):
+        assert flag.dtype == np.int16
+        assert flag.attrs["flag_values"].dtype == np.int16
+        assert np.array(flag.attrs["flag_strings"])[flag.values].tolist() == flags
+
+
+def test_lazy_to_xr_only_fetches_selected_chunks(geomet_server):
+    pytest.importorskip("dask")
+    for stn, x in (("1", -79.5), ("2", -79.2), ("3", -75.0)):
+        geomet_server.frames[stn] = daily_frame(stn, periods=60, x=x)
+    kwargs = dict(
+        stn_id=["1", "2", "3"],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 2, 29),
+    )
+    ds = WeatherStations(**kwargs).to_xr(lazy=True, time_chunk=20)
+    data_requests = [q for q in geomet_server.requests if "datetime" in q]
+    assert not data_requests
+    assert ds["MEAN_TEMPERATURE"].chunks == ((1, 1, 1), (20, 20, 20))
+    assert ds["MEAN_TEMPERATURE"].attrs["units"] == "degC"
+
+    subset = ds["MEAN_TEMPERATURE"].sel(
+        climate_identifier="2", time=slice("2020-01-05", "2020-01-15")
+    )
+    values = subset.load().values
+    data_requests = [q for q in geomet_server.requests if "datetime" in q]
+    assert [q["CLIMATE_IDENTIFIER"] for q in data_requests] == ["2"]
+    assert data_requests[0]["datetime"].startswith("2020-01-01")
+
+    expected = WeatherStations(**kwargs).to_xr()["MEAN_TEMPERATURE"]
+    expected = expected.sel(
+        climate_identifier="2", time=slice("2020-01-05", "2020-01-15")
+    )
+    np.testing.assert_array_equal(values, expected.values)
+
+
+def test_projection_skips_station_columns_and_keeps_coords(geomet_server):
+    geomet_server.frames["1"] = daily_frame("1", periods=10, x=-79.5)
+    geomet_server.frames["2"] = daily_frame("2", periods=10, x=-79.2)
+    kwargs = dict(
+        stn_id=["1", "2"],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 1, 10),
+    )
+    projected = WeatherStations(**kwargs)
+    full = WeatherStations(projection=False, **kwargs)
+
+    dict_frame = projected.to_dict_frame()
+    assert "STATION_NAME" not in dict_frame["1"].columns
+    assert "LOCAL_YEAR" not in dict_frame["1"].columns
+    xr.testing.assert_identical(projected.to_xr(), full.to_xr())
+
+
+def test_hourly_round_trip_keeps_text_and_flags():
+    index = pd.date_range("2020-01-01", periods=4, freq="h", name="LOCAL_DATE")
+    df = pd.DataFrame(
+        {
+            "TEMP": np.arange(4, dtype="float32"),
+            "TEMP_FLAG": pd.Categorical(["M", None, "not checked", None]),
+            "WEATHER_ENG_DESC": pd.Categorical(["Mainly Clear", "Snow", None, "Fog"]),
+        },
+        index=index,
+    )
+    ds = WeatherStationsXArray({"1": df}).to_xr()
+    assert ds["TEMP_FLAG"].dtype == np.int8
+    assert "flag_meanings" not in ds["WEATHER_ENG_DESC"].attrs
+    decoded = decode_flags(ds).sel(climate_identifier="1")
+    for col in ("TEMP_FLAG", "WEATHER_ENG_DESC"):
+        values = [None if pd.isna(v) else v for v in decoded[col].values]
+        assert values == [None if pd.isna(v) else v for v in df[col]]
+
+
+def test_projection_takes_stn_id_from_the_catalog(geomet_server):
+    for stn_id, stn in (("1", 101), ("2", 102)):
+        df = daily_frame(stn_id, periods=10)
+        geomet_server.frames[stn_id] = df.assign(STN_ID=stn)
+    kwargs = dict(
+        stn_id=["1", "2"],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 1, 10),
+    )
+    projected = WeatherStations(**kwargs)
+    full = WeatherStations(projection=False, **kwargs)
+
+    assert "STN_ID" not in projected.to_dict_frame()["1"].columns
+    properties = geomet_server.requests[-1]["properties"].split(",")
+    assert "STN_ID" not in properties
+    ds = projected.to_xr()
+    assert ds["stn_id"].values.tolist() == [101, 102]
+    assert "STN_ID" not in ds.data_vars
+    xr.testing.assert_identical(ds, full.to_xr())
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from tests.conftest import daily_frame
+from weather_api import WeatherStations
+from weather_api.utils.xarray import decode_flags
+
+
+def test_to_zarr_matches_to_xr(geomet_server, tmp_path):
+    pytest.importorskip("zarr")
+    geomet_server.frames["1"] = daily_frame("1", periods=20, start="2020-01-01")
+    geomet_server.frames["22"] = daily_frame("22", periods=10, start="2020-01-15")
+    geomet_server.frames["22"]["MEAN_TEMPERATURE_FLAG"] = ["E", ""] * 5
+    kwargs = dict(
+        stn_id=["1", "22"],
+        start_date=datetime(2020, 1, 1),
+        end_date=datetime(2020, 1, 31),
+    )
+    store = str(tmp_path / "stations.zarr")
+    WeatherStations(**kwargs).to_zarr(store)
+    ds = xr.open_zarr(store)
+    assert ds["MEAN_TEMPERATURE"].chunks is not None
+    assert ds.sizes == {"climate_identifier": 2, "time": 31}
+    assert ds["MEAN_TEMPERATURE"].attrs["units"] == "degC"
+
+    expected = WeatherStations(**kwargs).to_xr()
+    ds = ds.sortby("climate_identifier").sel(time=expected.time).load()
+    np.testing.assert_allclose(
+        ds["MEAN_TEMPERATURE"].values, expected["MEAN_TEMPERATURE"].values
+    )
+    assert list(ds["station_name"].values) == ["STATION 1", "STATION 22"]
+    # flag codes, with the flags of every station in their attributes
+    assert ds["MEAN_TEMPERATURE_FLAG"].dtype == np.int8
+    meanings = ds["MEAN_TEMPERATURE_FLAG"].attrs["flag_meanings"]
+    assert sorted(meanings.split()) == ["E", "M"]
+    decoded = decode_flags(ds)["MEAN_TEMPERATURE_FLAG"].values
+    expected_flags = decode_flags(expected)["MEAN_TEMPERATURE_FLAG"].values
+    assert decoded[0, 0] == "M" and decoded[1, 14] == "E"
+    assert pd.isna(decoded).tolist() == pd.isna(expected_flags).tolist()
+    flagged = pd.notna(decoded)
+    assert (decoded[flagged] == expected_flags[flagged]).all()
+
+
+def test_to_zarr_time_axis_spans_the_records_not_the_default_dates(
+    geomet_server, tmp_path
+):
+    pytest.importorskip("zarr")
+    geomet_server.frames["1"] = daily_frame("1", periods=20, start="2020-01-01")
+    store = str(tmp_path / "stations.zarr")
+    WeatherStations(stn_id="1", end_date=datetime(2020, 3, 1)).to_zarr(store)
+    time = xr.open_zarr(store)["time"].to_index()
+    assert time[0] == pd.Timestamp("2020-01-01")
+    assert time[-1] <= pd.Timestamp("2020-03-01")
@@ -1,2 +1,3 @@
 from weather_api.weather_stations import WeatherStations
 from weather_api.hydrometric_stations import HydrometricStations
+from weather_api.utils.dataframe import StationFailure, StationFetchError
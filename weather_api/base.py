@@ -1,23 +1,44 @@
+import asyncio
+import os
 from abc import ABC
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
 
-import folium
 import pandas as pd
-import xarray as xr
 
+from .utils.arrow import PartitionedParquet, frame_to_table
 from .utils.dataframe import (
     DataFrameHandler,
     HydrometricStationsDataframe,
+    StationFailure,
     WeatherStationsDataframe,
 )
+from .utils.cache import ResponseCache
+from .utils.checkpoint import PageCheckpoint
 from .utils.handlers import DataHandler
+from .utils.http import HttpClient, RetryPolicy
+from .utils.imports import import_optional
+from .utils.lazy import LazyStationDataset
 from .utils.url_handler import (
     HydrometricStationsUrlHandler,
     UrlHandler,
     WeatherStationsUrlHandler,
 )
-from .utils.xarray import XArrayHandler
+from .utils.stats import FetchStats
+from .utils.store import StationStore
+from .utils.xarray import (
+    XArrayHandler,
+    decode_flags as decode_flag_codes,
+    flag_attrs,
+    is_flag,
+)
+from .utils.zarr_writer import ZarrStationWriter
+
+if TYPE_CHECKING:
+    import folium
+    import pyarrow as pa
+    import xarray as xr
 
 
 class GeoMetAPI(ABC):
@@ -32,6 +53,15 @@ class GeoMetAPI(ABC):
         realtime: bool = False,  # for HydrometricStations
         hourly: bool = False,  # for WeatherStations
         vars: Optional[List[str]] = None,
+        max_workers: int = 4,
+        prefetch: int = 1,
+        cache: Union[None, str, ResponseCache] = None,
+        parser: str = "auto",
+        bbox_mode: str = "auto",
+        retry: Optional[RetryPolicy] = None,
+        checkpoint_dir: Union[None, str, os.PathLike] = None,
+        projection: bool = True,
+        shard: bool = True,
     ):
         self.stn_id = stn_id
         self.bbox = bbox
@@ -48,8 +78,21 @@ class GeoMetAPI(ABC):
         self.realtime = realtime
         self.hourly = hourly
         self.vars = vars
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+        self.parser = parser
+        self.bbox_mode = bbox_mode
+        self.projection = projection
+        self.shard = shard
+        if isinstance(cache, (str, os.PathLike)):
+            cache = ResponseCache(cache)
+        self.client = HttpClient(cache=cache, retry=retry)
+        self.stats = FetchStats()
+        self.checkpoint = (
+            PageCheckpoint(checkpoint_dir) if checkpoint_dir is not None else None
+        )
         self._initialize_url_handler(data_handler.url_handler)
-        self.url = self.get_url()
+        self._url: Optional[List[str]] = None
         self.dataframe_handler = data_handler.dataframe_handler
         self.xarray_handler = data_handler.xarray_handler
         self.plotting_handler = data_handler.plotting_handler
@@ -63,6 +106,11 @@ class GeoMetAPI(ABC):
             "stn_id": self.stn_id,
             "bbox": self.bbox,
             "properties": self.vars,
+            "client": self.client,
+            "bbox_mode": self.bbox_mode,
+            "max_workers": self.max_workers,
+            "projection": self.projection,
+            "shard": self.shard,
         }
         if issubclass(url_handler, HydrometricStationsUrlHandler):
             kwargs["realtime"] = self.realtime
@@ -75,44 +123,396 @@ class GeoMetAPI(ABC):
         url = self.url_handler.build_url()
         return url
 
+    def _plan(self) -> Dict[str, Tuple[datetime, datetime]]:
+        """Plan the requests against the station catalog, once; return the station periods.
+
+        Planning downloads the catalog, so it is done when data is first fetched rather
+        than when the object is built.
+        """
+        if self.url_handler.periods is None:
+            planned = self.url_handler.plan_urls()
+            if self._url is None:
+                self._url = planned
+        return self.url_handler.periods
+
+    @property
+    def url(self) -> List[str]:
+        """The data URLs fetched, narrowed to the period of record of each station."""
+        if self._url is None:
+            self._plan()
+        return self._url
+
+    @url.setter
+    def url(self, value: List[str]) -> None:
+        self._url = value
+
+    def _station_ids(self) -> List[str]:
+        """The requested station(s); for a bbox, the stations found in the box."""
+        if self.bbox is not None:
+            self._plan()
+        stn_id = self.url_handler.stn_id
+        if stn_id is None:
+            return []
+        if isinstance(stn_id, str):
+            return [stn_id]
+        return [str(s) for s in stn_id]
+
     def get_metadata(self) -> pd.DataFrame:
-        """Retrieve the metadata for the specified station(s)."""
-        metadata_url = self.url_handler.build_url_metadata()
-        dfs = [pd.read_csv(url) for url in metadata_url]
-        df = pd.concat(dfs)
-        return df
-
-    def to_dict_frame(self) -> Dict[str, pd.DataFrame]:
-        """Retrieve the data to a dictionary of pandas dataframes."""
-        kwargs = {}
+        """Retrieve the metadata for the specified station(s).
+
+        The metadata comes from the station catalog of the network, which is downloaded once
+        per process and then queried locally.
+        """
+        return self.url_handler.metadata()
+
+    def refresh_catalog(self) -> None:
+        """Download the station catalog again, e.g. after stations were added upstream.
+
+        The requests are planned again against it on the next fetch.
+        """
+        self.url_handler.catalog(refresh=True)
+        self.url_handler.periods = None
+        self._url = None
+
+    def _initialize_dataframe_handler(
+        self, paths: Optional[List[str]] = None
+    ) -> DataFrameHandler:
+        properties = self.url_handler.properties
+        kwargs = {
+            "max_workers": self.max_workers,
+            "prefetch": self.prefetch,
+            "client": self.client,
+            "parser": self.parser,
+            "checkpoint": self.checkpoint,
+            "stats": self.stats,
+            "keep_station_key": properties is None
+            or self.url_handler.station_key in properties,
+            "shard": self.shard,
+        }
         if issubclass(self.dataframe_handler, HydrometricStationsDataframe):
-            kwargs = {"realtime": self.realtime}
+            kwargs["realtime"] = self.realtime
         elif issubclass(self.dataframe_handler, WeatherStationsDataframe):
-            kwargs = {"hourly": self.hourly}
-        data_handler: DataFrameHandler = self.dataframe_handler(self.url, **kwargs)
-        self.dict_frame = data_handler.to_dict_frame()
+            kwargs["hourly"] = self.hourly
+        return self.dataframe_handler(self.url if paths is None else paths, **kwargs)
+
+    def to_dict_frame(self, partial: bool = False) -> Union[
+        Dict[str, pd.DataFrame], Tuple[Dict[str, pd.DataFrame], List[StationFailure]]
+    ]:
+        """Retrieve the data to a dictionary of pandas dataframes.
+
+        If any station fails, a `StationFetchError` is raised once the others are done. With
+        `partial=True`, the stations that succeeded are returned instead, together with a
+        list of `StationFailure` for the others. With `checkpoint_dir`, running again after
+        a failure resumes each station from the last page saved.
+        """
+        data_handler = self._initialize_dataframe_handler()
+        with self.stats.stage("to_dict_frame"):
+            if not partial:
+                self.dict_frame = data_handler.to_dict_frame()
+                return self.dict_frame
+            failures: List[StationFailure] = []
+            self.dict_frame = data_handler.to_dict_frame(failures=failures)
+            return self.dict_frame, failures
+
+    def iter_frames(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Iterate over the data one page at a time, as `(station, dataframe)` pairs.
+
+        Stations are downloaded one after another and each page is yielded as soon as it is
+        parsed, with the same dtypes and date index as `to_dict_frame`. Memory use stays at
+        about one page regardless of the length of the record.
+        """
+        data_handler = self._initialize_dataframe_handler()
+        yield from data_handler.iter_frames()
+
+    def sync(self, store: Union[str, StationStore]) -> Dict[str, pd.DataFrame]:
+        """Update a local store of the station(s) and return the merged dictionary of dataframes.
+
+        Only the part of each series after the last date already held in `store` is
+        downloaded. The merged series are written back to `store` and become the result of
+        `to_dict_frame`, so `to_xr` can be called afterwards as usual.
+        """
+        if isinstance(store, (str, os.PathLike)):
+            store = StationStore(store)
+        collection = self.url_handler.collection
+        periods = self._plan()
+        stations = self._station_ids()
+        paths = []
+        for stn_id in stations:
+            if stn_id not in periods:
+                continue
+            start_date, end_date = periods[stn_id]
+            last_date = store.last_date(collection, stn_id)
+            if last_date is None:
+                paths.append(self.url_handler.get_url(stn_id, start_date, end_date))
+            elif last_date < pd.Timestamp(end_date):
+                # the last date held is requested again in case it was still being updated
+                start_date = max(start_date, last_date.to_pydatetime())
+                paths.append(self.url_handler.get_url(stn_id, start_date, end_date))
+        tails = self._initialize_dataframe_handler(paths).to_dict_frame()
+
+        self.dict_frame = {}
+        for stn_id in stations:
+            if stn_id in tails:
+                df = store.append(collection, stn_id, tails[stn_id])
+            else:
+                df = store.load(collection, stn_id)
+            if df is not None and not df.empty:
+                self.dict_frame[stn_id] = df
         return self.dict_frame
 
-    def to_xr(self) -> xr.Dataset:
-        """Retrieve the data to an xarray dataset."""
-        if self.dict_frame is None:
-            self.dict_frame = self.to_dict_frame()
+    def _dict_frame_to_xr(self, decode_flags: bool = False) -> "xr.Dataset":
+        import xarray as xr
+
         if not self.dict_frame:
             return xr.Dataset()
-        data_handler: XArrayHandler = self.xarray_handler(self.dict_frame)
+        attrs = self.url_handler.station_attributes(list(self.dict_frame))
+        data_handler: XArrayHandler = self.xarray_handler(
+            self.dict_frame, station_attrs=attrs
+        )
         ds = data_handler.to_xr()
+        if decode_flags:
+            ds = decode_flag_codes(ds)
         return ds
 
+    def _fetch_window(
+        self, stn_id: str, start: datetime, end: datetime
+    ) -> Optional[pd.DataFrame]:
+        url = self.url_handler.get_url(stn_id, start, end)
+        return self._initialize_dataframe_handler([url])._to_df_or_none(url)
+
+    def _lazy_variables(self) -> List[str]:
+        """The numeric variables of the requested collection, as in `to_xr`."""
+        dtypes = self._initialize_dataframe_handler([])._read_kwargs()["dtype"]
+        drop_columns = self.xarray_handler.drop_columns
+        properties = self.url_handler.properties
+        return [
+            col
+            for col, dtype in dtypes.items()
+            if col not in drop_columns
+            and (properties is None or col in properties)
+            and dtype.startswith(("float", "int"))
+        ]
+
+    def _lazy_xr(self, time_chunk: int = 8760) -> "xr.Dataset":
+        import xarray as xr
+
+        periods = self._plan()
+        if not periods:
+            return xr.Dataset()
+        time = self._time_axis(periods)
+        if self.realtime:
+            # realtime requests have no date filter, so a station is one chunk
+            time_chunk = max(len(time), 1)
+            window = (time[0].to_pydatetime(), time[-1].to_pydatetime())
+            periods = {stn_id: window for stn_id in periods}
+        attrs = self.url_handler.station_attributes(list(periods))
+        converter: XArrayHandler = self.xarray_handler({}, station_attrs=attrs)
+        coords = {
+            name: [converter._station_attr(stn_id, col) for stn_id in periods]
+            for name, col in converter.coord_columns.items()
+            if col in attrs.columns
+        }
+        builder = LazyStationDataset(
+            self._fetch_window,
+            periods=periods,
+            time=time,
+            variables=self._lazy_variables(),
+            station_dim=converter.station_dim,
+            time_chunk=time_chunk,
+        )
+        ds = builder.build(converter._station_coords(coords))
+        return converter._assign_units(ds)
+
+    def to_xr(
+        self, decode_flags: bool = False, lazy: bool = False, time_chunk: int = 8760
+    ) -> "xr.Dataset":
+        """Retrieve the data to an xarray dataset.
+
+        Quality flags are stored as int8 codes described by their `flag_values` and
+        `flag_meanings` attributes. Pass `decode_flags=True` to get the flag strings instead.
+
+        With `lazy=True` (requires `dask`), nothing is downloaded yet: the numeric variables
+        are dask arrays chunked by station and by `time_chunk` time steps, and each chunk is
+        downloaded when it is computed. Select stations, dates and variables first, then
+        call `.load()` or `.compute()`; only the chunks needed are requested. Flags are
+        not included in lazy datasets.
+        """
+        if lazy:
+            return self._lazy_xr(time_chunk=time_chunk)
+        with self.stats.stage("to_xr"):
+            if self.dict_frame is None:
+                self.dict_frame = self.to_dict_frame()
+            return self._dict_frame_to_xr(decode_flags=decode_flags)
+
+    def _time_axis(
+        self, periods: Optional[Dict[str, Tuple[datetime, datetime]]] = None
+    ) -> pd.DatetimeIndex:
+        """The time steps the requested data can fall on, at the frequency of the series.
+
+        Given the planned `periods` (see `_plan`), the axis spans their union rather than
+        the whole `start_date`-`end_date` range, which defaults to 1840 onwards.
+        """
+        if self.realtime:
+            # realtime data covers the last 30 days in 5-minute steps (UTC)
+            end = pd.Timestamp.now("UTC").tz_localize(None).floor("5min")
+            start = max(pd.Timestamp(self.start_date), end - pd.Timedelta(days=30))
+            return pd.date_range(start.ceil("5min"), end, freq=pd.Timedelta(minutes=5))
+        start, end = self.start_date, self.end_date
+        if periods:
+            start = min(first for first, _ in periods.values())
+            end = max(last for _, last in periods.values())
+        if self.hourly:
+            start = pd.Timestamp(start).ceil("h")
+            return pd.date_range(start, end, freq=pd.Timedelta(hours=1))
+        start = pd.Timestamp(start).ceil("D")
+        return pd.date_range(start, end, freq=pd.Timedelta(days=1))
+
+    def iter_stations(
+        self, failures: Optional[List[StationFailure]] = None
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield `(station, dataframe)` as each station finishes downloading.
+
+        Up to `max_workers` stations are downloaded at once and none is kept after it has
+        been yielded. If `failures` is given, the stations that could not be retrieved are
+        appended to it; otherwise a `StationFetchError` is raised after the other stations.
+        """
+        data_handler = self._initialize_dataframe_handler()
+        yield from data_handler.iter_stations(failures)
+
+    def _arrow_tables(self) -> Iterator[Tuple[str, "pa.Table"]]:
+        if self.dict_frame is None:
+            self.to_dict_frame()
+        dtypes = self._initialize_dataframe_handler([])._read_kwargs()["dtype"]
+        for stn_id, df in self.dict_frame.items():
+            yield stn_id, frame_to_table(df, dtypes)
+
+    def to_arrow(self) -> "pa.Table":
+        """Retrieve the data to one Arrow table, with a `station` column. Requires `pyarrow`.
+
+        The columns have the compact types of `data_types.py` (float32, small integers and
+        dictionary-encoded flags), and the date index becomes the first column.
+        """
+        pa = import_optional("pyarrow", "to_arrow")
+        tables = [
+            table.append_column("station", pa.array([stn_id] * len(table), pa.string()))
+            for stn_id, table in self._arrow_tables()
+        ]
+        if not tables:
+            return pa.table({})
+        return pa.concat_tables(tables)
+
+    def to_parquet(self, root: Union[str, os.PathLike], existing: str = "skip") -> int:
+        """Write the data to a hive-partitioned Parquet dataset. Requires `pyarrow`.
+
+        The dataset is partitioned as `root/network=<collection>/station=<id>/year=<year>`,
+        with the column types of `to_arrow`. With `existing="skip"`, the rows already in
+        `root` are left as they are, so that later calls only add new stations, years and
+        the rows of a year dated after those stored; use `existing="replace"` to write the
+        partitions again. Returns the number of partitions written to.
+        """
+        dataset = PartitionedParquet(root, existing=existing)
+        network = self.url_handler.collection
+        return sum(
+            dataset.write(network, stn_id, table)
+            for stn_id, table in self._arrow_tables()
+        )
+
+    def to_zarr(self, store, time_chunk: int = 8760, mode: str = "w-") -> None:
+        """Write the data to a Zarr store, one station at a time. Requires `zarr`.
+
+        Each station is written as soon as it has been downloaded and converted, so only
+        the stations in progress are held in memory. The store has the variables, units
+        and coordinates of `to_xr`, on a time axis at the frequency of the series spanning
+        the planned periods of record of the stations (within `start_date` to `end_date`),
+        and can be opened lazily with `xr.open_zarr(store)`. Flags are int8 codes as in
+        `to_xr`; their attributes are completed once every station has been written.
+        Stations that fail are reported with a `StationFetchError` after the others are written.
+        """
+        import_optional("zarr", "to_zarr")
+        writer = ZarrStationWriter(
+            store,
+            station_dim=self.xarray_handler.station_dim,
+            time=self._time_axis(self._plan()),
+            time_chunk=time_chunk,
+            mode=mode,
+        )
+        attrs = self.url_handler.station_attributes(self._station_ids())
+        converter: XArrayHandler = self.xarray_handler({}, station_attrs=attrs)
+        data_handler = self._initialize_dataframe_handler()
+        for stn_id, df in data_handler.iter_stations():
+            for col in df.select_dtypes(include=["category", "string"]).columns:
+                if not is_flag(col):
+                    df[col] = df[col].to_numpy()
+            writer.append(converter.df_to_xr(df=df, stn_id=stn_id))
+        # codes only ever extend the flag lists, so codes already written stay valid
+        writer.update_attrs(
+            {col: flag_attrs(flags) for col, flags in converter.flags.items()}
+        )
+
+    async def aget_metadata(self) -> pd.DataFrame:
+        """Asynchronous counterpart of `get_metadata`.
+
+        The metadata comes from the station catalog, as in `get_metadata`, which is read in
+        the default executor to keep the event loop free.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_metadata)
+
+    async def ato_dict_frame(
+        self, max_concurrency: int = 64, partial: bool = False
+    ) -> Union[
+        Dict[str, pd.DataFrame], Tuple[Dict[str, pd.DataFrame], List[StationFailure]]
+    ]:
+        """Asynchronous counterpart of `to_dict_frame`. Requires `aiohttp`.
+
+        All stations, their date windows and prefetched pages share one aiohttp session
+        on the running event loop; at most `max_concurrency` requests are in flight at
+        once. Retries, the cache, `checkpoint_dir` and `stats` apply as in `to_dict_frame`,
+        and so does `partial`.
+        """
+        aiohttp = import_optional("aiohttp", "The asyncio API")
+        # planning reads the station catalog, so it is kept off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._plan)
+        data_handler = self._initialize_dataframe_handler()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        failures: Optional[List[StationFailure]] = [] if partial else None
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            with self.stats.stage("to_dict_frame"):
+                self.dict_frame = await data_handler.ato_dict_frame(
+                    session, semaphore, failures
+                )
+        if partial:
+            return self.dict_frame, failures
+        return self.dict_frame
+
+    async def ato_xr(
+        self, max_concurrency: int = 64, decode_flags: bool = False
+    ) -> "xr.Dataset":
+        """Asynchronous counterpart of `to_xr`. Requires `aiohttp`.
+
+        The conversion to xarray runs in the default executor to keep the event loop free.
+        """
+        if self.dict_frame is None:
+            await self.ato_dict_frame(max_concurrency=max_concurrency)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self._dict_frame_to_xr, decode_flags)
+        )
+
     def plot_stations(
         self,
         meta: Union[None, pd.DataFrame] = None,
-    ) -> folium.Map:
+        fast: Optional[bool] = None,
+    ) -> "folium.Map":
         """Plot the weather stations on a map.
 
         If `meta` is not specified, the default metadata will be retrieved. It is recommended to use this with
-        Jupyter Notebook to display the map.
+        Jupyter Notebook to display the map. With `fast`, the stations are drawn as one
+        cluster of plain markers created in the browser, which keeps maps of thousands of
+        stations quick to build and open. By default, it is used above 1000 stations.
         """
         if meta is None:
             meta = self.get_metadata()
-        m = self.plotting_handler.plot_stations(meta)
+        m = self.plotting_handler.plot_stations(meta, fast=fast)
         return m
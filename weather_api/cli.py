@@ -0,0 +1,191 @@
+"""The `weather-api` command line, to download many stations from a single process."""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, TextIO
+
+import pandas as pd
+
+from .base import GeoMetAPI
+from .hydrometric_stations import HydrometricStations
+from .utils.files import atomic_write
+from .utils.imports import import_optional
+from .weather_stations import WeatherStations
+
+NETWORKS = {"climate": WeatherStations, "hydrometric": HydrometricStations}
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet"}
+
+
+def _read_stations(values: List[str]) -> List[str]:
+    """Station ids given on the command line, or read from files of one id per line."""
+    stations = []
+    for value in values:
+        if os.path.isfile(value):
+            with open(value) as f:
+                lines = (line.split("#")[0].strip() for line in f)
+                stations.extend(line for line in lines if line)
+        else:
+            stations.extend(stn for stn in value.split(",") if stn)
+    return list(dict.fromkeys(stations))
+
+
+def _write(df: pd.DataFrame, path: Path, fmt: str) -> None:
+    if fmt == "parquet":
+        import_optional("pyarrow", "--format parquet")
+    with atomic_write(path) as tmp_path:
+        if fmt == "parquet":
+            df.to_parquet(tmp_path)
+        else:
+            df.to_csv(tmp_path)
+
+
+class Progress:
+    """Report each station written, with the running throughput, on `stream`."""
+
+    def __init__(self, total: int, stream: TextIO = sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.rows = 0
+        self.start = time.perf_counter()
+
+    def update(self, stn_id: str, rows: int) -> None:
+        self.done += 1
+        self.rows += rows
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(
+            f"[{self.done}/{self.total}] {stn_id}: {rows} rows | "
+            + f"{self.done / elapsed * 60:.1f} stations/min, "
+            + f"{self.rows / elapsed:.0f} rows/s",
+            file=self.stream,
+        )
+
+
+def _api(args: argparse.Namespace, stn_id=None, bbox=None) -> GeoMetAPI:
+    kwargs = dict(
+        stn_id=stn_id,
+        bbox=bbox,
+        start_date=args.start,
+        end_date=args.end,
+        vars=args.vars,
+        max_workers=args.jobs,
+        cache=args.cache,
+        checkpoint_dir=args.checkpoint_dir,
+    )
+    if args.network == "climate":
+        kwargs["hourly"] = args.hourly
+    else:
+        kwargs["realtime"] = args.realtime
+    return NETWORKS[args.network](**kwargs)
+
+
+def fetch(args: argparse.Namespace) -> int:
+    """Download every requested station to `args.out`, skipping those already there.
+
+    A station without data in the date range is written as an empty file, so that it
+    is skipped too when the command is run again.
+    """
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    extension = EXTENSIONS[args.format]
+    if args.bbox is not None:
+        # the stations in the box with data in the date range, then fetched one by one
+        stations = _api(args, bbox=args.bbox)._station_ids()
+    else:
+        stations = _read_stations(args.stations)
+    pending = [stn for stn in stations if not (out / f"{stn}{extension}").exists()]
+    skipped = len(stations) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} station(s) already in {out}", file=sys.stderr)
+    if not pending:
+        return 0
+
+    progress = Progress(len(pending))
+    failures = []
+    written = set()
+    for stn_id, df in _api(args, stn_id=pending).iter_stations(failures):
+        _write(df, out / f"{stn_id}{extension}", args.format)
+        written.add(stn_id)
+        progress.update(stn_id, len(df))
+    failed = {failure.station for failure in failures}
+    for stn_id in pending:
+        if stn_id not in written and stn_id not in failed:
+            # no rows in the range: an empty file, so that a rerun skips it as well
+            _write(pd.DataFrame(), out / f"{stn_id}{extension}", args.format)
+            progress.update(stn_id, 0)
+    for failure in failures:
+        print(f"Failed {failure.station}: {failure.error!r}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def _date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _bbox(value: str) -> List[float]:
+    bbox = [float(v) for v in value.split(",")]
+    if len(bbox) != 4:
+        raise argparse.ArgumentTypeError("expected left,bottom,right,top")
+    return bbox
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="weather-api", description="Download data from the GeoMet-OGC-API."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    parser_fetch = subparsers.add_parser(
+        "fetch",
+        help="download stations to one file each",
+        description="Download stations concurrently, writing each to OUT as soon as "
+        + "it is retrieved. Stations already in OUT are skipped, so running the same "
+        + "command again resumes an interrupted download.",
+    )
+    parser_fetch.add_argument("--network", choices=list(NETWORKS), default="climate")
+    selection = parser_fetch.add_mutually_exclusive_group(required=True)
+    selection.add_argument(
+        "--stations",
+        nargs="+",
+        metavar="ID_OR_FILE",
+        help="station ids (space or comma separated) or files of one id per line",
+    )
+    selection.add_argument(
+        "--bbox",
+        type=_bbox,
+        metavar="LEFT,BOTTOM,RIGHT,TOP",
+        help="the stations in a box, written as --bbox=-80,43,-78,44",
+    )
+    parser_fetch.add_argument("--start", type=_date, help="start date (ISO format)")
+    parser_fetch.add_argument("--end", type=_date, help="end date (ISO format)")
+    parser_fetch.add_argument("--hourly", action="store_true", help="hourly data")
+    parser_fetch.add_argument(
+        "--realtime", action="store_true", help="realtime hydrometric data"
+    )
+    parser_fetch.add_argument("--vars", nargs="+", help="the variables to download")
+    parser_fetch.add_argument("--jobs", type=int, default=8, help="stations at once")
+    parser_fetch.add_argument("--out", required=True, help="the output directory")
+    parser_fetch.add_argument("--format", choices=list(EXTENSIONS), default="csv")
+    parser_fetch.add_argument("--cache", help="a directory for the HTTP cache")
+    parser_fetch.add_argument(
+        "--checkpoint-dir", help="a directory for the pages of unfinished stations"
+    )
+    parser_fetch.set_defaults(func=fetch)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.network == "hydrometric" and args.hourly:
+        parser.error("--hourly is only available with --network climate")
+    if args.network == "climate" and args.realtime:
+        parser.error("--realtime is only available with --network hydrometric")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,15 @@
+import os
+import time
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
 
 from .base import GeoMetAPI
+from .utils.cache import ResponseCache
+from .utils.dataframe import StationFailure
 from .utils.handlers import HydrometricStationsDataHandler
+from .utils.http import RetryPolicy
 
 """
 https://api.weather.gc.ca/openapi?f=html
@@ -27,6 +34,38 @@ class HydrometricStations(GeoMetAPI):
         If True, retrieve the realtime-data. If False, retrieve historical data.
     vars : Optional[List[str]]
         The variables to retrieve. If not specified, all variables are retrieved.
+    max_workers : int
+        The maximum number of stations downloaded in parallel by `to_dict_frame` and `to_xr`.
+    prefetch : int
+        The number of pages of a station's series downloaded ahead while the current page is parsed.
+        Set to 0 to download pages one after another.
+    cache : Union[None, str, ResponseCache]
+        A directory (or `ResponseCache`) in which responses are cached between runs.
+        If not specified, nothing is cached.
+    parser : str
+        The CSV parser: "pyarrow", "c" (the default pandas parser) or "auto" to use pyarrow
+        when it is installed.
+    bbox_mode : str
+        How a `bbox` pull is downloaded: "collection" sends one query for all the stations in the
+        box, "station" sends one query per station and "auto" picks whichever needs fewer rounds
+        of requests given the number of stations and the length of the date range.
+    retry : Optional[RetryPolicy]
+        How failed requests are retried. If not specified, connection errors and 429/5xx
+        responses are retried 3 times with exponential backoff and jitter.
+    checkpoint_dir : Union[None, str, os.PathLike]
+        A directory in which the pages downloaded so far are saved, so that running again
+        after a failure resumes where it stopped. The pages are removed once every station
+        has been retrieved.
+    projection : bool
+        If True (the default) and `vars` is not specified, the columns repeating the station
+        on every row (`STATION_NAME`, `STATION_NUMBER`, `IDENTIFIER` and
+        `PROV_TERR_STATE_LOC`) are not downloaded; the station coordinates of `to_xr` are
+        taken from the station catalog instead. Set to False to get these columns in the
+        dataframes.
+    shard : bool
+        If True (the default), the date range of each station is split into windows of one
+        page each, fetched concurrently (`max_workers` requests at a time) instead of
+        paging through the series one offset after another.
     """
 
     def __init__(
@@ -37,6 +76,15 @@ class HydrometricStations(GeoMetAPI):
         bbox: Optional[List[float]] = None,
         realtime: bool = False,
         vars: Optional[List[str]] = None,
+        max_workers: int = 4,
+        prefetch: int = 1,
+        cache: Union[None, str, ResponseCache] = None,
+        parser: str = "auto",
+        bbox_mode: str = "auto",
+        retry: Optional[RetryPolicy] = None,
+        checkpoint_dir: Union[None, str, os.PathLike] = None,
+        projection: bool = True,
+        shard: bool = True,
     ):
         super().__init__(
             stn_id=stn_id,
@@ -45,5 +93,71 @@ class HydrometricStations(GeoMetAPI):
             bbox=bbox,
             realtime=realtime,
             vars=vars,
+            max_workers=max_workers,
+            prefetch=prefetch,
+            cache=cache,
+            parser=parser,
+            bbox_mode=bbox_mode,
+            retry=retry,
+            checkpoint_dir=checkpoint_dir,
+            projection=projection,
+            shard=shard,
             data_handler=HydrometricStationsDataHandler,
         )
+        # the time of the last realtime reading seen for each station, see `poll`
+        self.last_seen: Dict[str, pd.Timestamp] = {}
+
+    def poll(
+        self, failures: Optional[List[StationFailure]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Retrieve the realtime readings that are newer than those already seen.
+
+        The first poll retrieves the whole realtime window of each station. Later polls only
+        request the readings from the last `DATETIME` seen for the station (kept in
+        `last_seen`) onwards, and return the stations with new readings only. Stations are
+        polled `max_workers` at a time. If `failures` is given, the stations that could not
+        be retrieved are appended to it and polled from the same point next time; otherwise
+        a `StationFetchError` is raised after the other stations.
+        """
+        if not self.realtime:
+            raise ValueError("poll and watch need realtime=True")
+        periods = self._plan()
+        stations = [stn for stn in self._station_ids() if stn in periods]
+        paths = [
+            self.url_handler.get_url(stn, since=self.last_seen.get(stn))
+            for stn in stations
+        ]
+        new = {}
+        data_handler = self._initialize_dataframe_handler(paths)
+        for stn_id, df in data_handler.iter_stations(failures):
+            last = self.last_seen.get(stn_id)
+            if last is not None:
+                # the reading at `last` is sent again, the interval being inclusive
+                df = df[df.index > last]
+            if not df.empty:
+                self.last_seen[stn_id] = df.index.max()
+                new[stn_id] = df
+        return new
+
+    def watch(
+        self,
+        interval: float = 300,
+        polls: Optional[int] = None,
+        failures: Optional[List[StationFailure]] = None,
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Poll every `interval` seconds, yielding `(station, dataframe)` of new readings.
+
+        Each poll is as in `poll`. A station that fails is reported in `failures`, if given,
+        and polled again next time rather than stopping the watch. Runs `polls` times, or
+        until the iteration is stopped if None.
+        """
+        done = 0
+        while polls is None or done < polls:
+            started = time.monotonic()
+            failed: List[StationFailure] = []
+            yield from self.poll(failed).items()
+            if failures is not None:
+                failures.extend(failed)
+            done += 1
+            if polls is None or done < polls:
+                time.sleep(max(interval - (time.monotonic() - started), 0))
@@ -0,0 +1,101 @@
+"""Arrow tables and hive-partitioned Parquet datasets of station dataframes."""
+
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Union
+
+import pandas as pd
+
+from .files import atomic_write
+from .imports import import_optional
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+def _arrow_types() -> Dict[str, "pa.DataType"]:
+    pa = import_optional("pyarrow", "Arrow and Parquet export")
+    return {
+        "float32": pa.float32(),
+        "float64": pa.float64(),
+        "int8": pa.int8(),
+        "int16": pa.int16(),
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "str": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+    }
+
+
+def frame_to_table(df: pd.DataFrame, dtypes: Dict[str, str]) -> "pa.Table":
+    """Convert a station dataframe to an Arrow table, date index included.
+
+    Columns listed in `dtypes` (see `data_types.py`) get the matching Arrow type, so that
+    every station and partition has the same schema even where a column is empty.
+    """
+    pa = import_optional("pyarrow", "Arrow and Parquet export")
+    types = _arrow_types()
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    fields = [
+        pa.field(field.name, types.get(dtypes.get(field.name), field.type))
+        for field in table.schema
+    ]
+    return table.cast(pa.schema(fields))
+
+
+class PartitionedParquet:
+    """A hive-partitioned Parquet dataset laid out as `network=/station=/year=`.
+
+    Each partition holds the rows of one station and calendar year, in `part-0.parquet`
+    and, for rows added by later writes, `part-1.parquet` and so on. The partition keys
+    are in the directory names only, and are read back as columns by pyarrow, DuckDB or
+    Spark.
+
+    Attributes
+    ----------
+    root : Path
+        The directory of the dataset. It is created if needed.
+    existing : str
+        What to do with a partition that is already in the dataset: "skip" leaves the rows
+        it holds as they are and only adds the rows dated after them, and "replace" writes
+        it again.
+    """
+
+    def __init__(self, root: Union[str, os.PathLike], existing: str = "skip"):
+        if existing not in ("skip", "replace"):
+            raise ValueError(f"existing must be 'skip' or 'replace', not {existing!r}")
+        self.root = Path(root).expanduser()
+        self.existing = existing
+
+    def _dir(self, network: str, stn_id: str, year: int) -> Path:
+        return self.root / f"network={network}" / f"station={stn_id}" / f"year={year}"
+
+    def write(self, network: str, stn_id: str, table: "pa.Table") -> int:
+        """Write the rows of one station, split by year; return the partitions written to.
+
+        The year is taken from the first column of `table`, its date column. With
+        `existing="skip"`, the rows of a partition up to the last date it already holds
+        are dropped, and the newer ones are written to a new file of the partition.
+        """
+        pc = import_optional("pyarrow.compute", "Parquet export", package="pyarrow")
+        pq = import_optional("pyarrow.parquet", "Parquet export", package="pyarrow")
+        years = pc.year(table.column(0))
+        written = 0
+        for year in pc.unique(years).to_pylist():
+            directory = self._dir(network, stn_id, year)
+            part = table.filter(pc.equal(years, year))
+            parts = list(directory.glob("part-*.parquet"))
+            if parts and self.existing == "replace":
+                shutil.rmtree(directory)
+                parts = []
+            elif parts:
+                stored = pq.read_table(directory, columns=[table.column_names[0]])
+                part = part.filter(pc.greater(part.column(0), pc.max(stored.column(0))))
+                if not part.num_rows:
+                    continue
+            directory.mkdir(parents=True, exist_ok=True)
+            with atomic_write(directory / f"part-{len(parts)}.parquet") as tmp_path:
+                pq.write_table(part, tmp_path)
+            written += 1
+        return written
@@ -0,0 +1,204 @@
+"""Persistent on-disk cache for the responses of the GeoMet API."""
+
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+# collections holding observations; their responses never change once the requested range is over
+DATA_COLLECTIONS = ("climate-daily", "climate-hourly", "hydrometric-daily-mean")
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+
+class ResponseCache:
+    """LRU cache of raw response bodies keyed by their canonical URL.
+
+    Entries expire after a time-to-live that depends on the collection in the URL. Data
+    requests whose `datetime` range ended more than `settle_days` ago are kept for
+    `historical_ttl` seconds; every other request uses the `ttl` of its collection (or
+    `default_ttl`). Stale entries are still used to revalidate with the server when it sent an
+    ETag or Last-Modified header. The least recently used entries are evicted once the
+    compressed bodies exceed `max_bytes`.
+
+    Attributes
+    ----------
+    directory : Union[str, Path]
+        The directory holding the cache database. It is created if needed.
+    max_bytes : int
+        The maximum size of the stored (compressed) bodies.
+    ttl : Optional[Dict[str, float]]
+        Time-to-live in seconds per collection, merged over `DEFAULT_TTL`.
+    historical_ttl : float
+        Time-to-live in seconds for data ranges that ended before `settle_days` ago.
+    default_ttl : float
+        Time-to-live in seconds for collections not listed in `ttl`.
+    settle_days : int
+        How long after its end a data range may still be revised by the server.
+    """
+
+    DEFAULT_TTL = {
+        "climate-stations": HOUR,
+        "hydrometric-stations": HOUR,
+        "hydrometric-realtime": 300.0,
+        "climate-daily": HOUR,
+        "climate-hourly": HOUR,
+        "hydrometric-daily-mean": HOUR,
+    }
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = 1024**3,
+        ttl: Optional[Dict[str, float]] = None,
+        historical_ttl: float = 365 * DAY,
+        default_ttl: float = HOUR,
+        settle_days: int = 7,
+    ):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = {**self.DEFAULT_TTL, **(ttl or {})}
+        self.historical_ttl = historical_ttl
+        self.default_ttl = default_ttl
+        self.settle_days = settle_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "responses.sqlite"),
+            check_same_thread=False,
+            timeout=30,
+        )
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+
+    @staticmethod
+    def canonical_url(url: str) -> str:
+        """Sort the query parameters so that equivalent URLs share an entry."""
+        parsed = urlparse(url)
+        query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+        return urlunparse(parsed._replace(query=query))
+
+    def ttl_for(self, url: str, now: Optional[datetime] = None) -> float:
+        """Return the time-to-live in seconds of a response for `url`."""
+        parsed = urlparse(url)
+        parts = parsed.path.rstrip("/").split("/")
+        collection = parts[-2] if len(parts) >= 2 and parts[-1] == "items" else None
+        if collection in DATA_COLLECTIONS:
+            date_range = dict(parse_qsl(parsed.query)).get("datetime")
+            end = _range_end(date_range)
+            now = now or datetime.now()
+            if end is not None and end < now - timedelta(days=self.settle_days):
+                return self.historical_ttl
+        return self.ttl.get(collection, self.default_ttl)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        key = self.canonical_url(url)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?", (now, key)
+            )
+        body, etag, last_modified, expires_at = row
+        return CachedResponse(zlib.decompress(body), etag, last_modified, now < expires_at)
+
+    def set(
+        self,
+        url: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        key = self.canonical_url(url)
+        compressed = zlib.compress(body, 1)
+        now = time.time()
+        expires_at = now + self.ttl_for(url)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, compressed, len(compressed), etag, last_modified, expires_at, now),
+            )
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """Mark a stale entry as fresh again after the server answered 304 Not Modified."""
+        key = self.canonical_url(url)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE url = ?",
+                (now + self.ttl_for(url), now, key),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return total
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", evicted)
+
+
+def _range_end(date_range: Optional[str]) -> Optional[datetime]:
+    if not date_range or "/" not in date_range:
+        return None
+    end = date_range.split("/")[-1].strip()
+    if end in ("", ".."):
+        return None
+    try:
+        return datetime.fromisoformat(end.replace("Z", ""))
+    except ValueError:
+        return None
@@ -0,0 +1,122 @@
+"""Local copy of the station lists of the GeoMet API, for lookups without a request."""
+
+import threading
+import time
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .http import HttpClient
+from .url_builder import UrlBuilder
+
+
+class StationCatalog:
+    """Every station of one network, indexed by identifier and by longitude.
+
+    Lookups by identifier go through a hash index; bounding-box queries use a binary search
+    over the longitudes followed by a filter on the latitudes of the candidates.
+
+    Attributes
+    ----------
+    df : pd.DataFrame
+        The station list, as returned by the `*-stations` collection.
+    station_key : str
+        The column identifying a station.
+    """
+
+    MAX_AGE = 24 * 3600.0
+    _loaded: Dict[str, Tuple[float, "StationCatalog"]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, df: pd.DataFrame, station_key: str):
+        self.df = df.reset_index(drop=True)
+        self.station_key = station_key
+        self._ids = pd.Index(self.df[station_key])
+        x = self.df["x"].to_numpy(dtype="float64")
+        self._order = np.argsort(x, kind="stable")
+        self._x = x[self._order]
+        self._y = self.df["y"].to_numpy(dtype="float64")
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def lookup(self, stn_id: Union[str, Sequence[str]]) -> pd.DataFrame:
+        """Return the rows of the given station(s), in the order given; unknown ones are skipped.
+
+        A station listed more than once in the catalog has all its rows returned.
+        """
+        ids = [stn_id] if isinstance(stn_id, str) else [str(s) for s in stn_id]
+        if self._ids.is_unique:
+            positions = self._ids.get_indexer(ids)
+        else:
+            # every row of a repeated identifier, still in the order given
+            positions, _ = self._ids.get_indexer_non_unique(ids)
+        return self.df.iloc[positions[positions >= 0]].reset_index(drop=True)
+
+    def within(self, bbox: List[float]) -> pd.DataFrame:
+        """Return the stations inside `bbox` (left, bottom, right, top)."""
+        left, bottom, right, top = bbox
+        start = np.searchsorted(self._x, left, side="left")
+        stop = np.searchsorted(self._x, right, side="right")
+        candidates = self._order[start:stop]
+        y = self._y[candidates]
+        positions = np.sort(candidates[(y >= bottom) & (y <= top)])
+        return self.df.iloc[positions].reset_index(drop=True)
+
+    @staticmethod
+    def _download(
+        collection: str, station_key: str, client: HttpClient
+    ) -> pd.DataFrame:
+        frames = []
+        offset = 0
+        while True:
+            builder = UrlBuilder(collection)
+            builder.offset = str(offset)
+            payload = client.get(builder.build())
+            if not payload.strip():
+                break
+            df = pd.read_csv(BytesIO(payload), dtype={station_key: str})
+            if df.empty:
+                break
+            frames.append(df)
+            if len(df) < UrlBuilder.MAX_LIMIT:
+                break
+            offset += UrlBuilder.MAX_LIMIT
+        if not frames:
+            raise ValueError(f"No stations found in {collection}")
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def load(
+        cls,
+        collection: str,
+        station_key: str,
+        client: Optional[HttpClient] = None,
+        refresh: bool = False,
+        max_age: Optional[float] = None,
+    ) -> "StationCatalog":
+        """Return the catalog of `collection`, downloading it once per process.
+
+        The catalog is downloaded again when `refresh` is True or when it is older than
+        `max_age` seconds (one day by default). With a `ResponseCache` on `client`, the
+        download itself is also cached on disk.
+        """
+        key = UrlBuilder(collection).url
+        max_age = cls.MAX_AGE if max_age is None else max_age
+        with cls._lock:
+            loaded = cls._loaded.get(key)
+            if loaded is not None and not refresh and time.time() - loaded[0] < max_age:
+                return loaded[1]
+        df = cls._download(collection, station_key, client or HttpClient())
+        catalog = cls(df, station_key)
+        with cls._lock:
+            cls._loaded[key] = (time.time(), catalog)
+        return catalog
+
+    @classmethod
+    def clear(cls) -> None:
+        """Forget every catalog loaded in this process."""
+        with cls._lock:
+            cls._loaded.clear()
@@ -0,0 +1,54 @@
+"""Pages of interrupted downloads kept on disk so that a rerun resumes where it stopped."""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator, Union
+
+from .files import atomic_write
+
+
+class PageCheckpoint:
+    """The raw pages downloaded so far for each URL, one directory per URL.
+
+    Pages are written as they arrive. When a download is run again, the pages already on
+    disk are read back and the download continues at the next offset. The pages of a URL
+    are discarded once its download has completed.
+
+    Attributes
+    ----------
+    root : Path
+        The directory holding the checkpoints.
+    """
+
+    def __init__(self, root: Union[str, os.PathLike]):
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, url: str) -> Path:
+        return self.root / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def pages(self, url: str, offset: int, page_size: int) -> Iterator[bytes]:
+        """Yield the pages of `url` held on disk, from `offset` until the first missing one."""
+        directory = self._dir(url)
+        while True:
+            path = directory / f"{offset}.csv"
+            if not path.is_file():
+                return
+            yield path.read_bytes()
+            offset += page_size
+
+    def save(self, url: str, offset: int, payload: bytes) -> None:
+        directory = self._dir(url)
+        directory.mkdir(exist_ok=True)
+        with atomic_write(directory / f"{offset}.csv") as tmp_path:
+            tmp_path.write_bytes(payload)
+
+    def discard(self, url: str) -> None:
+        shutil.rmtree(self._dir(url), ignore_errors=True)
+
+    def clear(self) -> None:
+        for directory in self.root.iterdir():
+            if directory.is_dir():
+                shutil.rmtree(directory, ignore_errors=True)
@@ -1,28 +1,98 @@
+import asyncio
+import time
+import warnings
 from abc import ABC, abstractmethod
-from io import StringIO
-from typing import Dict, List, Union
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import closing, nullcontext
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import islice
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
-from urllib.request import urlopen
 
 import pandas as pd
 from pandas.errors import EmptyDataError
 
+from .checkpoint import PageCheckpoint
 from .data_types import HydrometricStationsDataTypes, WeatherStationsDataTypes
+from .http import HttpClient
+from .parsers import read_csv_bytes, resolve_parser
+from .stats import FetchStats, RequestRecord, collection_of
+from .store import concat_frames
 
 # this script is used to handle the csv files that are downloaded from the weather api
 
 
+class StationFetchError(RuntimeError):
+    """Raised once every station has been attempted and at least one of them failed.
+
+    `failures` maps each failing station to the exception it raised.
+    """
+
+    def __init__(self, failures: Dict[str, BaseException]):
+        self.failures = failures
+        details = "; ".join(f"{stn}: {exc!r}" for stn, exc in failures.items())
+        super().__init__(f"Failed to retrieve {len(failures)} station(s): {details}")
+
+
+class StationFailure(NamedTuple):
+    """A station that could not be retrieved, as returned by `to_dict_frame(partial=True)`."""
+
+    station: str
+    url: str
+    error: BaseException
+
+
+class Page(NamedTuple):
+    """The raw CSV of one page; `latency` is None for a page read from a checkpoint."""
+
+    url: str
+    offset: int
+    payload: bytes
+    latency: Optional[float]
+
+
 class DataFrameHandler(ABC):
     MAX_PAGE_SIZE = 10000
+    station_key: str
+    checkpoint: Optional[PageCheckpoint] = None
+    stats: Optional[FetchStats] = None
+    keep_station_key: bool = True
+    shard: bool = False
 
     @abstractmethod
     def to_df(self, path: str):
         pass
 
     @abstractmethod
-    def to_dict_frame(self) -> Dict[str, pd.DataFrame]:
+    def to_dict_frame(
+        self, failures: Optional[List[StationFailure]] = None
+    ) -> Dict[str, pd.DataFrame]:
         pass
 
+    @abstractmethod
+    def _read_kwargs(self) -> dict:
+        """Keyword arguments for `pd.read_csv` when parsing a page."""
+
+    @abstractmethod
+    def _index_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Set the date index on a frame parsed by `_read_csv_paginated`."""
+
+    def _no_data(self, path: str) -> None:
+        """Report a path without data, once its date windows have all been retrieved."""
+        return None
+
     def get_station_from_path(self, path: str, station_key: str) -> Union[str, None]:
         """This method is used to get station from the URL"""
         parsed_url = urlparse(path)
@@ -30,6 +100,212 @@ class DataFrameHandler(ABC):
         station = query_params.get(station_key, [None])[0]
         return station
 
+    def _collect(
+        self, frames: List[Optional[pd.DataFrame]]
+    ) -> Dict[str, pd.DataFrame]:
+        """Key the frames fetched for `self.paths` by station, skipping empty ones."""
+        dict_frame = {}
+        for path, df in zip(self.paths, frames):
+            if df is None:
+                continue
+            for stn_id, station_df in self._by_station(path, df):
+                dict_frame[stn_id] = station_df
+        return dict_frame
+
+    def _by_station(
+        self, path: str, df: pd.DataFrame
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield the frame of each station held in `df`, the data downloaded from `path`.
+
+        A per-station path holds a single station. A bbox query against the data collection
+        holds every station in the box, which is split with a single groupby. The station
+        column is then dropped unless `keep_station_key`, as per-station paths may not
+        request it.
+        """
+        stn_id = self.get_station_from_path(path=path, station_key=self.station_key)
+        if stn_id is not None:
+            yield str(stn_id), df
+            return
+        if self.station_key not in df.columns:
+            raise ValueError(f"Could not determine station name from {path}")
+        for stn_id, station_df in df.groupby(self.station_key, sort=False, observed=True):
+            if not self.keep_station_key:
+                station_df = station_df.drop(columns=self.station_key)
+            yield str(stn_id), station_df
+
+    def _failure_key(self, path: str) -> str:
+        stn_id = self.get_station_from_path(path=path, station_key=self.station_key)
+        return str(stn_id) if stn_id is not None else path
+
+    def _discard_checkpoints(self, paths: List[str]) -> None:
+        """Forget the saved pages of `paths` once they have all been retrieved."""
+        if self.checkpoint is not None:
+            for path in paths:
+                self.checkpoint.discard(path)
+
+    def _step(self) -> timedelta:
+        """The time between two records of a station."""
+        return timedelta(days=1)
+
+    def _windows(self, path: str) -> List[str]:
+        """Split the `datetime` range of a station path into windows of one page each.
+
+        Each window spans `page_size - 1` records of the station: a page with fewer rows
+        than `page_size` is known to be the last one, so a window is retrieved in a single
+        request. Windows are consecutive and do not overlap: the `datetime` bounds are
+        inclusive, so a window ends one second (or one day for date-only bounds) before
+        the next one starts. Paths without a station, a closed `datetime` range or starting
+        at a non-zero offset are not split.
+        """
+        query_params = parse_qs(urlparse(path).query, keep_blank_values=True)
+        page_size, offset = self._page_bounds(path)
+        if (
+            not self.shard
+            or offset
+            or self.station_key not in query_params
+            or "datetime" not in query_params
+            or query_params["datetime"][0].endswith("/..")
+        ):
+            return [path]
+        start, end = query_params["datetime"][0].split("/")
+        fmt, resolution = "%Y-%m-%d %H:%M:%S", timedelta(seconds=1)
+        if " " not in start:
+            fmt, resolution = "%Y-%m-%d", timedelta(days=1)
+        start, end = datetime.strptime(start, fmt), datetime.strptime(end, fmt)
+        span = self._step() * max(page_size - 1, 1)
+        windows = []
+        while start <= end:
+            window_end = min(start + span - resolution, end)
+            query_params["datetime"] = [f"{start:{fmt}}/{window_end:{fmt}}"]
+            query = urlencode(query_params, doseq=True)
+            windows.append(urlunparse(urlparse(path)._replace(query=query)))
+            start = window_end + resolution
+        return windows
+
+    @staticmethod
+    def _join(frames: List[Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """Join the frames of the date windows of a path, in date order."""
+        frames = [df for df in frames if df is not None]
+        if len(frames) > 1:
+            return concat_frames(frames)
+        return frames[0] if frames else None
+
+    def _iter_completed(
+        self,
+        fetch: Callable[[str], Optional[pd.DataFrame]],
+        failures: Optional[List[StationFailure]] = None,
+    ) -> Iterator[Tuple[int, Optional[pd.DataFrame]]]:
+        """Run `fetch` over `self.paths` with at most `max_workers` requests in flight.
+
+        With `shard`, each path is split into date windows (see `_windows`) that are
+        fetched concurrently with those of every other path, and joined in date order
+        once they have all arrived. Yields `(index in self.paths, result)` as each path
+        completes. No more than `2 * max_workers` requests are queued ahead, and nothing
+        refers to a result once it has been yielded, so only the stations in progress are
+        held in memory. A failing station does not cancel the others; the failures are raised
+        together once every station has finished, or appended to `failures` if it is given.
+        """
+        failed: List[StationFailure] = []
+        windows = [self._windows(path) for path in self.paths]
+        tasks = [
+            (i, j, url) for i, urls in enumerate(windows) for j, url in enumerate(urls)
+        ]
+        results: Dict[int, List[Optional[pd.DataFrame]]] = {
+            i: [None] * len(urls) for i, urls in enumerate(windows)
+        }
+        remaining = {i: len(urls) for i, urls in enumerate(windows)}
+        errors: Dict[int, BaseException] = {}
+
+        def complete(i: int, j: int, outcome: Callable[[], Optional[pd.DataFrame]]):
+            # returns `(i, result)` once the last window of path `i` is in, else None
+            try:
+                results[i][j] = outcome()
+            except Exception as exc:
+                errors.setdefault(i, exc)
+            remaining[i] -= 1
+            if remaining[i]:
+                return None
+            if i in errors:
+                failed.append(
+                    StationFailure(
+                        self._failure_key(self.paths[i]), self.paths[i], errors[i]
+                    )
+                )
+                return None
+            df = self._join(results.pop(i))
+            if df is None:
+                self._no_data(self.paths[i])
+            return i, df
+
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            for i, j, url in tasks:
+                done = complete(i, j, partial(fetch, url))
+                if done is not None:
+                    yield done
+        else:
+            workers = min(self.max_workers, len(tasks))
+            queued = iter(tasks)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures: Dict[Future, Tuple[int, int]] = {}
+
+                def submit(n: int) -> None:
+                    for i, j, url in islice(queued, n):
+                        futures[executor.submit(fetch, url)] = (i, j)
+
+                submit(2 * workers)
+                while futures:
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    while finished:
+                        future = finished.pop()
+                        done = complete(*futures.pop(future), future.result)
+                        del future
+                        submit(1)
+                        if done is not None:
+                            yield done
+                            del done
+
+        if not failed:
+            self._discard_checkpoints([url for _, _, url in tasks])
+        if failures is not None:
+            failures.extend(failed)
+        elif failed:
+            errors = {f.station: f.error for f in failed}
+            raise StationFetchError(errors) from failed[0].error
+
+    def _fetch_all(
+        self,
+        fetch: Callable[[str], Optional[pd.DataFrame]],
+        failures: Optional[List[StationFailure]] = None,
+    ) -> List[Optional[pd.DataFrame]]:
+        """Like `_iter_completed`, but return the results in the order of `self.paths`."""
+        results: List[Optional[pd.DataFrame]] = [None] * len(self.paths)
+        for i, result in self._iter_completed(fetch, failures):
+            results[i] = result
+        return results
+
+    def _to_df_or_none(self, path: str) -> Union[pd.DataFrame, None]:
+        """Like `to_df`, but None for a path without data, which is not reported."""
+        with self._stage("to_df"):
+            try:
+                df = self._read_csv_paginated(path, **self._read_kwargs())
+            except EmptyDataError:
+                return None
+            return self._index_frame(df)
+
+    def iter_stations(
+        self, failures: Optional[List[StationFailure]] = None
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield `(station, dataframe)` for each station with data, as soon as it is downloaded.
+
+        Up to `max_workers` stations are downloaded in parallel, so stations come out in the
+        order they complete rather than the order of `self.paths`. Failures are handled as in
+        `_iter_completed`.
+        """
+        for i, df in self._iter_completed(self._to_df_or_none, failures):
+            if df is None:
+                continue
+            yield from self._by_station(self.paths[i], df)
+
     def _page_url(self, path: str, offset: int, limit: int) -> str:
         parsed_url = urlparse(path)
         query_params = parse_qs(parsed_url.query, keep_blank_values=True)
@@ -39,7 +315,7 @@ class DataFrameHandler(ABC):
         paged_query = urlencode(query_params, doseq=True)
         return urlunparse(parsed_url._replace(query=paged_query))
 
-    def _read_csv_paginated(self, path: str, **kwargs) -> pd.DataFrame:
+    def _page_bounds(self, path: str) -> Tuple[int, int]:
         parsed_url = urlparse(path)
         query_params = parse_qs(parsed_url.query)
         requested_limit = int(query_params.get("limit", [self.MAX_PAGE_SIZE])[0])
@@ -50,103 +326,373 @@ class DataFrameHandler(ABC):
                 query_params.get("startindex", [0]),
             )[0]
         )
+        return page_size, start_offset
 
-        frames = []
-        offset = start_offset
-        while True:
-            paged_url = self._page_url(path=path, offset=offset, limit=page_size)
-            with urlopen(paged_url) as response:
-                payload = response.read().decode("utf-8")
-            try:
-                df = pd.read_csv(StringIO(payload), **kwargs)
-            except EmptyDataError:
-                break
-            if df.empty:
-                break
-            frames.append(df)
-            if len(df) < page_size:
-                break
+    def _stage(self, name: str):
+        """Time a stage in `stats`, if any."""
+        return self.stats.stage(name) if self.stats is not None else nullcontext()
+
+    def _download(self, url: str, offset: int) -> Page:
+        start = time.perf_counter()
+        payload = self.client.get(url)
+        return Page(url, offset, payload, time.perf_counter() - start)
+
+    @staticmethod
+    def _is_full_page(payload: bytes, page_size: int) -> bool:
+        # a header line plus `page_size` rows; cheap enough to decide before parsing
+        return payload.rstrip(b"\n").count(b"\n") >= page_size
+
+    def _iter_payloads(self, path: str) -> Iterator[Page]:
+        """Yield each page of `path`, in offset order.
+
+        With a `checkpoint`, the pages saved by an earlier, interrupted run are yielded
+        first and each new page is saved before it is yielded.
+        """
+        page_size, offset = self._page_bounds(path)
+        if self.checkpoint is not None:
+            for payload in self.checkpoint.pages(path, offset, page_size):
+                yield Page(path, offset, payload, None)
+                offset += page_size
+        for page in self._download_pages(path, offset, page_size):
+            if self.checkpoint is not None:
+                self.checkpoint.save(path, page.offset, page.payload)
+            yield page
+
+    def _download_pages(
+        self, path: str, offset: int, page_size: int
+    ) -> Iterator[Page]:
+        """Download the pages of `path` from `offset` on, in offset order.
+
+        With `prefetch` > 0, up to that many of the following pages are downloaded in the
+        background while the caller parses the current one. Prefetching only starts once a
+        full page has been seen, so single-page series never cost an extra request.
+        """
+        if self.prefetch <= 0:
+            while True:
+                url = self._page_url(path=path, offset=offset, limit=page_size)
+                yield self._download(url, offset)
+                offset += page_size
+
+        executor = ThreadPoolExecutor(max_workers=self.prefetch)
+        in_flight: Deque[Future] = deque()
+        try:
+            while True:
+                if not in_flight:
+                    url = self._page_url(path=path, offset=offset, limit=page_size)
+                    in_flight.append(executor.submit(self._download, url, offset))
+                    offset += page_size
+                page = in_flight.popleft().result()
+                if self._is_full_page(page.payload, page_size):
+                    while len(in_flight) < self.prefetch:
+                        url = self._page_url(path=path, offset=offset, limit=page_size)
+                        in_flight.append(executor.submit(self._download, url, offset))
+                        offset += page_size
+                yield page
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _parse_page(self, payload: bytes, **kwargs) -> Union[pd.DataFrame, None]:
+        """Parse one page of CSV, returning None once the series is exhausted."""
+        if not payload.strip():
+            return None
+        df = read_csv_bytes(payload, parser=self.parser, **kwargs)
+        if df.empty:
+            return None
+        return df
+
+    def _record(self, path: str, page: Page, rows: int, parse_time: float) -> None:
+        if self.stats is None or page.latency is None:
+            return
+        record = RequestRecord(
+            url=page.url,
+            collection=collection_of(page.url),
+            station=self.get_station_from_path(path=path, station_key=self.station_key),
+            offset=page.offset,
+            bytes=len(page.payload),
+            rows=rows,
+            latency=page.latency,
+            parse_time=parse_time,
+        )
+        self.stats.record_request(record)
+
+    def _iter_pages(self, path: str, **kwargs) -> Iterator[pd.DataFrame]:
+        page_size, _ = self._page_bounds(path)
+        with closing(self._iter_payloads(path)) as pages:
+            for page in pages:
+                start = time.perf_counter()
+                df = self._parse_page(page.payload, **kwargs)
+                rows = 0 if df is None else len(df)
+                self._record(path, page, rows, time.perf_counter() - start)
+                if df is None:
+                    return
+                yield df
+                if len(df) < page_size:
+                    return
+
+    def _read_csv_paginated(self, path: str, **kwargs) -> pd.DataFrame:
+        with self._stage("read_csv_paginated"):
+            frames = list(self._iter_pages(path, **kwargs))
+            if not frames:
+                raise EmptyDataError(f"No columns to parse from {path}")
+            return pd.concat(frames, ignore_index=True)
+
+    def iter_frames(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield `(station, dataframe)` for each page of each station as it is downloaded.
+
+        Each page is parsed and indexed like `to_df`, but pages are never concatenated, so
+        only the current page (and the prefetched ones) is held in memory.
+        """
+        for path in self.paths:
+            for df in self._iter_pages(path, **self._read_kwargs()):
+                yield from self._by_station(path, self._index_frame(df))
+            self._discard_checkpoints([path])
+
+    async def _adownload(
+        self, session, semaphore: asyncio.Semaphore, url: str, offset: int
+    ) -> Page:
+        async with semaphore:
+            start = time.perf_counter()
+            payload = await self.client.aget(session, url)
+            return Page(url, offset, payload, time.perf_counter() - start)
+
+    async def _aread_csv_paginated(
+        self, session, semaphore: asyncio.Semaphore, path: str, **kwargs
+    ) -> pd.DataFrame:
+        """Asynchronous counterpart of `_read_csv_paginated` using an aiohttp session.
+
+        Pages go through `client.aget`, so retries and the cache apply, and are prefetched
+        the same way as `_download_pages`. Pages saved in `checkpoint` are read first and
+        new ones are saved, as in `_iter_payloads`. The checkpoint files and pandas are
+        handled in the default executor so the event loop is never blocked.
+        """
+        loop = asyncio.get_running_loop()
+        page_size, offset = self._page_bounds(path)
+        saved: Deque[Page] = deque()
+        if self.checkpoint is not None:
+            payloads = await loop.run_in_executor(
+                None, list, self.checkpoint.pages(path, offset, page_size)
+            )
+            for payload in payloads:
+                saved.append(Page(path, offset, payload, None))
+                offset += page_size
+
+        def schedule() -> None:
+            nonlocal offset
+            url = self._page_url(path=path, offset=offset, limit=page_size)
+            in_flight.append(
+                asyncio.ensure_future(self._adownload(session, semaphore, url, offset))
+            )
             offset += page_size
 
+        in_flight: Deque[asyncio.Future] = deque()
+        frames = []
+        try:
+            while True:
+                if saved:
+                    page = saved.popleft()
+                else:
+                    if not in_flight:
+                        schedule()
+                    page = await in_flight.popleft()
+                    if self.checkpoint is not None:
+                        await loop.run_in_executor(
+                            None, self.checkpoint.save, path, page.offset, page.payload
+                        )
+                    if self._is_full_page(page.payload, page_size):
+                        while len(in_flight) < self.prefetch:
+                            schedule()
+                start = time.perf_counter()
+                df = await loop.run_in_executor(
+                    None, partial(self._parse_page, page.payload, **kwargs)
+                )
+                rows = 0 if df is None else len(df)
+                self._record(path, page, rows, time.perf_counter() - start)
+                if df is None:
+                    break
+                frames.append(df)
+                if len(df) < page_size:
+                    break
+        finally:
+            for task in in_flight:
+                task.cancel()
+
         if not frames:
             raise EmptyDataError(f"No columns to parse from {path}")
         return pd.concat(frames, ignore_index=True)
 
+    async def _ato_df_or_none(
+        self, session, semaphore: asyncio.Semaphore, path: str
+    ) -> Union[pd.DataFrame, None]:
+        try:
+            df = await self._aread_csv_paginated(
+                session, semaphore, path, **self._read_kwargs()
+            )
+        except EmptyDataError:
+            return None
+        return self._index_frame(df)
+
+    async def ato_dict_frame(
+        self,
+        session,
+        semaphore: asyncio.Semaphore,
+        failures: Optional[List[StationFailure]] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Asynchronous counterpart of `to_dict_frame`.
+
+        Every station, and with `shard` every date window of a station (see `_windows`),
+        is scheduled at once on the event loop; `semaphore` bounds the number of requests
+        in flight. The windows of a station are joined in date order. Failures are handled
+        as in `_iter_completed`.
+        """
+        windows = [self._windows(path) for path in self.paths]
+        results = iter(
+            await asyncio.gather(
+                *(
+                    self._ato_df_or_none(session, semaphore, url)
+                    for urls in windows
+                    for url in urls
+                ),
+                return_exceptions=True,
+            )
+        )
+        frames: List[Optional[pd.DataFrame]] = []
+        failed: List[StationFailure] = []
+        for path, urls in zip(self.paths, windows):
+            parts = [next(results) for _ in urls]
+            errors = [part for part in parts if isinstance(part, BaseException)]
+            if errors:
+                failed.append(StationFailure(self._failure_key(path), path, errors[0]))
+                frames.append(None)
+            else:
+                frames.append(self._join(parts))
+                if frames[-1] is None:
+                    self._no_data(path)
+
+        if not failed:
+            self._discard_checkpoints([url for urls in windows for url in urls])
+        if failures is not None:
+            failures.extend(failed)
+        elif failed:
+            errors = {f.station: f.error for f in failed}
+            raise StationFetchError(errors) from failed[0].error
+        return self._collect(frames)
+
 
 class WeatherStationsDataframe(DataFrameHandler):
     """Class to read the weather station data from the Government of Canada's historical weather data API."""
 
-    def __init__(self, paths: List[str], hourly: bool = False):
+    station_key = "CLIMATE_IDENTIFIER"
+
+    def __init__(
+        self,
+        paths: List[str],
+        hourly: bool = False,
+        max_workers: int = 1,
+        prefetch: int = 0,
+        client: Optional[HttpClient] = None,
+        parser: str = "auto",
+        checkpoint: Optional[PageCheckpoint] = None,
+        stats: Optional[FetchStats] = None,
+        keep_station_key: bool = True,
+        shard: bool = False,
+    ):
         self.paths = paths
         self.hourly = hourly
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+        self.client = client or HttpClient()
+        self.parser = resolve_parser(parser)
+        self.checkpoint = checkpoint
+        self.keep_station_key = keep_station_key
+        self.shard = shard
+        self.stats = stats
 
-    def to_df(self, path: str) -> pd.DataFrame:
+    def _step(self) -> timedelta:
+        return timedelta(hours=1) if self.hourly else timedelta(days=1)
+
+    def _read_kwargs(self) -> dict:
         if self.hourly:
             dtypes = WeatherStationsDataTypes.dtypes_hourly
         else:
             dtypes = WeatherStationsDataTypes.dtypes_daily
-        df = self._read_csv_paginated(
-            path,
-            dtype=dtypes,
-            parse_dates=["LOCAL_DATE"],
-        )
+        return {"dtype": dtypes, "parse_dates": ["LOCAL_DATE"]}
+
+    def _index_frame(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.set_index("LOCAL_DATE")
         # Ensure the index is timezone-naive for xarray
         df.index = df.index.tz_localize(None)
         return df
 
-    def to_dict_frame(self) -> Dict[str, pd.DataFrame]:
-        dict_frame = {}
-        for path in self.paths:
-            try:
-                df = self.to_df(path)
-            except EmptyDataError:
-                continue
-            stn_id = self.get_station_from_path(
-                path=path,
-                station_key="CLIMATE_IDENTIFIER",
-            )
-            if stn_id is None:
-                raise ValueError(f"Could not determine station name from {path}")
-            dict_frame[str(stn_id)] = df
-        return dict_frame
+    def to_df(self, path: str) -> pd.DataFrame:
+        with self._stage("to_df"):
+            df = self._read_csv_paginated(path, **self._read_kwargs())
+            return self._index_frame(df)
+
+    def to_dict_frame(
+        self, failures: Optional[List[StationFailure]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        return self._collect(self._fetch_all(self._to_df_or_none, failures))
 
 
 class HydrometricStationsDataframe(DataFrameHandler):
     """Class to read the hydrometric data from the Government of Canada's historical weather data API."""
 
-    def __init__(self, paths: List[str], realtime: bool = False):
+    station_key = "STATION_NUMBER"
+
+    def __init__(
+        self,
+        paths: List[str],
+        realtime: bool = False,
+        max_workers: int = 1,
+        prefetch: int = 0,
+        client: Optional[HttpClient] = None,
+        parser: str = "auto",
+        checkpoint: Optional[PageCheckpoint] = None,
+        stats: Optional[FetchStats] = None,
+        keep_station_key: bool = True,
+        shard: bool = False,
+    ):
         self.paths = paths
         self.realtime = realtime
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+        self.client = client or HttpClient()
+        self.parser = resolve_parser(parser)
+        self.checkpoint = checkpoint
+        self.keep_station_key = keep_station_key
+        self.shard = shard
+        self.stats = stats
 
-    def to_df(self, path: str) -> Union[pd.DataFrame, None]:
-        date_column = "DATETIME" if self.realtime else "DATE"
-        try:
-            df = self._read_csv_paginated(
-                path,
-                dtype=HydrometricStationsDataTypes.dtypes,
-                parse_dates=[date_column],
-            )
-        except EmptyDataError:
-            print(f"No data found for {path}")
-            return None
-        df = df.set_index(date_column)
+    @property
+    def date_column(self) -> str:
+        return "DATETIME" if self.realtime else "DATE"
+
+    def _read_kwargs(self) -> dict:
+        return {
+            "dtype": HydrometricStationsDataTypes.dtypes,
+            "parse_dates": [self.date_column],
+        }
+
+    def _index_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.set_index(self.date_column)
         df.index.rename("DATE", inplace=True)
         # Ensure the index is timezone-naive for xarray
         df.index = df.index.tz_localize(None)
         return df
 
-    def to_dict_frame(self) -> Dict[str, pd.DataFrame]:
-        dict_frame = {}
-        for path in self.paths:
-            df = self.to_df(path)
-            if df is None:
-                continue
-            stn_id = self.get_station_from_path(
-                path=path,
-                station_key="STATION_NUMBER",
-            )
-            if stn_id is None:
-                raise ValueError(f"Could not determine station name from {path}")
-            dict_frame[str(stn_id)] = df
-        return dict_frame
+    def _no_data(self, path: str) -> None:
+        warnings.warn(f"No data found for {path}")
+        return None
+
+    def to_df(self, path: str) -> Union[pd.DataFrame, None]:
+        df = self._to_df_or_none(path)
+        if df is None:
+            return self._no_data(path)
+        return df
+
+    def to_dict_frame(
+        self, failures: Optional[List[StationFailure]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        return self._collect(self._fetch_all(self._to_df_or_none, failures))
@@ -0,0 +1,23 @@
+"""Writing the files of the package so that an interrupted write is never read back."""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+
+@contextmanager
+def atomic_write(path: Union[str, Path]) -> Iterator[Path]:
+    """Yield a temporary path to write to, which replaces `path` once the block succeeds.
+
+    The temporary file sits next to `path` under a hidden name, so that neither an
+    interrupted run nor a reader listing the directory (such as a Parquet dataset) ever
+    finds a partial file. It is removed if the block fails.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,188 @@
+"""The single entry point through which the package talks to the GeoMet API."""
+
+import asyncio
+import http.client
+import random
+import time
+from email.message import Message
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.error import HTTPError
+
+from .cache import CachedResponse, ResponseCache
+from .imports import import_optional
+from .transport import Response, Transport, get_default_transport
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class RetryPolicy:
+    """When to try a failed request again, and how long to wait before doing so.
+
+    Connection errors and the HTTP statuses in `statuses` are retried up to `retries` times.
+    The n-th retry waits a random time of up to `backoff * 2**n` seconds ("full jitter"),
+    capped at `max_backoff`, or the time given by a `Retry-After` header.
+
+    Attributes
+    ----------
+    retries : int
+        The number of retries after the first attempt; 0 disables retrying.
+    backoff : float
+        The base delay in seconds.
+    max_backoff : float
+        The longest delay in seconds.
+    statuses : tuple of int
+        The HTTP statuses worth retrying.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.25,
+        max_backoff: float = 30.0,
+        statuses: Tuple[int, ...] = (429, 500, 502, 503, 504),
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, HTTPError):
+            return exc.code in self.statuses
+        return isinstance(exc, (OSError, http.client.HTTPException))
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        """The seconds to wait before retry number `attempt` (from 0) after `exc`."""
+        if isinstance(exc, HTTPError) and exc.headers is not None:
+            retry_after = exc.headers.get("Retry-After")
+            if retry_after is not None and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+class HttpClient:
+    """Download responses through a `Transport`, going through an optional `ResponseCache`.
+
+    If `transport` is not specified, the shared default transport is used (see
+    `set_default_transport`). Failed requests are retried according to `retry`; pass
+    `RetryPolicy(retries=0)` to fail on the first error.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        transport: Optional[Transport] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.cache = cache
+        self._transport = transport
+        self.retry = retry or RetryPolicy()
+
+    @property
+    def transport(self) -> Transport:
+        return self._transport or get_default_transport()
+
+    def _request(self, url: str, headers: Dict[str, str]) -> Response:
+        attempt = 0
+        while True:
+            try:
+                return self._request_once(url, headers=headers)
+            except Exception as exc:
+                if attempt >= self.retry.retries or not self.retry.is_retryable(exc):
+                    raise
+                time.sleep(self.retry.delay(attempt, exc))
+                attempt += 1
+
+    def _request_once(self, url: str, headers: Dict[str, str]) -> Response:
+        return self._check(url, self.transport.get(url, headers=headers))
+
+    @staticmethod
+    def _check(url: str, response: Response) -> Response:
+        """Raise an `HTTPError` for an error status, as `urllib` would."""
+        if response.status >= 400:
+            hdrs = Message()
+            for key, value in response.headers.items():
+                hdrs[key] = value
+            raise HTTPError(url, response.status, response.reason, hdrs, None)
+        return response
+
+    @staticmethod
+    def _revalidation_headers(cached: Optional[CachedResponse]) -> Dict[str, str]:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def _update_cache(
+        self, url: str, cached: Optional[CachedResponse], response: Response
+    ) -> bytes:
+        if response.status == 304 and cached is not None:
+            self.cache.touch(url)
+            return cached.body
+        self.cache.set(
+            url,
+            response.body,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+        return response.body
+
+    def get(self, url: str) -> bytes:
+        if self.cache is None:
+            return self._request(url, headers={}).body
+
+        cached = self.cache.get(url)
+        if cached is not None and cached.fresh:
+            return cached.body
+        response = self._request(url, headers=self._revalidation_headers(cached))
+        return self._update_cache(url, cached, response)
+
+    async def _arequest(
+        self, session: "aiohttp.ClientSession", url: str, headers: Dict[str, str]
+    ) -> Response:
+        attempt = 0
+        while True:
+            try:
+                return await self._arequest_once(session, url, headers=headers)
+            except Exception as exc:
+                if attempt >= self.retry.retries or not self.retry.is_retryable(exc):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt, exc))
+                attempt += 1
+
+    async def _arequest_once(
+        self, session: "aiohttp.ClientSession", url: str, headers: Dict[str, str]
+    ) -> Response:
+        aiohttp = import_optional("aiohttp", "The asyncio API")
+        try:
+            async with session.get(url, headers=headers) as resp:
+                body = await resp.read()
+        except aiohttp.ClientError as exc:
+            # retried like the connection errors of the transport
+            raise ConnectionError(f"{url}: {exc!r}") from exc
+        response_headers = {key.lower(): value for key, value in resp.headers.items()}
+        response = Response(resp.status, resp.reason, response_headers, body)
+        return self._check(url, response)
+
+    async def aget(self, session: "aiohttp.ClientSession", url: str) -> bytes:
+        """Asynchronous counterpart of `get`, requesting through an aiohttp `session`.
+
+        Retries and the cache apply as in `get`; the request itself goes through
+        `session` instead of `transport`, so that it never blocks the event loop.
+        """
+        if self.cache is None:
+            return (await self._arequest(session, url, headers={})).body
+
+        cached = self.cache.get(url)
+        if cached is not None and cached.fresh:
+            return cached.body
+        headers = self._revalidation_headers(cached)
+        response = await self._arequest(session, url, headers=headers)
+        return self._update_cache(url, cached, response)
+
+    def get_text(self, url: str) -> str:
+        return self.get(url).decode("utf-8")
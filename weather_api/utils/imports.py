@@ -0,0 +1,16 @@
+"""Helpers for the optional dependencies that only some features need."""
+
+import importlib
+from types import ModuleType
+
+
+def import_optional(module: str, feature: str, package: str = None) -> ModuleType:
+    """Import `module`, raising an informative ImportError when it is not installed."""
+    try:
+        return importlib.import_module(module)
+    except ImportError as err:
+        package = package or module
+        raise ImportError(
+            f"{feature} requires the optional dependency '{package}'. "
+            + f"Install it with `pip install {package}`."
+        ) from err
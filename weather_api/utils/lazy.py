@@ -0,0 +1,127 @@
+"""Dask-backed datasets whose chunks are downloaded when they are computed."""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .imports import import_optional
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+Fetch = Callable[[str, datetime, datetime], Optional[pd.DataFrame]]
+
+
+def _load_window(
+    fetch: Fetch, stn_id: str, start: datetime, end: datetime, time: pd.DatetimeIndex
+) -> pd.DataFrame:
+    df = fetch(stn_id, start, end)
+    if df is None or df.empty:
+        return pd.DataFrame(index=time)
+    df = df[~df.index.duplicated(keep="last")]
+    return df.reindex(time)
+
+
+def _column(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full((1, len(df)), np.nan, dtype="float32")
+    values = pd.to_numeric(df[col], errors="coerce")
+    return values.to_numpy(dtype="float32", na_value=np.nan)[np.newaxis]
+
+
+class LazyStationDataset:
+    """Build a (station, time) dataset of dask arrays, one chunk per station and window.
+
+    Each chunk downloads the data of one station over one window of `time` when it is
+    computed, and is shared by every variable. Selecting stations or dates before computing
+    leaves out the chunks, and so the requests, that are not needed. Windows outside the
+    period of a station are filled with NaN without any request.
+
+    Attributes
+    ----------
+    fetch : callable
+        Called as `fetch(stn_id, start, end)` to download one window of a station; returns
+        a dataframe indexed by date, or None without data.
+    periods : dict
+        The (start, end) period to request for each station, in order.
+    time : pd.DatetimeIndex
+        The time axis shared by all stations.
+    variables : list of str
+        The numeric variables of the dataset.
+    station_dim : str
+        The name of the station dimension.
+    time_chunk : int
+        The number of time steps per chunk, and so per request window.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        periods: Dict[str, Tuple[datetime, datetime]],
+        time: pd.DatetimeIndex,
+        variables: List[str],
+        station_dim: str,
+        time_chunk: int = 8760,
+    ):
+        self.fetch = fetch
+        self.periods = periods
+        self.time = time
+        self.variables = variables
+        self.station_dim = station_dim
+        self.time_chunk = time_chunk
+
+    def _windows(self) -> List[Tuple[int, int]]:
+        return [
+            (start, min(start + self.time_chunk, len(self.time)))
+            for start in range(0, len(self.time), self.time_chunk)
+        ]
+
+    def _blocks(self, stn_id: str, start: int, stop: int) -> Dict[str, object]:
+        """The dask array of each variable over one window of one station."""
+        dask = import_optional("dask", "to_xr(lazy=True)")
+        da = import_optional("dask.array", "to_xr(lazy=True)", package="dask")
+        time = self.time[start:stop]
+        first, last = self.periods[stn_id]
+        window_start = max(time[0].to_pydatetime(), first)
+        window_end = min(time[-1].to_pydatetime(), last)
+        shape = (1, len(time))
+        if window_start > window_end:
+            return {
+                col: da.full(shape, np.nan, dtype="float32") for col in self.variables
+            }
+        name = f"fetch-{self.station_dim}-{stn_id}-{start}"
+        df = dask.delayed(_load_window, pure=True, name=name)(
+            self.fetch, stn_id, window_start, window_end, time
+        )
+        return {
+            col: da.from_delayed(
+                dask.delayed(_column, pure=True)(df, col), shape=shape, dtype="float32"
+            )
+            for col in self.variables
+        }
+
+    def build(self, coords: Optional[dict] = None) -> "xr.Dataset":
+        """Return the lazy dataset, with the station coordinates `coords`."""
+        import xarray as xr
+
+        da = import_optional("dask.array", "to_xr(lazy=True)", package="dask")
+        windows = self._windows()
+        blocks = [
+            [self._blocks(stn_id, start, stop) for start, stop in windows]
+            for stn_id in self.periods
+        ]
+        data_vars = {
+            col: (
+                (self.station_dim, "time"),
+                da.block([[window[col] for window in row] for row in blocks]),
+            )
+            for col in self.variables
+        }
+        coords = {
+            "time": self.time.to_numpy(),
+            self.station_dim: np.asarray(list(self.periods)),
+            **(coords or {}),
+        }
+        return xr.Dataset(data_vars, coords=coords)
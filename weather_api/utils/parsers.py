@@ -0,0 +1,68 @@
+"""Parsers turning the raw CSV bytes of a page into a dataframe."""
+
+import importlib.util
+from io import BytesIO
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .imports import import_optional
+
+PARSERS = ("auto", "pyarrow", "c")
+
+
+def resolve_parser(parser: str) -> str:
+    """Return the parser to use, picking pyarrow for "auto" when it is installed."""
+    if parser not in PARSERS:
+        raise ValueError(f"{parser} is not a valid parser. Valid parsers are: {PARSERS}")
+    if parser == "auto":
+        return "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+    return parser
+
+
+def _arrow_type(pa, dtype: str):
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype == "str":
+        return pa.string()
+    return pa.from_numpy_dtype(dtype)
+
+
+def _read_csv_arrow(
+    payload: bytes, dtype: Dict[str, str], parse_dates: List[str]
+) -> pd.DataFrame:
+    pa = import_optional("pyarrow", "The pyarrow parser")
+    csv = import_optional("pyarrow.csv", "The pyarrow parser", package="pyarrow")
+    convert_options = csv.ConvertOptions(
+        # the schema is applied while parsing; categories come out as dictionary arrays
+        column_types={col: _arrow_type(pa, dt) for col, dt in dtype.items()},
+        strings_can_be_null=True,
+    )
+    table = csv.read_csv(BytesIO(payload), convert_options=convert_options)
+    df = table.to_pandas()
+    for col in parse_dates:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def read_csv_bytes(
+    payload: bytes,
+    parser: str = "c",
+    dtype: Optional[Dict[str, str]] = None,
+    parse_dates: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Parse a page of CSV straight from the bytes of the response.
+
+    Date columns are returned in nanoseconds whichever parser is used.
+    """
+    dtype = dtype or {}
+    parse_dates = parse_dates or []
+    if parser == "pyarrow":
+        df = _read_csv_arrow(payload, dtype=dtype, parse_dates=parse_dates)
+    else:
+        df = pd.read_csv(BytesIO(payload), dtype=dtype, parse_dates=parse_dates)
+    for col in parse_dates:
+        if col in df.columns and hasattr(df[col].dt, "as_unit"):
+            df[col] = df[col].dt.as_unit("ns")
+    return df
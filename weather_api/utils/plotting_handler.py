@@ -1,16 +1,73 @@
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional
 
-import folium
 import pandas as pd
-from folium.plugins import MarkerCluster
+
+if TYPE_CHECKING:
+    import folium
+
+
+# above this many stations, `plot_stations` uses `_fast_map` unless told otherwise
+FAST_THRESHOLD = 1000
+
+# builds each marker in the browser from a `[lat, lon, popup]` row of `_fast_map`
+_POPUP_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2]);
+    return marker;
+}
+"""
 
 
 class PlottingHandler(ABC):
     @abstractmethod
-    def plot_stations(self, meta: pd.DataFrame) -> folium.Map:
+    def plot_stations(
+        self, meta: pd.DataFrame, fast: Optional[bool] = None
+    ) -> "folium.Map":
         pass
 
 
+def _use_fast(meta: pd.DataFrame, fast: Optional[bool]) -> bool:
+    return len(meta) > FAST_THRESHOLD if fast is None else fast
+
+
+def _date_strs(dates: pd.Series) -> pd.Series:
+    """Vectorized `_date_str`, for a whole column of dates."""
+    dates = pd.to_datetime(dates, format="%Y-%m-%d %H:%M:%S")
+    return dates.dt.strftime("%Y-%m-%d").fillna("N/A")
+
+
+def _popup_html(title: pd.Series, *lines: pd.Series) -> pd.Series:
+    """The popup of each station, built from whole columns of text."""
+    html = '<div style="width: 200px; word-wrap: break-word;"><b>' + title + "</b><br>"
+    for line in lines:
+        html = html + line + "<br>"
+    return html + "</div>"
+
+
+def _fast_map(meta: pd.DataFrame, popups: pd.Series) -> "folium.Map":
+    """Map the stations as a single cluster whose markers are created in the browser.
+
+    Only the coordinates and popup of each station are written to the page, so maps of
+    the full catalog stay light enough to open.
+    """
+    import folium
+    from folium.plugins import FastMarkerCluster
+
+    m = folium.Map(location=[60.5, -100.5], zoom_start=4)
+    located = meta["x"].notna() & meta["y"].notna()
+    data = list(
+        zip(
+            meta.loc[located, "y"].tolist(),
+            meta.loc[located, "x"].tolist(),
+            popups[located].tolist(),
+        )
+    )
+    FastMarkerCluster(data, callback=_POPUP_CALLBACK).add_to(m)
+    return m
+
+
 def _date_str(input_date: pd.Series) -> str:
     """Converts a date to a string.
 
@@ -23,19 +80,37 @@ def _date_str(input_date: pd.Series) -> str:
 
 
 class WeatherStationsPlottingHandler(PlottingHandler):
-    def plot_stations(meta: pd.DataFrame) -> folium.Map:
+    def plot_stations(meta: pd.DataFrame, fast: Optional[bool] = None) -> "folium.Map":
         """Maps out the input meta data for weather stations.
 
-        Returns a folium map object with markers for each weather station.
+        Returns a folium map object with markers for each weather station. With `fast`
+        (the default above `FAST_THRESHOLD` stations), the markers are plain pins built
+        in the browser; see `_fast_map`.
         """
+        if _use_fast(meta, fast):
+            popups = _popup_html(
+                meta["STATION_NAME"].astype(str),
+                "Climate ID: " + meta["CLIMATE_IDENTIFIER"].astype(str),
+                "Date range: "
+                + _date_strs(meta["DLY_FIRST_DATE"])
+                + " to "
+                + _date_strs(meta["DLY_LAST_DATE"]),
+            )
+            return _fast_map(meta, popups)
+
+        import folium
+        from folium.plugins import MarkerCluster
+
         m = folium.Map(location=[60.5, -100.5], zoom_start=4)
         marker_cluster = MarkerCluster().add_to(m)
 
-        meta["DLY_FIRST_DATE"] = pd.to_datetime(
-            meta["DLY_FIRST_DATE"], format="%Y-%m-%d %H:%M:%S"
-        )
-        meta["DLY_LAST_DATE"] = pd.to_datetime(
-            meta["DLY_LAST_DATE"], format="%Y-%m-%d %H:%M:%S"
+        meta = meta.assign(
+            DLY_FIRST_DATE=pd.to_datetime(
+                meta["DLY_FIRST_DATE"], format="%Y-%m-%d %H:%M:%S"
+            ),
+            DLY_LAST_DATE=pd.to_datetime(
+                meta["DLY_LAST_DATE"], format="%Y-%m-%d %H:%M:%S"
+            ),
         )
 
         for _, row in meta.iterrows():
@@ -58,11 +133,24 @@ class WeatherStationsPlottingHandler(PlottingHandler):
 
 
 class HydrometricStationsPlottingHandler(PlottingHandler):
-    def plot_stations(meta: pd.DataFrame) -> folium.Map:
+    def plot_stations(meta: pd.DataFrame, fast: Optional[bool] = None) -> "folium.Map":
         """Maps out the input meta data for hydrometric stations.
 
-        Returns a folium map object with markers for each hydrometric station.
+        Returns a folium map object with markers for each hydrometric station. With `fast`
+        (the default above `FAST_THRESHOLD` stations), the markers are plain pins built
+        in the browser; see `_fast_map`.
         """
+        if _use_fast(meta, fast):
+            popups = _popup_html(
+                meta["STATION_NAME"].astype(str),
+                "Station number: " + meta["STATION_NUMBER"].astype(str),
+                "Status: " + meta["STATUS_EN"].astype(str),
+            )
+            return _fast_map(meta, popups)
+
+        import folium
+        from folium.plugins import MarkerCluster
+
         m = folium.Map(location=[60.5, -100.5], zoom_start=4)
         marker_cluster = MarkerCluster().add_to(m)
 
@@ -0,0 +1,99 @@
+"""Timings and sizes of the requests and processing stages of a download."""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+
+class RequestRecord(NamedTuple):
+    """One page request and the parsing of its response.
+
+    `latency` is the time from sending the request to having the whole (decompressed)
+    body, retries included; `parse_time` is the time spent parsing the page.
+    """
+
+    url: str
+    collection: Optional[str]
+    station: Optional[str]
+    offset: int
+    bytes: int
+    rows: int
+    latency: float
+    parse_time: float
+
+
+def collection_of(url: str) -> Optional[str]:
+    """The collection name in a `.../collections/<name>/items` URL."""
+    parts = urlparse(url).path.strip("/").split("/")
+    if "collections" in parts and parts.index("collections") + 1 < len(parts):
+        return parts[parts.index("collections") + 1]
+    return None
+
+
+class FetchStats:
+    """Collect a `RequestRecord` per page request and the time spent in each stage.
+
+    The stages are "read_csv_paginated", "to_df", "to_dict_frame" and "to_xr"; a stage
+    run inside another (e.g. "to_df" within "to_dict_frame") is counted in both. Records
+    are added from worker threads, so all access goes through a lock. Callbacks in
+    `on_request` are called with each `RequestRecord`, and callbacks in `on_stage` with
+    the name and duration in seconds of each stage, as they complete.
+
+    Attributes
+    ----------
+    requests : list of RequestRecord
+        Every page request made so far.
+    stages : dict
+        The durations in seconds of each run of each stage.
+    on_request : list of callable
+        Called with each `RequestRecord`.
+    on_stage : list of callable
+        Called as `callback(stage, seconds)` at the end of each stage.
+    """
+
+    def __init__(self):
+        self.requests: List[RequestRecord] = []
+        self.stages: Dict[str, List[float]] = {}
+        self.on_request: List[Callable[[RequestRecord], None]] = []
+        self.on_stage: List[Callable[[str, float], None]] = []
+        self._lock = threading.Lock()
+
+    def record_request(self, record: RequestRecord) -> None:
+        with self._lock:
+            self.requests.append(record)
+        for callback in self.on_request:
+            callback(record)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of the `with` block as a run of stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.stages.setdefault(name, []).append(seconds)
+            for callback in self.on_stage:
+                callback(name, seconds)
+
+    def totals(self) -> dict:
+        """The number of requests, bytes and rows, and the seconds spent per step and stage."""
+        with self._lock:
+            requests = list(self.requests)
+            stages = {name: sum(runs) for name, runs in self.stages.items()}
+        return {
+            "requests": len(requests),
+            "bytes": sum(r.bytes for r in requests),
+            "rows": sum(r.rows for r in requests),
+            "latency": sum(r.latency for r in requests),
+            "parse_time": sum(r.parse_time for r in requests),
+            "stages": stages,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.stages.clear()
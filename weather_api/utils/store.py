@@ -0,0 +1,72 @@
+"""Local copy of the series already downloaded for each station, used by `GeoMetAPI.sync`."""
+
+from pathlib import Path
+from typing import List, Optional, Union
+
+import pandas as pd
+
+from .files import atomic_write
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate date-indexed frames, keeping the last row of any repeated date.
+
+    Categorical columns stay categorical even when the frames have different categories.
+    """
+    categorical = {
+        col for df in frames for col in df.select_dtypes(include="category").columns
+    }
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    for col in categorical:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+class StationStore:
+    """Directory holding one pickled dataframe per station and collection.
+
+    Attributes
+    ----------
+    root : Union[str, Path]
+        The directory of the store. It is created if needed.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root).expanduser()
+
+    def _path(self, collection: str, stn_id: str) -> Path:
+        return self.root / collection / f"{stn_id}.pkl"
+
+    def stations(self, collection: str) -> List[str]:
+        return sorted(p.stem for p in (self.root / collection).glob("*.pkl"))
+
+    def load(self, collection: str, stn_id: str) -> Optional[pd.DataFrame]:
+        path = self._path(collection, stn_id)
+        if not path.exists():
+            return None
+        return pd.read_pickle(path)
+
+    def last_date(self, collection: str, stn_id: str) -> Optional[pd.Timestamp]:
+        """Return the last date held for a station, or None if nothing is held."""
+        df = self.load(collection, stn_id)
+        if df is None or df.empty:
+            return None
+        return df.index.max()
+
+    def save(self, collection: str, stn_id: str, df: pd.DataFrame) -> None:
+        path = self._path(collection, stn_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(path) as tmp_path:
+            df.to_pickle(tmp_path)
+
+    def append(
+        self, collection: str, stn_id: str, df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Merge `df` into the held series of a station and return the merged series."""
+        held = self.load(collection, stn_id)
+        if held is not None and not held.empty:
+            df = concat_frames([held, df])
+        self.save(collection, stn_id, df)
+        return df
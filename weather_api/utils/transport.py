@@ -0,0 +1,152 @@
+"""Transports perform the HTTP requests made through `HttpClient`."""
+
+import gzip
+import http.client
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+
+class Response(NamedTuple):
+    """An HTTP response; header names are lower case."""
+
+    status: int
+    reason: str
+    headers: Dict[str, str]
+    body: bytes
+
+
+class Transport(ABC):
+    @abstractmethod
+    def get(self, url: str, headers: Dict[str, str]) -> Response:  # pragma: no cover
+        """Send a GET request and return the (decompressed) response, whatever its status."""
+
+
+class PooledTransport(Transport):
+    """Transport keeping idle keep-alive connections open for reuse, per host.
+
+    Attributes
+    ----------
+    timeout : float
+        The socket timeout in seconds of each request.
+    pool_size : int
+        The maximum number of idle connections kept open per host.
+    compress : bool
+        If True, ask the server for gzip-compressed responses.
+    max_redirects : int
+        The maximum number of redirects followed for one request.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60.0,
+        pool_size: int = 16,
+        compress: bool = True,
+        max_redirects: int = 5,
+    ):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.compress = compress
+        self.max_redirects = max_redirects
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+
+    def _connect(self, key: Tuple[str, str]) -> http.client.HTTPConnection:
+        scheme, netloc = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _acquire(self, key: Tuple[str, str]) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection to the host if there is one, else a new connection."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key: Tuple[str, str], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _send(
+        self, url: str, headers: Dict[str, str]
+    ) -> Tuple[http.client.HTTPResponse, bytes]:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        conn, reused = self._acquire(key)
+        while True:
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if not reused:
+                    raise
+                # the server may have dropped the idle connection; retry once on a new one
+                conn, reused = self._connect(key), False
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return response, body
+
+    def get(self, url: str, headers: Dict[str, str]) -> Response:
+        headers = {"Connection": "keep-alive", **headers}
+        if self.compress:
+            headers.setdefault("Accept-Encoding", "gzip")
+        for _ in range(self.max_redirects + 1):
+            response, body = self._send(url, headers)
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            break
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        headers = {key.lower(): value for key, value in response.getheaders()}
+        return Response(response.status, response.reason, headers, body)
+
+
+_default_transport: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """Return the transport shared by every `HttpClient` that was not given one."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = PooledTransport()
+        return _default_transport
+
+
+def set_default_transport(transport: Optional[Transport]) -> None:
+    """Replace the shared transport, e.g. with a local stand-in in tests.
+
+    Passing None restores a new `PooledTransport` on next use.
+    """
+    global _default_transport
+    with _default_lock:
+        _default_transport = transport
@@ -6,10 +6,11 @@ from typing import Tuple
 class UrlBuilder:
     """Class to build the url for the Government of Canada's weather data API."""
 
+    BASE_URL = "https://api.weather.gc.ca"
     MAX_LIMIT = 10000
 
     def __init__(self, route: str):
-        self.url = f"https://api.weather.gc.ca/collections/{route}/items"
+        self.url = f"{self.BASE_URL}/collections/{route}/items"
         self.params = {
             "f": "csv",
             "limit": str(self.MAX_LIMIT),
@@ -35,6 +36,15 @@ class UrlBuilder:
         end_date_str = value[1].strftime("%Y-%m-%d")
         self.params["datetime"] = f"{start_date_str}/{end_date_str}"
 
+    @property
+    def date_since(self):
+        return self.params.get("datetime")
+
+    @date_since.setter
+    def date_since(self, value: datetime):
+        # an open-ended interval: everything from `value` (UTC) onwards
+        self.params["datetime"] = f"{value.strftime('%Y-%m-%dT%H:%M:%SZ')}/.."
+
     @property
     def sortby(self):
         return self.params.get("sortby")
@@ -1,19 +1,216 @@
+import math
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import List, Union
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 
+from .catalog import StationCatalog
+from .http import HttpClient
 from .url_builder import UrlBuilder
 
 
+BBOX_MODES = ("auto", "collection", "station")
+
+
 class UrlHandler(ABC):
+    collection: str
+    metadata_collection: str
+    station_key: str
+    station_properties: List[str]
+    catalog_columns: Dict[str, List[str]]
+    properties: Optional[List[str]]
+    start_date: datetime
+    end_date: datetime
+    bbox_mode: str
+    max_workers: int
+    shard: bool
+    periods: Optional[Dict[str, Tuple[datetime, datetime]]]
+
+    RECORD_SLACK = timedelta(days=31)
+
+    @property
+    def step(self) -> timedelta:
+        """The time between two records of a station."""
+        return timedelta(days=1)
+
+    def _expected_rows(self) -> float:
+        """Upper bound on the number of records of one station over the requested range."""
+        return (self.end_date - self.start_date) / self.step + 1
+
+    @property
+    def sharded(self) -> bool:
+        """Whether per-station queries are split into date windows fetched concurrently."""
+        return self.shard
+
+    def _use_collection_query(self, n_stations: int) -> bool:
+        """Whether a bbox pull is done with one query against the data collection.
+
+        A single query pages through the records of every station one page after another,
+        while per-station queries cost at least one request per station but run
+        `max_workers` at a time. Without `sharded`, the pages of each station also follow
+        one another; with it, the date windows of every station share the workers. The
+        option needing the fewest rounds of requests is chosen.
+        """
+        if self.bbox_mode != "auto":
+            return self.bbox_mode == "collection"
+        if n_stations <= 1:
+            return False
+        rows = self._expected_rows()
+        collection_pages = math.ceil(n_stations * rows / UrlBuilder.MAX_LIMIT)
+        if self.sharded:
+            # a window holds one record less than a page; see DataFrameHandler._windows
+            windows = math.ceil(rows / (UrlBuilder.MAX_LIMIT - 1))
+            station_rounds = math.ceil(n_stations * windows / self.max_workers)
+        else:
+            station_rounds = math.ceil(n_stations / self.max_workers) * math.ceil(
+                rows / UrlBuilder.MAX_LIMIT
+            )
+        return collection_pages <= station_rounds
+
+    def _check_bbox_mode(self, bbox_mode: str) -> str:
+        if bbox_mode not in BBOX_MODES:
+            raise ValueError(
+                f"{bbox_mode} is not a valid bbox mode. Valid modes are: {BBOX_MODES}"
+            )
+        return bbox_mode
+
+    def _query_properties(self, date_column: str, stn_id: Optional[str]) -> List[str]:
+        if date_column not in self.properties:
+            # if we don't add this, we may not get any dates.
+            self.properties.append(date_column)
+        properties = list(self.properties)
+        if stn_id is None and self.station_key not in properties:
+            # a bbox query is split by station afterwards
+            properties.append(self.station_key)
+        return properties
+
+    @property
     @abstractmethod
-    def get_url(self) -> str:  # pragma: no cover
+    def allowed_properties(self) -> List[str]:  # pragma: no cover
         pass
 
+    def _resolve_properties(
+        self, properties: Union[None, str, List[str]], projection: bool
+    ) -> Optional[List[str]]:
+        if isinstance(properties, str):
+            properties = [properties]
+        if properties is not None:
+            properties = [p.upper() for p in properties]
+            self._properties_check(properties)
+        elif projection:
+            # the station columns repeat on every row; they are taken from the catalog
+            properties = [
+                p for p in self.allowed_properties if p not in self.station_properties
+            ]
+        return properties
+
+    def catalog(self, refresh: bool = False) -> StationCatalog:
+        """The station catalog of this network, downloaded once per process."""
+        return StationCatalog.load(
+            self.metadata_collection, self.station_key, self.client, refresh=refresh
+        )
+
+    def metadata(self) -> pd.DataFrame:
+        """The metadata of the requested station(s), or of every station in `bbox`."""
+        catalog = self.catalog()
+        if self.stn_id is not None:
+            return catalog.lookup(self.stn_id)
+        if self.bbox is not None:
+            return catalog.within(self.bbox)
+        # the catalog is shared by the process, so callers get their own copy
+        return catalog.df.copy()
+
+    def station_attributes(self, stations: List[str]) -> pd.DataFrame:
+        """The catalog attributes of `stations`, named as in the data collection.
+
+        The frame is indexed by station and has the columns of `catalog_columns` found in
+        the catalog.
+        """
+        meta = self.catalog().lookup(stations).drop_duplicates(self.station_key)
+        attrs = pd.DataFrame(index=pd.Index(meta[self.station_key].astype(str)))
+        for col, candidates in self.catalog_columns.items():
+            found = [name for name in candidates if name in meta.columns]
+            if found:
+                attrs[col] = meta[found[0]].to_numpy()
+        return attrs
+
+    def _record_period(self, meta: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """The first and last date of record of each station in `meta` (NaT if unknown)."""
+        unknown = pd.Series(pd.NaT, index=meta.index, dtype="datetime64[ns]")
+        return unknown, unknown
+
+    def _has_data(self, meta: pd.DataFrame) -> pd.Series:
+        """Whether each station in `meta` can have data in the requested collection."""
+        return pd.Series(True, index=meta.index)
+
+    def plan(self, stations: List[str]) -> Dict[str, Tuple[datetime, datetime]]:
+        """The date range to request for each station, narrowed to its period of record.
+
+        Stations whose record does not overlap `start_date`-`end_date`, or whose period of
+        record is empty in the catalog, are left out. Stations missing from the catalog, or
+        from a network without periods of record, keep the full range.
+        The last date of record is only refreshed from time to time upstream, so the end
+        of the range is narrowed to `RECORD_SLACK` after it.
+        """
+        meta = self.catalog().lookup(stations).drop_duplicates(self.station_key)
+        meta = meta.set_index(self.station_key)
+        first, last = self._record_period(meta)
+        has_data = self._has_data(meta)
+        periods = {}
+        for stn in stations:
+            start, end = self.start_date, self.end_date
+            if stn in meta.index:
+                if not has_data[stn]:
+                    continue
+                if pd.notna(first[stn]):
+                    start = max(start, first[stn].to_pydatetime())
+                if pd.notna(last[stn]):
+                    end = min(end, (last[stn] + self.RECORD_SLACK).to_pydatetime())
+            if start <= end:
+                periods[stn] = (start, end)
+        return periods
+
+    def get_bbox_url(self) -> List[str]:
+        stations = self.catalog().within(self.bbox)
+        self.periods = self.plan(stations[self.station_key].unique().tolist())
+        self.stn_id = list(self.periods)
+        if not self.periods:
+            return []
+        if self._use_collection_query(len(self.stn_id)):
+            start = min(start for start, _ in self.periods.values())
+            end = max(end for _, end in self.periods.values())
+            return [self.get_url(start_date=start, end_date=end)]
+        return [self.get_url(id, *self.periods[id]) for id in self.stn_id]
+
+    def build_url(self) -> List[str]:
+        """The data URLs over the whole date range, built without any request.
+
+        A `bbox` is a single query against the data collection; see `plan_urls` for the
+        requests actually sent.
+        """
+        if self.stn_id is None:
+            return [self.get_url()]
+        stations = [self.stn_id] if isinstance(self.stn_id, str) else self.stn_id
+        return [self.get_url(str(id)) for id in stations]
+
+    def plan_urls(self) -> List[str]:
+        """The data URLs, narrowed to the period of record of each station (see `plan`).
+
+        This reads the station catalog, and sets `periods` to the date range requested for
+        each station.
+        """
+        if self.bbox is not None:
+            return self.get_bbox_url()
+        if self.stn_id is None:
+            self.periods = {}
+            return [self.get_url()]
+        stations = [self.stn_id] if isinstance(self.stn_id, str) else self.stn_id
+        self.periods = self.plan([str(s) for s in stations])
+        return [self.get_url(id, *self.periods[id]) for id in self.periods]
+
     @abstractmethod
-    def build_url(self) -> List[str]:  # pragma: no cover
+    def get_url(self) -> str:  # pragma: no cover
         pass
 
     @abstractmethod
@@ -22,6 +219,107 @@ class UrlHandler(ABC):
 
 
 class WeatherStationsUrlHandler(UrlHandler):
+    metadata_collection = "climate-stations"
+    station_key = "CLIMATE_IDENTIFIER"
+    station_properties = [
+        "STATION_NAME",
+        "CLIMATE_IDENTIFIER",
+        "ID",
+        "PROVINCE_CODE",
+        "LOCAL_YEAR",
+        "LOCAL_MONTH",
+        "LOCAL_DAY",
+        "STN_ID",
+        # the station location in hourly data, the same as `x` and `y`
+        "LATITUDE_DECIMAL_DEGREES",
+        "LONGITUDE_DECIMAL_DEGREES",
+    ]
+    catalog_columns = {
+        "x": ["x"],
+        "y": ["y"],
+        "STATION_NAME": ["STATION_NAME"],
+        "PROVINCE_CODE": ["PROVINCE_CODE", "PROV_STATE_TERR_CODE"],
+        "STN_ID": ["STN_ID"],
+    }
+    properties_hourly = [
+        "CLIMATE_IDENTIFIER",
+        "DEW_POINT_TEMP",
+        "DEW_POINT_TEMP_FLAG",
+        "HUMIDEX",
+        "HUMIDEX_FLAG",
+        "ID",
+        "LATITUDE_DECIMAL_DEGREES",
+        "LOCAL_DATE",
+        "LOCAL_DAY",
+        "LOCAL_HOUR",
+        "LOCAL_MONTH",
+        "LOCAL_YEAR",
+        "LONGITUDE_DECIMAL_DEGREES",
+        "PRECIP_AMOUNT",
+        "PRECIP_AMOUNT_FLAG",
+        "PROVINCE_CODE",
+        "RELATIVE_HUMIDITY",
+        "RELATIVE_HUMIDITY_FLAG",
+        "STATION_NAME",
+        "STATION_PRESSURE",
+        "STATION_PRESSURE_FLAG",
+        "STN_ID",
+        "TEMP",
+        "TEMP_FLAG",
+        "UTC_DATE",
+        "UTC_DAY",
+        "UTC_MONTH",
+        "UTC_YEAR",
+        "VISIBILITY",
+        "VISIBILITY_FLAG",
+        "WEATHER_ENG_DESC",
+        "WEATHER_FRE_DESC",
+        "WINDCHILL",
+        "WINDCHILL_FLAG",
+        "WIND_DIRECTION",
+        "WIND_DIRECTION_FLAG",
+        "WIND_SPEED",
+        "WIND_SPEED_FLAG",
+    ]
+    properties_daily = [
+        "CLIMATE_IDENTIFIER",
+        "COOLING_DEGREE_DAYS",
+        "COOLING_DEGREE_DAYS_FLAG",
+        "DIRECTION_MAX_GUST",
+        "DIRECTION_MAX_GUST_FLAG",
+        "HEATING_DEGREE_DAYS",
+        "HEATING_DEGREE_DAYS_FLAG",
+        "ID",
+        "LOCAL_DATE",
+        "LOCAL_DAY",
+        "LOCAL_MONTH",
+        "LOCAL_YEAR",
+        "MAX_REL_HUMIDITY",
+        "MAX_REL_HUMIDITY_FLAG",
+        "MAX_TEMPERATURE",
+        "MAX_TEMPERATURE_FLAG",
+        "MEAN_TEMPERATURE",
+        "MEAN_TEMPERATURE_FLAG",
+        "MIN_REL_HUMIDITY",
+        "MIN_REL_HUMIDITY_FLAG",
+        "MIN_TEMPERATURE",
+        "MIN_TEMPERATURE_FLAG",
+        "PROVINCE_CODE",
+        "SNOW_ON_GROUND",
+        "SNOW_ON_GROUND_FLAG",
+        "SOURCE",
+        "SPEED_MAX_GUST",
+        "SPEED_MAX_GUST_FLAG",
+        "STATION_NAME",
+        "STN_ID",
+        "TOTAL_PRECIPITATION",
+        "TOTAL_PRECIPITATION_FLAG",
+        "TOTAL_RAIN",
+        "TOTAL_RAIN_FLAG",
+        "TOTAL_SNOW",
+        "TOTAL_SNOW_FLAG",
+    ]
+
     def __init__(
         self,
         start_date: datetime,
@@ -30,113 +328,36 @@ class WeatherStationsUrlHandler(UrlHandler):
         hourly: bool = False,
         bbox: List[float] = None,
         properties: List[str] = None,
+        client: Optional[HttpClient] = None,
+        bbox_mode: str = "auto",
+        max_workers: int = 4,
+        projection: bool = False,
+        shard: bool = False,
     ):
         self.start_date = start_date
         self.end_date = end_date
         self.stn_id = stn_id
         self.hourly = hourly
         self.bbox = bbox
-        if isinstance(properties, str):
-            properties = [properties]
-        if properties is not None:
-            properties = [p.upper() for p in properties]
-            self._properties_check(properties)
-        self.properties = properties
+        self.client = client or HttpClient()
+        self.bbox_mode = self._check_bbox_mode(bbox_mode)
+        self.max_workers = max_workers
+        self.shard = shard
+        self.properties = self._resolve_properties(properties, projection)
+        self.periods = None
+
+    @property
+    def allowed_properties(self) -> List[str]:
+        return self.properties_hourly if self.hourly else self.properties_daily
 
     def _properties_check(self, properties: List[str]) -> None:
-        allowed_properties_hourly = [
-            "CLIMATE_IDENTIFIER",
-            "DEW_POINT_TEMP",
-            "DEW_POINT_TEMP_FLAG",
-            "HUMIDEX",
-            "HUMIDEX_FLAG",
-            "ID",
-            "LATITUDE_DECIMAL_DEGREES",
-            "LOCAL_DATE",
-            "LOCAL_DAY",
-            "LOCAL_HOUR",
-            "LOCAL_MONTH",
-            "LOCAL_YEAR",
-            "LONGITUDE_DECIMAL_DEGREES",
-            "PRECIP_AMOUNT",
-            "PRECIP_AMOUNT_FLAG",
-            "PROVINCE_CODE",
-            "RELATIVE_HUMIDITY",
-            "RELATIVE_HUMIDITY_FLAG",
-            "STATION_NAME",
-            "STATION_PRESSURE",
-            "STATION_PRESSURE_FLAG",
-            "STN_ID",
-            "TEMP",
-            "TEMP_FLAG",
-            "UTC_DATE",
-            "UTC_DAY",
-            "UTC_MONTH",
-            "UTC_YEAR",
-            "VISIBILITY",
-            "VISIBILITY_FLAG",
-            "WEATHER_ENG_DESC",
-            "WEATHER_FRE_DESC",
-            "WINDCHILL",
-            "WINDCHILL_FLAG",
-            "WIND_DIRECTION",
-            "WIND_DIRECTION_FLAG",
-            "WIND_SPEED",
-            "WIND_SPEED_FLAG",
-        ]
-
-        allowed_properties_daily = [
-            "CLIMATE_IDENTIFIER",
-            "COOLING_DEGREE_DAYS",
-            "COOLING_DEGREE_DAYS_FLAG",
-            "DIRECTION_MAX_GUST",
-            "DIRECTION_MAX_GUST_FLAG",
-            "HEATING_DEGREE_DAYS",
-            "HEATING_DEGREE_DAYS_FLAG",
-            "ID",
-            "LOCAL_DATE",
-            "LOCAL_DAY",
-            "LOCAL_MONTH",
-            "LOCAL_YEAR",
-            "MAX_REL_HUMIDITY",
-            "MAX_REL_HUMIDITY_FLAG",
-            "MAX_TEMPERATURE",
-            "MAX_TEMPERATURE_FLAG",
-            "MEAN_TEMPERATURE",
-            "MEAN_TEMPERATURE_FLAG",
-            "MIN_REL_HUMIDITY",
-            "MIN_REL_HUMIDITY_FLAG",
-            "MIN_TEMPERATURE",
-            "MIN_TEMPERATURE_FLAG",
-            "PROVINCE_CODE",
-            "SNOW_ON_GROUND",
-            "SNOW_ON_GROUND_FLAG",
-            "SOURCE",
-            "SPEED_MAX_GUST",
-            "SPEED_MAX_GUST_FLAG",
-            "STATION_NAME",
-            "STN_ID",
-            "TOTAL_PRECIPITATION",
-            "TOTAL_PRECIPITATION_FLAG",
-            "TOTAL_RAIN",
-            "TOTAL_RAIN_FLAG",
-            "TOTAL_SNOW",
-            "TOTAL_SNOW_FLAG",
-        ]
-        if self.hourly:
-            for prop in properties:
-                if prop not in allowed_properties_hourly:
-                    raise ValueError(
-                        f"{prop} is not a valid property for hourly data. "
-                        + f"Valid properties are: {allowed_properties_hourly}"
-                    )
-        else:
-            for prop in properties:
-                if prop not in allowed_properties_daily:
-                    raise ValueError(
-                        f"{prop} is not a valid property for daily data. "
-                        + f"Valid properties are: {allowed_properties_daily}"
-                    )
+        frequency = "hourly" if self.hourly else "daily"
+        for prop in properties:
+            if prop not in self.allowed_properties:
+                raise ValueError(
+                    f"{prop} is not a valid property for {frequency} data. "
+                    + f"Valid properties are: {self.allowed_properties}"
+                )
 
     def get_metadata(self, stn_id: str = None) -> str:
         builder = UrlBuilder("climate-stations")
@@ -147,29 +368,46 @@ class WeatherStationsUrlHandler(UrlHandler):
         response_url = builder.build()
         return response_url
 
-    def get_bbox_url(self) -> List[str]:
-        response_url = self.get_metadata()
-        df = pd.read_csv(response_url)
-        self.stn_id = df["CLIMATE_IDENTIFIER"].unique().tolist()
-        urls = []
-        for id in self.stn_id:
-            response_url = self.get_url(id)
-            urls.append(response_url)
-        return urls
-
-    def get_url(self, stn_id: str = None) -> str:
-        if self.hourly:
-            builder = UrlBuilder("climate-hourly")
-        else:
-            builder = UrlBuilder("climate-daily")
-        builder.date_range = (self.start_date, self.end_date)
+    @property
+    def collection(self) -> str:
+        return "climate-hourly" if self.hourly else "climate-daily"
+
+    def _record_period(self, meta: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        prefix = "HLY" if self.hourly else "DLY"
+        if f"{prefix}_FIRST_DATE" not in meta.columns:
+            return super()._record_period(meta)
+        first = pd.to_datetime(meta[f"{prefix}_FIRST_DATE"], errors="coerce")
+        last = pd.to_datetime(meta[f"{prefix}_LAST_DATE"], errors="coerce")
+        return first, last
+
+    def _has_data(self, meta: pd.DataFrame) -> pd.Series:
+        prefix = "HLY" if self.hourly else "DLY"
+        if f"{prefix}_FIRST_DATE" not in meta.columns:
+            return super()._has_data(meta)
+        # a station without a period of record at this frequency has no data at it
+        first, last = self._record_period(meta)
+        return first.notna() | last.notna()
+
+    @property
+    def step(self) -> timedelta:
+        return timedelta(hours=1) if self.hourly else timedelta(days=1)
+
+    def get_url(
+        self,
+        stn_id: str = None,
+        start_date: datetime = None,
+        end_date: datetime = None,
+    ) -> str:
+        """Build the data URL of a station, or of every station in `bbox` if `stn_id` is None."""
+        builder = UrlBuilder(self.collection)
+        builder.date_range = (start_date or self.start_date, end_date or self.end_date)
         builder.sortby = "PROVINCE_CODE,STN_ID,LOCAL_DATE"
-        builder.climate_identifier = stn_id
+        if stn_id is None and self.bbox is not None:
+            builder.bbox = self.bbox
+        else:
+            builder.climate_identifier = stn_id
         if self.properties is not None:
-            if "LOCAL_DATE" not in self.properties:
-                # if we don't add this, we may not get any dates.
-                self.properties.append("LOCAL_DATE")
-            builder.properties = self.properties
+            builder.properties = self._query_properties("LOCAL_DATE", stn_id)
         response_url = builder.build()
         return response_url
 
@@ -181,16 +419,50 @@ class WeatherStationsUrlHandler(UrlHandler):
         else:
             return [self.get_metadata()]
 
-    def build_url(self) -> List[str]:
-        if self.bbox is not None:
-            return self.get_bbox_url()
-        if isinstance(self.stn_id, list):
-            return [self.get_url(id) for id in self.stn_id]
-        else:
-            return [self.get_url(self.stn_id)]
-
 
 class HydrometricStationsUrlHandler(UrlHandler):
+    metadata_collection = "hydrometric-stations"
+    station_key = "STATION_NUMBER"
+    station_properties = [
+        "STATION_NAME",
+        "STATION_NUMBER",
+        "IDENTIFIER",
+        "PROV_TERR_STATE_LOC",
+    ]
+    catalog_columns = {
+        "x": ["x"],
+        "y": ["y"],
+        "STATION_NAME": ["STATION_NAME"],
+        "PROV_TERR_STATE_LOC": ["PROV_TERR_STATE_LOC"],
+    }
+    properties_realtime = [
+        "DATETIME",
+        "DATETIME_LST",
+        "DISCHARGE",
+        "DISCHARGE_SYMBOL_EN",
+        "DISCHARGE_SYMBOL_FR",
+        "IDENTIFIER",
+        "LEVEL",
+        "LEVEL_SYMBOL_EN",
+        "LEVEL_SYMBOL_FR",
+        "PROV_TERR_STATE_LOC",
+        "STATION_NAME",
+        "STATION_NUMBER",
+    ]
+    properties_daily = [
+        "DATE",
+        "DISCHARGE",
+        "DISCHARGE_SYMBOL_EN",
+        "DISCHARGE_SYMBOL_FR",
+        "IDENTIFIER",
+        "LEVEL",
+        "LEVEL_SYMBOL_EN",
+        "LEVEL_SYMBOL_FR",
+        "PROV_TERR_STATE_LOC",
+        "STATION_NAME",
+        "STATION_NUMBER",
+    ]
+
     def __init__(
         self,
         start_date: datetime,
@@ -199,62 +471,41 @@ class HydrometricStationsUrlHandler(UrlHandler):
         realtime: bool = False,
         bbox: list = None,
         properties: List[str] = None,
+        client: Optional[HttpClient] = None,
+        bbox_mode: str = "auto",
+        max_workers: int = 4,
+        projection: bool = False,
+        shard: bool = False,
     ):
         self.start_date = start_date
         self.end_date = end_date
         self.stn_id = stn_id
         self.realtime = realtime
         self.bbox = bbox
-        if isinstance(properties, str):
-            properties = [properties]
-        if properties is not None:
-            properties = [p.upper() for p in properties]
-            self._properties_check(properties)
-        self.properties = properties
+        self.client = client or HttpClient()
+        self.bbox_mode = self._check_bbox_mode(bbox_mode)
+        self.max_workers = max_workers
+        self.shard = shard
+        self.properties = self._resolve_properties(properties, projection)
+        self.periods = None
+
+    @property
+    def allowed_properties(self) -> List[str]:
+        return self.properties_realtime if self.realtime else self.properties_daily
+
+    @property
+    def sharded(self) -> bool:
+        # realtime requests have no date range to split
+        return self.shard and not self.realtime
 
     def _properties_check(self, properties: List[str]) -> None:
-        allowed_properties_realtime = [
-            "DATETIME",
-            "DATETIME_LST",
-            "DISCHARGE",
-            "DISCHARGE_SYMBOL_EN",
-            "DISCHARGE_SYMBOL_FR",
-            "IDENTIFIER",
-            "LEVEL",
-            "LEVEL_SYMBOL_EN",
-            "LEVEL_SYMBOL_FR",
-            "PROV_TERR_STATE_LOC",
-            "STATION_NAME",
-            "STATION_NUMBER",
-        ]
-
-        allowed_properties_daily = [
-            "DATE",
-            "DISCHARGE",
-            "DISCHARGE_SYMBOL_EN",
-            "DISCHARGE_SYMBOL_FR",
-            "IDENTIFIER",
-            "LEVEL",
-            "LEVEL_SYMBOL_EN",
-            "LEVEL_SYMBOL_FR",
-            "PROV_TERR_STATE_LOC",
-            "STATION_NAME",
-            "STATION_NUMBER",
-        ]
-        if self.realtime:
-            for prop in properties:
-                if prop not in allowed_properties_realtime:
-                    raise ValueError(
-                        f"{prop} is not a valid property for realtime data. "
-                        + f"Valid properties are: {allowed_properties_realtime}"
-                    )
-        else:
-            for prop in properties:
-                if prop not in allowed_properties_daily:
-                    raise ValueError(
-                        f"{prop} is not a valid property for daily data. "
-                        + f"Valid properties are: {allowed_properties_daily}"
-                    )
+        frequency = "realtime" if self.realtime else "daily"
+        for prop in properties:
+            if prop not in self.allowed_properties:
+                raise ValueError(
+                    f"{prop} is not a valid property for {frequency} data. "
+                    + f"Valid properties are: {self.allowed_properties}"
+                )
 
     def get_metadata(self, stn_id: str = None) -> str:
         builder = UrlBuilder("hydrometric-stations")
@@ -265,46 +516,79 @@ class HydrometricStationsUrlHandler(UrlHandler):
         response_url = builder.build()
         return response_url
 
-    def get_bbox_url(self) -> List[str]:
-        response_url = self.get_metadata()
-        df = pd.read_csv(response_url)
-        self.stn_id = df["STATION_NUMBER"].unique().tolist()
-        urls = []
-        for id in self.stn_id:
-            response_url = self.get_url(id)
-            urls.append(response_url)
-        return urls
-
-    def _url_realtime(self, stn_id: str = None) -> str:
+    def _set_station_or_bbox(self, builder: UrlBuilder, stn_id: Optional[str]) -> None:
+        if stn_id is None and self.bbox is not None:
+            builder.bbox = self.bbox
+            # a total order keeps the pages of a multi-station query consistent
+            builder.sortby = f"STATION_NUMBER,{builder.sortby}"
+        else:
+            builder.station_number = stn_id
+
+    def _url_realtime(self, stn_id: str = None, since: datetime = None) -> str:
         builder = UrlBuilder("hydrometric-realtime")
-        builder.station_number = stn_id
         builder.sortby = "DATETIME"
+        self._set_station_or_bbox(builder, stn_id)
+        if since is not None:
+            builder.date_since = since
         if self.properties is not None:
-            if "DATETIME" not in self.properties:
-                # if we don't add this, we may not get any dates.
-                self.properties.append("DATETIME")
-            builder.properties = self.properties
+            builder.properties = self._query_properties("DATETIME", stn_id)
         response_url = builder.build()
         return response_url
 
-    def _url_daily(self, stn_id: str = None) -> str:
+    def _url_daily(
+        self,
+        stn_id: str = None,
+        start_date: datetime = None,
+        end_date: datetime = None,
+    ) -> str:
         builder = UrlBuilder("hydrometric-daily-mean")
-        builder.date_range_hydrometric = (self.start_date, self.end_date)
+        builder.date_range_hydrometric = (
+            start_date or self.start_date,
+            end_date or self.end_date,
+        )
         builder.sortby = "DATE"
-        builder.station_number = stn_id
+        self._set_station_or_bbox(builder, stn_id)
         if self.properties is not None:
-            if "DATE" not in self.properties:
-                # if we don't add this, we may not get any dates.
-                self.properties.append("DATE")
-            builder.properties = self.properties
+            builder.properties = self._query_properties("DATE", stn_id)
         response_url = builder.build()
         return response_url
 
-    def get_url(self, stn_id: str = None) -> str:
+    @property
+    def collection(self) -> str:
+        return "hydrometric-realtime" if self.realtime else "hydrometric-daily-mean"
+
+    def _has_data(self, meta: pd.DataFrame) -> pd.Series:
+        # hydrometric stations only tell whether they report realtime data
+        if self.realtime and "REAL_TIME" in meta.columns:
+            return meta["REAL_TIME"].fillna(1).astype(bool)
+        return super()._has_data(meta)
+
+    @property
+    def step(self) -> timedelta:
+        return timedelta(minutes=5) if self.realtime else timedelta(days=1)
+
+    def _expected_rows(self) -> float:
+        if self.realtime:
+            # realtime data only covers the last 30 days
+            return timedelta(days=30) / self.step
+        return super()._expected_rows()
+
+    def get_url(
+        self,
+        stn_id: str = None,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        since: datetime = None,
+    ) -> str:
+        """Build the data URL of a station, or of every station in `bbox` if `stn_id` is None.
+
+        For realtime data, `since` (UTC) limits the readings to those from that time on.
+        """
+        # realtime data only covers a rolling window, so the dates do not apply
         if self.realtime:
-            response_url = self._url_realtime(stn_id)
+            response_url = self._url_realtime(stn_id, since)
         else:
-            response_url = self._url_daily(stn_id)
+            response_url = self._url_daily(stn_id, start_date, end_date)
         return response_url
 
     def build_url_metadata(self) -> List[str]:
@@ -314,11 +598,3 @@ class HydrometricStationsUrlHandler(UrlHandler):
             return [self.get_metadata(self.stn_id)]
         else:
             return [self.get_metadata()]
-
-    def build_url(self) -> List[str]:
-        if self.bbox is not None:
-            return self.get_bbox_url()
-        if isinstance(self.stn_id, list):
-            return [self.get_url(id) for id in self.stn_id]
-        else:
-            return [self.get_url(self.stn_id)]
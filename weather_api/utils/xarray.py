@@ -1,15 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
-import xarray as xr
+
+if TYPE_CHECKING:
+    import xarray as xr
 
 # this script is used to handle the csv files that are downloaded from the weather api
 
 
 def _get_unique_rowval(df: pd.DataFrame, col: str) -> str:
     if col in df.columns:
-        return df[col].unique()[0]
+        # the value is the same on every row, so the first one is enough
+        return df[col].iloc[0]
     else:
         return None
 
@@ -24,55 +28,249 @@ def _candidate_coords_to_assign(coords: dict) -> dict:
     return coordinates
 
 
+def is_flag(col: str) -> bool:
+    """Whether `col` holds quality flags (the `*_FLAG` and `*_SYMBOL_*` columns)."""
+    return col.endswith("_FLAG") or "_SYMBOL_" in col
+
+
+def flag_dtype(meanings: List[str]) -> np.dtype:
+    """The integer type of the codes of `meanings`: int8, or int16 past 127 flags."""
+    return np.dtype("int8" if len(meanings) <= np.iinfo("int8").max else "int16")
+
+
+def flag_attrs(meanings: List[str], dtype=None) -> dict:
+    """The attributes describing the codes of a flag variable.
+
+    The CF `flag_meanings` are separated by blanks, so a blank within a flag is written
+    as "_" there; the flags themselves are kept in `flag_strings` for `decode_flags`.
+    `dtype` defaults to `flag_dtype(meanings)`.
+    """
+    return {
+        "flag_values": np.arange(len(meanings), dtype=dtype or flag_dtype(meanings)),
+        "flag_meanings": " ".join(meaning.replace(" ", "_") for meaning in meanings),
+        "flag_strings": list(meanings),
+    }
+
+
+def _flag_codes(series: pd.Series, meanings: List[str]) -> np.ndarray:
+    """Codes of a categorical flag column in `meanings`, which is extended as needed."""
+    categories = [str(category).strip() for category in series.cat.categories]
+    for category in categories:
+        if category and category not in meanings:
+            meanings.append(category)
+    # a missing or blank flag has code -1, which picks the trailing -1
+    lookup = [meanings.index(category) if category else -1 for category in categories]
+    lookup = np.array(lookup + [-1])
+    return lookup[series.cat.codes.to_numpy()]
+
+
+def decode_flags(ds: "xr.Dataset") -> "xr.Dataset":
+    """Replace the integer codes of the flag variables of `ds` with the flag strings.
+
+    Flag variables are those with a `flag_meanings` attribute. Values without a flag (code
+    -1) become NaN, as in the dataframes.
+    """
+    ds = ds.copy()
+    for name, var in ds.data_vars.items():
+        if "flag_meanings" not in var.attrs:
+            continue
+        strings = var.attrs.get("flag_strings", var.attrs["flag_meanings"].split())
+        if isinstance(strings, str):
+            strings = [strings]
+        meanings = np.array(list(strings) + [np.nan], dtype=object)
+        attrs = {
+            key: value
+            for key, value in var.attrs.items()
+            if key not in ("flag_values", "flag_meanings", "flag_strings")
+        }
+        ds[name] = (var.dims, meanings[var.values], attrs)
+    return ds
+
+
 class XArrayHandler(ABC):
-    @abstractmethod
-    def to_xr(self, path: str):
-        pass
+    """Base class to convert a dictionary of station dataframes to an xarray dataset.
+
+    Attributes
+    ----------
+    station_dim : str
+        The name of the station dimension.
+    drop_columns : list of str
+        The columns describing the station rather than a measurement.
+    coord_columns : dict
+        The station coordinates, mapped to the column they are read from.
+    station_attrs : Optional[pd.DataFrame]
+        Station attributes indexed by station, used for the coordinates whose column is not
+        in the dataframes (see `UrlHandler.station_attributes`).
+    flags : dict
+        The flags of each flag column, in the order of their codes. They are shared by
+        every call to `to_xr` and `df_to_xr`, so that the codes of stations converted one
+        at a time agree.
+    """
+
+    station_dim: str
+    drop_columns: List[str]
+    coord_columns: Dict[str, str]
+
+    def __init__(
+        self,
+        dict_frame: Dict[str, pd.DataFrame],
+        station_attrs: Optional[pd.DataFrame] = None,
+    ):
+        self.dict_frame = dict_frame
+        self.station_attrs = station_attrs
+        self.flags: Dict[str, List[str]] = {}
+
+    def _station_attr(self, stn_id: str, col: str) -> Optional[str]:
+        attrs = self.station_attrs
+        if attrs is None or col not in attrs.columns or stn_id not in attrs.index:
+            return None
+        value = attrs.at[stn_id, col]
+        return None if pd.isna(value) else value
 
+    @staticmethod
     @abstractmethod
-    def df_to_xr(self) -> Dict[str, pd.DataFrame]:
+    def _assign_units(ds: "xr.Dataset") -> "xr.Dataset":
         pass
 
+    def _coords(self, df: pd.DataFrame, stn_id: str) -> dict:
+        coords = {}
+        for name, col in self.coord_columns.items():
+            if col in df.columns:
+                coords[name] = _get_unique_rowval(df, col)
+            else:
+                coords[name] = self._station_attr(stn_id, col)
+        coords[self.station_dim] = stn_id
+        return coords
 
-class WeatherStationsXArray(XArrayHandler):
-    """Class to convert weather station dataframes to an xarray dataset"""
-
-    def __init__(self, dict_frame: Dict[str, pd.DataFrame]):
-        self.dict_frame = dict_frame
+    def df_to_xr(self, df: pd.DataFrame, stn_id: str) -> "xr.Dataset":
+        import xarray as xr
 
-    def df_to_xr(self, df: pd.DataFrame, stn_id: str) -> xr.Dataset:
-        x = _get_unique_rowval(df, "x")
-        y = _get_unique_rowval(df, "y")
-        station_name = _get_unique_rowval(df, "STATION_NAME")
-        province_code = _get_unique_rowval(df, "PROVINCE_CODE")
-        columns = [
-            "x",
-            "y",
-            "STATION_NAME",
-            "CLIMATE_IDENTIFIER",
-            "ID",
-            "PROVINCE_CODE",
-            "LOCAL_YEAR",
-            "LOCAL_MONTH",
-            "LOCAL_DAY",
-        ]
-        columns = _candidate_columns_to_drop(df=df, columns=columns)
+        coords = self._coords(df=df, stn_id=stn_id)
+        columns = _candidate_columns_to_drop(df=df, columns=self.drop_columns)
         df = df.drop(columns=columns)
+        codes = {}
+        for col in df.columns:
+            if is_flag(col) and isinstance(df[col].dtype, pd.CategoricalDtype):
+                meanings = self.flags.setdefault(col, [])
+                codes[col] = _flag_codes(df[col], meanings).astype(flag_dtype(meanings))
+        df = df.assign(**codes)
         ds = xr.Dataset.from_dataframe(df)
-        ds = ds.rename({"LOCAL_DATE": "time"})
-        coords = {
-            "x": x,
-            "y": y,
-            "climate_identifier": stn_id,
-            "station_name": station_name,
-            "province_code": province_code,
-        }
+        ds = ds.rename({df.index.name: "time"})
+        for col in codes:
+            ds[col].attrs.update(flag_attrs(self.flags[col]))
         coords = _candidate_coords_to_assign(coords=coords)
         ds = ds.assign_coords(coords=coords)
         ds = self._assign_units(ds)
         return ds
+
+    def _station_coords(self, coords: Dict[str, list]) -> dict:
+        # like `xr.concat`, a coordinate equal for every station stays a scalar
+        station_coords = {}
+        for name, values in coords.items():
+            if all(value is None for value in values):
+                # like `df_to_xr`, a coordinate no station has is left out
+                continue
+            if any(value is None for value in values):
+                values = [np.nan if value is None else value for value in values]
+            elif name != self.station_dim and len(set(values)) == 1:
+                station_coords[name] = values[0]
+                continue
+            station_coords[name] = (self.station_dim, np.asarray(values))
+        return station_coords
+
+    def to_xr(self) -> "xr.Dataset":
+        """Build one dataset holding every station along `station_dim`.
+
+        The time axis is the union of the dates of all stations. Each variable is filled
+        into a preallocated (station, time) array, float32 for numeric columns and object
+        for text, with NaN where a station has no record. Flag columns (see `is_flag`) are
+        stored as integer codes (see `flag_dtype`) described by `flag_attrs`, -1 meaning
+        no flag; see `decode_flags`.
+        """
+        import xarray as xr
+
+        if not self.dict_frame:
+            return xr.Dataset()
+        stations = list(self.dict_frame)
+        frames = list(self.dict_frame.values())
+        time = frames[0].index.append([df.index for df in frames[1:]])
+        time = time.unique().sort_values()
+        shape = (len(stations), len(time))
+        data: Dict[str, np.ndarray] = {}
+        flagged = set()
+        coords: Dict[str, list] = {}
+        for i, (stn_id, df) in enumerate(zip(stations, frames)):
+            for name, value in self._coords(df=df, stn_id=stn_id).items():
+                coords.setdefault(name, [None] * len(stations))[i] = value
+            positions = time.get_indexer(df.index)
+            for col in df.columns:
+                if col in self.drop_columns:
+                    continue
+                series = df[col]
+                if (
+                    is_flag(col)
+                    and isinstance(series.dtype, pd.CategoricalDtype)
+                    and (col not in data or col in flagged)
+                ):
+                    meanings = self.flags.setdefault(col, [])
+                    codes = _flag_codes(series, meanings)
+                    if col not in data:
+                        data[col] = np.full(shape, -1, dtype=flag_dtype(meanings))
+                        flagged.add(col)
+                    elif data[col].dtype != flag_dtype(meanings):
+                        data[col] = data[col].astype(flag_dtype(meanings))
+                    data[col][i, positions] = codes
+                    continue
+                numeric = pd.api.types.is_numeric_dtype(series)
+                if col not in data:
+                    dtype = "float32" if numeric else object
+                    data[col] = np.full(shape, np.nan, dtype=dtype)
+                elif not numeric and data[col].dtype != object:
+                    data[col] = data[col].astype(object)
+                if data[col].dtype == object:
+                    data[col][i, positions] = series.to_numpy(dtype=object)
+                else:
+                    data[col][i, positions] = series.to_numpy(
+                        dtype="float32", na_value=np.nan
+                    )
+        ds = xr.Dataset(
+            {col: ((self.station_dim, "time"), values) for col, values in data.items()},
+            coords={"time": time.to_numpy(), **self._station_coords(coords)},
+        )
+        for col in flagged:
+            ds[col].attrs.update(flag_attrs(self.flags[col], data[col].dtype))
+        ds = self._assign_units(ds)
+        return ds
+
+
+class WeatherStationsXArray(XArrayHandler):
+    """Class to convert weather station dataframes to an xarray dataset"""
+
+    station_dim = "climate_identifier"
+    drop_columns = [
+        "x",
+        "y",
+        "STATION_NAME",
+        "CLIMATE_IDENTIFIER",
+        "ID",
+        "PROVINCE_CODE",
+        "LOCAL_YEAR",
+        "LOCAL_MONTH",
+        "LOCAL_DAY",
+        "STN_ID",
+        "LATITUDE_DECIMAL_DEGREES",
+        "LONGITUDE_DECIMAL_DEGREES",
+    ]
+    coord_columns = {
+        "x": "x",
+        "y": "y",
+        "station_name": "STATION_NAME",
+        "province_code": "PROVINCE_CODE",
+        "stn_id": "STN_ID",
+    }
+
     @staticmethod
-    def _assign_units(ds: xr.Dataset) -> xr.Dataset:
+    def _assign_units(ds: "xr.Dataset") -> "xr.Dataset":
         # Assign units to common weather variables based on GeoMET API documentation
         units_map = {
             "MEAN_TEMPERATURE": "degC",
@@ -97,25 +295,30 @@ class WeatherStationsXArray(XArrayHandler):
                 ds[var].attrs["units"] = unit
         return ds
 
-    def to_xr(self) -> xr.Dataset:
-        ds_list = []
-        for stn_id, df in self.dict_frame.items():
-            for col in df.select_dtypes(include=["category", "string"]).columns:
-                df[col] = df[col].to_numpy()
-            ds = self.df_to_xr(df=df, stn_id=stn_id)
-            ds_list.append(ds)
-        if not ds_list:
-            return xr.Dataset()
-        ds = xr.concat(ds_list, dim="climate_identifier")
-        return ds
-
 
 class HydrometricStationsXArray(XArrayHandler):
-    def __init__(self, dict_frame: Dict[str, pd.DataFrame]):
-        self.dict_frame = dict_frame
+    station_dim = "station_number"
+    drop_columns = [
+        "x",
+        "y",
+        "STATION_NAME",
+        "STATION_NUMBER",
+        "IDENTIFIER",
+        "PROV_TERR_STATE_LOC",
+        "DISCHARGE_SYMBOL_EN",
+        "DISCHARGE_SYMBOL_FR",
+        "LEVEL_SYMBOL_EN",
+        "LEVEL_SYMBOL_FR",
+    ]
+    coord_columns = {
+        "x": "x",
+        "y": "y",
+        "station_name": "STATION_NAME",
+        "province_code": "PROV_TERR_STATE_LOC",
+    }
 
     @staticmethod
-    def _assign_units(ds: xr.Dataset) -> xr.Dataset:
+    def _assign_units(ds: "xr.Dataset") -> "xr.Dataset":
         if "DISCHARGE" in ds.data_vars:
             ds["DISCHARGE"].attrs["units"] = "m3 s-1"
             ds["DISCHARGE"].attrs[
@@ -127,48 +330,3 @@ class HydrometricStationsXArray(XArrayHandler):
             ds["LEVEL"].attrs["standard_name"] = "water_level_in_river_channel"
             ds["LEVEL"].attrs["long_name"] = "River level"
         return ds
-
-    def df_to_xr(self, df: pd.DataFrame, stn_id: str) -> xr.Dataset:
-        x = _get_unique_rowval(df, "x")
-        y = _get_unique_rowval(df, "y")
-        station_name = _get_unique_rowval(df, "STATION_NAME")
-        province_code = _get_unique_rowval(df, "PROV_TERR_STATE_LOC")
-        columns = [
-            "x",
-            "y",
-            "STATION_NAME",
-            "STATION_NUMBER",
-            "IDENTIFIER",
-            "PROV_TERR_STATE_LOC",
-            "DISCHARGE_SYMBOL_EN",
-            "DISCHARGE_SYMBOL_FR",
-            "LEVEL_SYMBOL_EN",
-            "LEVEL_SYMBOL_FR",
-        ]
-        columns = _candidate_columns_to_drop(df=df, columns=columns)
-        df = df.drop(columns=columns)
-        ds = xr.Dataset.from_dataframe(df)
-        ds = ds.rename({"DATE": "time"})
-        coords = {
-            "x": x,
-            "y": y,
-            "station_number": stn_id,
-            "station_name": station_name,
-            "province_code": province_code,
-        }
-        coords = _candidate_coords_to_assign(coords=coords)
-        ds = ds.assign_coords(coords=coords)
-        ds = self._assign_units(ds=ds)
-        return ds
-
-    def to_xr(self) -> xr.Dataset:
-        ds_list = []
-        for stn_id, df in self.dict_frame.items():
-            for col in df.select_dtypes(include=["category", "string"]).columns:
-                df[col] = df[col].to_numpy()
-            ds = self.df_to_xr(df=df, stn_id=stn_id)
-            ds_list.append(ds)
-        if not ds_list:
-            return xr.Dataset()
-        ds = xr.concat(ds_list, dim="station_number")
-        return ds
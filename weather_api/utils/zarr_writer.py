@@ -0,0 +1,147 @@
+"""Write station datasets to a Zarr store one station at a time."""
+
+import warnings
+from typing import TYPE_CHECKING, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .imports import import_optional
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+
+class ZarrStationWriter:
+    """Append per-station datasets (as built by `XArrayHandler.df_to_xr`) to a Zarr store.
+
+    Every station is reindexed onto the same `time` axis and appended along `station_dim`, so
+    the finished store has the layout of `to_xr` and can be opened lazily with
+    `xr.open_zarr`. The variables and coordinates of the first station written define the
+    store; later stations get missing variables filled with NaN ("" for text, -1 for
+    flag codes) and variables unknown to the store are dropped with a warning.
+
+    Attributes
+    ----------
+    store : str or MutableMapping
+        The Zarr store (or path) to write to.
+    station_dim : str
+        The name of the station dimension.
+    time : pd.DatetimeIndex
+        The time axis shared by all stations.
+    time_chunk : int
+        The number of time steps per chunk.
+    mode : str
+        The mode used for the first write ("w-" fails if the store exists, "w" overwrites).
+    """
+
+    def __init__(
+        self,
+        store,
+        station_dim: str,
+        time: pd.DatetimeIndex,
+        time_chunk: int = 8760,
+        mode: str = "w-",
+    ):
+        self.store = store
+        self.station_dim = station_dim
+        self.time = time
+        self.time_chunk = time_chunk
+        self.mode = mode
+        self._template: Optional["xr.Dataset"] = None
+
+    def _conform(self, ds: "xr.Dataset") -> "xr.Dataset":
+        flags = [name for name, var in ds.data_vars.items() if _is_flag_var(var)]
+        ds = ds.reindex(time=self.time, fill_value={name: -1 for name in flags})
+        for name, var in ds.data_vars.items():
+            if name in flags:
+                continue
+            if var.dtype.kind in "iub":
+                ds[name] = var.astype("float32")
+            elif var.dtype.kind == "O":
+                ds[name] = var.where(var.notnull(), "")
+        ds = ds.expand_dims(self.station_dim)
+        ds = ds.assign_coords(
+            {self.station_dim: ds[self.station_dim].values.astype(object)}
+        )
+        scalars = {}
+        for name, coord in ds.coords.items():
+            if coord.ndim == 0:
+                values = coord.values.reshape(1)
+                if values.dtype.kind == "U":
+                    values = values.astype(object)
+                scalars[name] = (self.station_dim, values)
+        return ds.assign_coords(scalars)
+
+    def _match_template(self, ds: "xr.Dataset") -> "xr.Dataset":
+        template = self._template
+        extra = [name for name in ds.variables if name not in template.variables]
+        if extra:
+            warnings.warn(
+                f"Dropping {extra} for {ds[self.station_dim].values[0]}: "
+                + "they are not in the Zarr store."
+            )
+            ds = ds.drop_vars(extra)
+        for name, var in ds.data_vars.items():
+            stored = template[name].dtype
+            if _is_flag_var(var) and var.dtype != stored:
+                # the first station fixes the dtype of the codes in the store
+                if var.size and int(var.max()) > np.iinfo(stored).max:
+                    raise ValueError(
+                        f"{name} has more flags than fit in the {stored} codes of the "
+                        + "Zarr store"
+                    )
+                ds[name] = var.astype(stored)
+        for name, var in template.variables.items():
+            if name in ds.variables or self.station_dim not in var.dims:
+                continue
+            if _is_flag_var(var):
+                fill = -1
+            else:
+                fill = "" if var.dtype.kind == "O" else np.nan
+            shape = tuple(ds.sizes[dim] for dim in var.dims)
+            data = np.full(shape, fill, dtype=var.dtype)
+            if name in template.coords:
+                ds = ds.assign_coords({name: (var.dims, data)})
+            else:
+                ds[name] = (var.dims, data)
+        return ds
+
+    def append(self, ds: "xr.Dataset") -> None:
+        """Append the dataset of one station to the store."""
+        ds = self._conform(ds)
+        if self._template is None:
+            chunks = (1, min(self.time_chunk, len(self.time)))
+            encoding = {
+                name: {"chunks": chunks}
+                for name, var in ds.data_vars.items()
+                if var.dims == (self.station_dim, "time")
+            }
+            ds.to_zarr(self.store, mode=self.mode, encoding=encoding)
+            self._template = ds.isel({self.station_dim: slice(0, 0)})
+        else:
+            ds = self._match_template(ds)
+            ds.to_zarr(self.store, append_dim=self.station_dim)
+
+    def update_attrs(self, attrs: Dict[str, dict]) -> None:
+        """Replace attributes of variables already in the store, by variable name.
+
+        Used for the flag attributes, whose flags grow as stations are appended.
+        """
+        if self._template is None:
+            return
+        zarr = import_optional("zarr", "to_zarr")
+        group = zarr.open_group(self.store, mode="r+")
+        for name, var_attrs in attrs.items():
+            if name in group:
+                group[name].attrs.update(
+                    {
+                        key: value.tolist() if isinstance(value, np.ndarray) else value
+                        for key, value in var_attrs.items()
+                    }
+                )
+        zarr.consolidate_metadata(self.store)
+
+
+def _is_flag_var(var: "xr.DataArray") -> bool:
+    return "flag_meanings" in var.attrs
@@ -1,8 +1,11 @@
+import os
 from datetime import datetime
 from typing import List, Optional, Union
 
 from .base import GeoMetAPI
+from .utils.cache import ResponseCache
 from .utils.handlers import WeatherStationsDataHandler
+from .utils.http import RetryPolicy
 
 """
 https://api.weather.gc.ca/
@@ -32,6 +35,38 @@ class WeatherStations(GeoMetAPI):
         If True, retrieve the hourly-data. If False, retrieve daily data.
     vars : Optional[List[str]]
         The variables to retrieve. If not specified, all variables are retrieved.
+    max_workers : int
+        The maximum number of stations downloaded in parallel by `to_dict_frame` and `to_xr`.
+    prefetch : int
+        The number of pages of a station's series downloaded ahead while the current page is parsed.
+        Set to 0 to download pages one after another.
+    cache : Union[None, str, ResponseCache]
+        A directory (or `ResponseCache`) in which responses are cached between runs.
+        If not specified, nothing is cached.
+    parser : str
+        The CSV parser: "pyarrow", "c" (the default pandas parser) or "auto" to use pyarrow
+        when it is installed.
+    bbox_mode : str
+        How a `bbox` pull is downloaded: "collection" sends one query for all the stations in the
+        box, "station" sends one query per station and "auto" picks whichever needs fewer rounds
+        of requests given the number of stations and the length of the date range.
+    retry : Optional[RetryPolicy]
+        How failed requests are retried. If not specified, connection errors and 429/5xx
+        responses are retried 3 times with exponential backoff and jitter.
+    checkpoint_dir : Union[None, str, os.PathLike]
+        A directory in which the pages downloaded so far are saved, so that running again
+        after a failure resumes where it stopped. The pages are removed once every station
+        has been retrieved.
+    projection : bool
+        If True (the default) and `vars` is not specified, the columns repeating the station
+        on every row (`STATION_NAME`, `CLIMATE_IDENTIFIER`, `ID`, `PROVINCE_CODE` and
+        `LOCAL_YEAR/MONTH/DAY`) are not downloaded; the station coordinates of `to_xr` are
+        taken from the station catalog instead. Set to False to get these columns in the
+        dataframes.
+    shard : bool
+        If True (the default), the date range of each station is split into windows of one
+        page each, fetched concurrently (`max_workers` requests at a time) instead of
+        paging through the series one offset after another.
     """
 
     def __init__(
@@ -42,6 +77,15 @@ class WeatherStations(GeoMetAPI):
         bbox: Optional[List[float]] = None,
         hourly: bool = False,
         vars: Optional[List[str]] = None,
+        max_workers: int = 4,
+        prefetch: int = 1,
+        cache: Union[None, str, ResponseCache] = None,
+        parser: str = "auto",
+        bbox_mode: str = "auto",
+        retry: Optional[RetryPolicy] = None,
+        checkpoint_dir: Union[None, str, os.PathLike] = None,
+        projection: bool = True,
+        shard: bool = True,
     ):
         super().__init__(
             stn_id=stn_id,
@@ -50,5 +94,14 @@ class WeatherStations(GeoMetAPI):
             bbox=bbox,
             hourly=hourly,
             vars=vars,
+            max_workers=max_workers,
+            prefetch=prefetch,
+            cache=cache,
+            parser=parser,
+            bbox_mode=bbox_mode,
+            retry=retry,
+            checkpoint_dir=checkpoint_dir,
+            projection=projection,
+            shard=shard,
             data_handler=WeatherStationsDataHandler,
         )